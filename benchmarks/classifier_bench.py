@@ -0,0 +1,211 @@
+"""
+过期判定基准：在本地替身站点上分别用 HTTP、无头浏览器和完整浏览器三种路径检查语料，
+输出单次检查延迟分位数、吞吐量以及查准率/查全率。
+
+用法: python -m benchmarks.classifier_bench [--paths http,headless,browser] [--latency 0.1] [--jitter 0.05]
+                                           [--repeat 3] [--no-recheck] [--json out.json]
+"""
+import os
+import copy
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from typing import Dict, Any, List
+
+import yaml
+
+from benchmarks.corpus import build_corpus, EXPIRED, NORMAL, TIMEOUT
+from benchmarks.mock_site import MockSite
+from src.utils.expiry_matcher import ExpiryMatcher
+from src.utils.http_checker import HttpChecker
+from src.utils.redirect_stats import percentile
+from src.utils.verdict import VerdictScorer
+
+logger = logging.getLogger(__name__)
+
+
+def bench_config(config: Dict[str, Any], workdir: str, args, name: str, headless: bool = False) -> Dict[str, Any]:
+    """
+    基准使用的独立配置：每条路径一个临时数据库（软404指纹、站点状态等缓存不在路径之间共享），
+    关闭站点限速以免测到的是限速而不是判定本身
+    """
+    config = copy.deepcopy(config)
+    config['database']['path'] = os.path.join(workdir, f'bench-{name}.sqlite3')
+    config['host_limiter'] = dict(config.get('host_limiter') or {}, rate=1000, burst=1000)
+    config['snapshot_archive'] = dict(config.get('snapshot_archive') or {}, enabled=False)
+    config['verdict'] = dict(config.get('verdict') or {}, recheck=not args.no_recheck)
+    config['browser'] = dict(config.get('browser') or {}, headless=headless)
+    return config
+
+
+def write_config(config: Dict[str, Any], workdir: str, name: str) -> str:
+    path = os.path.join(workdir, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+    return path
+
+
+def http_path(config: Dict[str, Any]):
+    """纯 HTTP 检查：不执行脚本，不渲染"""
+    conditions = config['expired_conditions']
+    texts = list(conditions['texts']) + list((config.get('host_health') or {}).get('parked_texts') or [])
+    checker = HttpChecker(ExpiryMatcher(texts), VerdictScorer(config.get('verdict')),
+                          timeout=conditions.get('check_deadline', 8))
+
+    def check(url):
+        verdict = checker.check(url)
+        return verdict.status if verdict is not None else TIMEOUT
+
+    return check, lambda: None
+
+
+def browser_path(config_path: str, base_url: str):
+    """浏览器检查：走 SearchEngine.check_in_new_tab 的完整流程"""
+    from src.utils.browser_manager import BrowserManager
+    from src.engines.base import SearchEngine
+
+    class BenchEngine(SearchEngine):
+        def search(self, keyword):
+            pass
+
+        def get_search_results(self):
+            return []
+
+        def check_expired(self, url):
+            return self.check_in_new_tab(url)
+
+        def submit_feedback(self, result):
+            return False
+
+        def next_page(self):
+            return False
+
+        def get_current_page(self):
+            return 1
+
+    browser_manager = BrowserManager(config_path)
+    engine = BenchEngine(config_path, browser_manager)
+    engine.driver.get(base_url)
+
+    def check(url):
+        return engine.check_expired(url).status
+
+    return check, browser_manager.quit
+
+
+def run_path(name: str, check, cases: List[Dict[str, Any]], site: MockSite, repeat: int) -> Dict[str, Any]:
+    """逐条检查语料并统计延迟、吞吐和分类指标"""
+    latencies = []
+    counts = {'tp': 0, 'fp': 0, 'tn': 0, 'fn': 0, 'timeout': 0, 'expected_timeout': 0, 'timeout_hit': 0}
+    errors = []
+    started = time.time()
+    for _ in range(repeat):
+        for case in cases:
+            t0 = time.time()
+            try:
+                status = check(site.url_for(case))
+            except Exception as e:
+                logger.warning(f"[{name}] 检查出错 {case['id']}: {str(e)}")
+                status = TIMEOUT
+            latencies.append(time.time() - t0)
+
+            if case['label'] == TIMEOUT:
+                counts['expected_timeout'] += 1
+                counts['timeout_hit'] += status == TIMEOUT
+                continue
+            if status == TIMEOUT:
+                counts['timeout'] += 1
+            predicted = status == EXPIRED
+            actual = case['label'] == EXPIRED
+            key = ('t' if predicted == actual else 'f') + ('p' if predicted else 'n')
+            counts[key] += 1
+            if predicted != actual:
+                errors.append((case['id'], case['kind'], case['label'], status))
+    wall = time.time() - started
+
+    precision = counts['tp'] / (counts['tp'] + counts['fp']) if counts['tp'] + counts['fp'] else 0.0
+    recall = counts['tp'] / (counts['tp'] + counts['fn']) if counts['tp'] + counts['fn'] else 0.0
+    return {
+        'path': name,
+        'checks': len(latencies),
+        'wall_seconds': wall,
+        'throughput': len(latencies) / wall if wall else 0.0,
+        'p50': percentile(latencies, 0.5),
+        'p90': percentile(latencies, 0.9),
+        'p99': percentile(latencies, 0.99),
+        'max': max(latencies) if latencies else 0.0,
+        'precision': precision,
+        'recall': recall,
+        'counts': counts,
+        'errors': sorted(set(errors)),
+    }
+
+
+def print_report(reports: List[Dict[str, Any]], show_errors: bool):
+    print(f"\n{'路径':<10}{'检查数':>8}{'吞吐/秒':>10}{'p50':>8}{'p90':>8}{'p99':>8}{'最大':>8}"
+          f"{'查准率':>8}{'查全率':>8}{'超时':>6}")
+    for r in reports:
+        print(f"{r['path']:<10}{r['checks']:>8}{r['throughput']:>10.2f}{r['p50']:>8.2f}{r['p90']:>8.2f}"
+              f"{r['p99']:>8.2f}{r['max']:>8.2f}{r['precision']:>8.2%}{r['recall']:>8.2%}{r['counts']['timeout']:>6}")
+    for r in reports:
+        c = r['counts']
+        print(f"\n[{r['path']}] TP={c['tp']} FP={c['fp']} TN={c['tn']} FN={c['fn']}，"
+              f"慢页面超时 {c['timeout_hit']}/{c['expected_timeout']}")
+        if show_errors:
+            for case_id, kind, label, status in r['errors']:
+                print(f"  误判 {case_id} ({kind}): 标注 {label}，结果 {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='过期判定基准')
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--paths', default='http,headless,browser', help='逗号分隔: http, headless, browser')
+    parser.add_argument('--latency', type=float, default=0.05, help='替身站点响应延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延迟随机抖动（秒）')
+    parser.add_argument('--repeat', type=int, default=1, help='语料重复次数')
+    parser.add_argument('--no-slow', action='store_true', help='不包含超时慢页面')
+    parser.add_argument('--no-recheck', action='store_true', help='关闭低置信度结论的 HTTP 复查')
+    parser.add_argument('--show-errors', action='store_true', help='列出误判的语料')
+    parser.add_argument('--json', help='结果另存为 JSON')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    cases = build_corpus(config)
+    if args.no_slow:
+        cases = [case for case in cases if case['label'] != TIMEOUT]
+    print(f"语料 {len(cases)} 条: 过期 {sum(c['label'] == EXPIRED for c in cases)}，"
+          f"正常 {sum(c['label'] == NORMAL for c in cases)}，慢页面 {sum(c['label'] == TIMEOUT for c in cases)}")
+
+    workdir = tempfile.mkdtemp(prefix='classifier_bench_')
+    reports = []
+    try:
+        with MockSite(cases, args.latency, args.jitter) as site:
+            for name in [p.strip() for p in args.paths.split(',') if p.strip()]:
+                if name == 'http':
+                    check, close = http_path(bench_config(config, workdir, args, name))
+                elif name in ('headless', 'browser'):
+                    path_config = bench_config(config, workdir, args, name, headless=name == 'headless')
+                    check, close = browser_path(write_config(path_config, workdir, f'{name}.yaml'), site.base_url)
+                else:
+                    print(f"未知路径: {name}")
+                    continue
+                try:
+                    reports.append(run_path(name, check, cases, site, args.repeat))
+                finally:
+                    close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(reports, args.show_errors)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+过期判定基准语料：按当前配置生成错误模板页，加上含“404”“nginx”等字样的正常页、
+各类跳转页和非网页资源；benchmarks/corpus/{expired,normal}/*.html 中保存的真实页面也会一并加载。
+"""
+import os
+import glob
+from typing import Dict, Any, List
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+EXPIRED = 'expired'
+NORMAL = 'normal'
+TIMEOUT = 'timeout'  # 预期超时，统计时单独计数
+
+# 站点“不存在”页模板（HTTP 200），不在过期文本中，用于检验软 404 指纹
+SOFT_404_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>示例站点</title></head>
+<body><div class="header"><a href="/">示例站点</a></div>
+<div class="main"><h2>这里什么都没有</h2><p>你要找的内容可能被移动了，看看别的吧。</p>
+<ul><li><a href="/case/normal-0">热门文章</a></li><li><a href="/case/normal-1">最新动态</a></li></ul></div>
+<div class="footer">© 示例站点</div></body></html>"""
+
+INDEX_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>示例站点首页</title></head>
+<body><h1>示例站点</h1><p>欢迎访问。</p></body></html>"""
+
+ARTICLE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body><div class="header"><a href="/">示例站点</a></div>
+<div class="article"><h1>{title}</h1>{body}</div>
+<div class="footer">© 示例站点</div></body></html>"""
+
+ERROR_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>提示</title></head>
+<body><div class="error"><h2>{text}</h2><p>请检查地址是否正确。</p></div></body></html>"""
+
+NGINX_404 = """<html>
+<head><title>404 Not Found</title></head>
+<body>
+<center><h1>404 Not Found</h1></center>
+<hr><center>nginx</center>
+</body>
+</html>"""
+
+# 正文包含泛化过期文本的正常文章
+TOKEN_ARTICLES = [
+    ('HTTP 404 错误排查指南', '<p>当服务器返回 404 时，首先确认路由配置。本文整理了常见原因。</p>' * 3),
+    ('nginx 反向代理配置教程', '<p>nginx 是常用的反向代理服务器，下面介绍 upstream 的配置方法。</p>' * 3),
+    ('接口返回 Not Found 的处理方式', '<p>前端收到 Not Found 时应当提示用户，并记录日志。</p>' * 3),
+    ('为什么会出现 forbidden', '<p>权限不足时服务器会返回 forbidden，检查账号角色即可。</p>' * 3),
+    ('很抱歉，我们来晚了：年度总结', '<p>很抱歉这份总结发布得晚了一些，下面是今年的主要进展。</p>' * 3),
+]
+
+PLAIN_ARTICLES = [
+    ('游戏攻略合集', '<p>本期整理了新手常见问题与进阶技巧。</p>' * 5),
+    ('社区公告', '<p>社区将于本周末进行例行维护，届时部分功能暂停使用。</p>' * 5),
+    ('产品更新说明', '<p>新版本优化了加载速度，并修复了若干已知问题。</p>' * 5),
+]
+
+
+def _page(case_id: str, label: str, kind: str, body: str = '', status: int = 200, **extra) -> Dict[str, Any]:
+    case = {
+        'id': case_id,
+        'label': label,
+        'kind': kind,
+        'status': status,
+        'body': body,
+        'content_type': 'text/html; charset=utf-8',
+        'location': None,
+        'latency': None,
+    }
+    case.update(extra)
+    return case
+
+
+def build_corpus(config: Dict[str, Any], slow_latency: float = None) -> List[Dict[str, Any]]:
+    """按配置生成语料；slow_latency 为慢页面的响应延迟（秒），默认取检查时间预算加 2 秒"""
+    conditions = config['expired_conditions']
+    texts = list(conditions['texts']) + list((config.get('host_health') or {}).get('parked_texts') or [])
+    if slow_latency is None:
+        slow_latency = conditions.get('check_deadline', 8) + 2
+
+    cases = []
+    # 每个过期文本一个错误模板页
+    for i, text in enumerate(texts):
+        cases.append(_page(f'error-{i}', EXPIRED, 'error_template', ERROR_TEMPLATE.format(text=text)))
+    cases.append(_page('nginx-404', EXPIRED, 'http_404', NGINX_404, status=404))
+    cases.append(_page('gone-410', EXPIRED, 'http_410', ERROR_TEMPLATE.format(text='Gone'), status=410))
+    # 单个 403 页面是页面本身的结论，不能因为轮询多次而被当成站点限流
+    cases.append(_page('forbidden-403', EXPIRED, 'http_403', ERROR_TEMPLATE.format(text='403 Forbidden'), status=403))
+
+    # 含泛化文本的正常页与普通正常页
+    for i, (title, body) in enumerate(TOKEN_ARTICLES):
+        cases.append(_page(f'token-{i}', NORMAL, 'generic_token', ARTICLE_TEMPLATE.format(title=title, body=body)))
+    for i, (title, body) in enumerate(PLAIN_ARTICLES):
+        cases.append(_page(f'normal-{i}', NORMAL, 'plain', ARTICLE_TEMPLATE.format(title=title, body=body)))
+
+    # 跳转页
+    cases.append(_page('meta-root', EXPIRED, 'meta_refresh_root', ARTICLE_TEMPLATE.format(
+        title='跳转中', body='<meta http-equiv="refresh" content="0;url=/"><p>即将返回首页</p>')))
+    cases.append(_page('timer-root', EXPIRED, 'timer_redirect_root', ARTICLE_TEMPLATE.format(
+        title='跳转中', body="<p>内容已删除，1 秒后跳转</p><script>setTimeout(function(){location.href='/';}, 1000);</script>")))
+    cases.append(_page('http-root', EXPIRED, 'http_redirect_root', status=302, location='/'))
+    # 跳到非首页（文章迁移）不算过期，只有跳回站点首页才算
+    cases.append(_page('timer-article', NORMAL, 'timer_redirect_article', ARTICLE_TEMPLATE.format(
+        title='文章已迁移', body="<p>文章已迁移到新地址</p><script>setTimeout(function(){location.href='/case/normal-0';}, 500);</script>")))
+    cases.append(_page('http-article', NORMAL, 'http_redirect_article', status=301, location='/case/normal-1'))
+
+    # 软 404：站点“不存在”模板以 200 返回
+    for i in range(2):
+        cases.append(_page(f'soft404-{i}', EXPIRED, 'soft_404', SOFT_404_TEMPLATE))
+
+    # 非网页资源
+    cases.append(_page('report.pdf', NORMAL, 'binary_ok', '%PDF-1.4\n%%EOF\n', content_type='application/pdf'))
+    cases.append(_page('gone.pdf', EXPIRED, 'binary_404', '', status=404, content_type='application/pdf'))
+
+    # 超出时间预算的慢页面
+    cases.append(_page('slow', TIMEOUT, 'slow', ARTICLE_TEMPLATE.format(title='慢页面', body='<p>加载很慢</p>'),
+                       latency=slow_latency))
+
+    cases.extend(load_saved_pages())
+    return cases
+
+
+def load_saved_pages(directory: str = CORPUS_DIR) -> List[Dict[str, Any]]:
+    """加载保存的真实页面，目录名即标注"""
+    cases = []
+    for label in (EXPIRED, NORMAL):
+        for path in sorted(glob.glob(os.path.join(directory, label, '*.html'))):
+            with open(path, 'r', encoding='utf-8') as f:
+                body = f.read()
+            name = os.path.splitext(os.path.basename(path))[0]
+            cases.append(_page(f'saved-{label}-{name}', label, 'saved', body))
+    return cases
@@ -0,0 +1,383 @@
+"""
+本地模拟搜索引擎：仿照百度、必应、头条、360、搜狗的结果页结构、翻页和反馈表单选择器，
+结果链接指向同一服务上的目标页，按比例返回过期页面。
+
+单独运行: python -m benchmarks.mock_search --port 8900 --pages 3
+"""
+import html
+import time
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List
+from urllib.parse import urlsplit, parse_qs, quote
+
+from benchmarks.corpus import ARTICLE_TEMPLATE, ERROR_TEMPLATE
+
+ENGINES = ('baidu', 'bing', 'toutiao', 'so360', 'sogou')
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>{body}</body></html>"""
+
+
+def _h(text) -> str:
+    return html.escape(str(text), quote=True)
+
+
+def _q(text) -> str:
+    return quote(str(text), safe='')
+
+
+class MockSearchEngine:
+    """在后台线程中运行的模拟搜索引擎"""
+
+    def __init__(self, pages: int = 3, results_per_page: int = 10, expired_ratio: float = 0.1,
+                 expired_text: str = '页面找不到', latency: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        self.pages = pages
+        self.results_per_page = results_per_page
+        self.expired_ratio = expired_ratio
+        self.expired_text = expired_text
+        self.latency = latency
+        self.requests = Counter()
+        self.feedback = Counter()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def engine_urls(self) -> Dict[str, Dict[str, str]]:
+        """替换 config.yaml 中 engines 段的地址"""
+        return {
+            'baidu': {'url': f"{self.base_url}/baidu/", 'feedback_url': ''},
+            'bing': {'url': f"{self.base_url}/bing/", 'feedback_url': f"{self.base_url}/bing/feedback"},
+            'toutiao': {'url': f"{self.base_url}/toutiao/search?keyword={{keyword}}", 'feedback_url': ''},
+            'so360': {'url': f"{self.base_url}/so360/", 'feedback_url': f"{self.base_url}/so360/feedback"},
+            'sogou': {'url': f"{self.base_url}/sogou/", 'feedback_url': f"{self.base_url}/sogou/feedback"},
+        }
+
+    def start(self) -> 'MockSearchEngine':
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---- 结果与目标页 ----
+
+    def results(self, engine: str, keyword: str, page: int) -> List[Dict[str, Any]]:
+        key = hashlib.sha1(keyword.encode('utf-8')).hexdigest()[:10]
+        items = []
+        for i in range(self.results_per_page):
+            path = f"/site/{engine}/{key}/{page}/{i}"
+            items.append({
+                'title': f"{keyword} 相关结果 {page}-{i + 1}",
+                'url': f"{self.base_url}{path}",
+            })
+        return items
+
+    def is_expired(self, path: str) -> bool:
+        digest = int(hashlib.sha1(path.encode('utf-8')).hexdigest()[:8], 16)
+        return digest % 1000 < self.expired_ratio * 1000
+
+    def is_result_path(self, path: str) -> bool:
+        """是否为 results() 生成过的目标页地址"""
+        segments = [s for s in path.split('/') if s]
+        if len(segments) != 5 or segments[1] not in ENGINES or not all(s.isdigit() for s in segments[3:]):
+            return False
+        return 1 <= int(segments[3]) <= self.pages and int(segments[4]) < self.results_per_page
+
+    def target_page(self, path: str) -> str:
+        if self.is_expired(path):
+            return ERROR_TEMPLATE.format(text=_h(self.expired_text))
+        return ARTICLE_TEMPLATE.format(title='示例文章', body='<p>这是一篇正常的文章，内容仍然有效。</p>' * 5)
+
+    # ---- 各搜索引擎页面 ----
+
+    def home(self, engine: str) -> str:
+        forms = {
+            'bing': ('/bing/search', 'sb_form_q', 'q'),
+            'so360': ('/so360/s', 'input', 'q'),
+            'sogou': ('/sogou/web', 'query', 'query'),
+            'baidu': ('/baidu/s', 'kw', 'wd'),
+        }
+        action, input_id, name = forms[engine]
+        body = f'<form action="{action}" method="get"><input id="{input_id}" name="{name}" type="text"></form>'
+        return PAGE.format(title=engine, body=body)
+
+    def serp(self, engine: str, keyword: str, page: int) -> str:
+        page = max(1, min(page, self.pages))
+        items = self.results(engine, keyword, page)
+        has_next = page < self.pages
+        render = getattr(self, f'serp_{engine}')
+        return PAGE.format(title=f"{_h(keyword)}_搜索", body=render(keyword, page, items, has_next))
+
+    def serp_baidu(self, keyword, page, items, has_next):
+        rows = ''.join(
+            f'<div class="result c-container" mu="{_h(r["url"])}"><h3 class="t"><a href="{_h(r["url"])}">{_h(r["title"])}</a></h3>'
+            f'<div class="c-abstract">摘要</div><div class="fb-list-container" style="display:none">选择此条反馈</div></div>'
+            for r in items)
+        next_link = f'<a href="/baidu/s?wd={_q(keyword)}&pn={page * 10}">下一页 &gt;</a>' if has_next else ''
+        return f"""
+            <div id="content_left">{rows}</div>
+            <div id="page"><strong class="pc">{page}</strong> {next_link}</div>
+            <div class="foot"><a class="feedback" href="javascript:;" onclick="openFeedback()">用户反馈</a></div>
+            <div id="fb_baidu_list_dialog" style="display:none">
+                <div class="fb-textarea fb-content-block"><textarea></textarea></div>
+                <input class="fb-email" type="text">
+                <button id="fb_list_post_save" onclick="submitFeedback()">提交反馈</button>
+            </div>
+            <script>
+            function openFeedback() {{
+                document.querySelectorAll('.fb-list-container').forEach(function (el) {{
+                    el.style.display = 'block';
+                    el.onclick = function () {{ document.getElementById('fb_baidu_list_dialog').style.display = 'block'; }};
+                }});
+            }}
+            function submitFeedback() {{
+                document.getElementById('fb_baidu_list_dialog').style.display = 'none';
+                fetch('/feedback/baidu', {{method: 'POST'}});
+            }}
+            </script>"""
+
+    def serp_bing(self, keyword, page, items, has_next):
+        rows = ''.join(
+            f'<li class="b_algo"><h2><a href="{_h(r["url"])}">{_h(r["title"])}</a></h2><p>摘要</p></li>' for r in items)
+        pages = ''.join(
+            f'<li><a class="b_widePag{" sb_pagS" if n == page else ""}" aria-label="第 {n} 页" '
+            f'href="/bing/search?q={_q(keyword)}&first={(n - 1) * 10}">{n}</a></li>'
+            for n in range(1, self.pages + 1))
+        next_link = (f'<li><a class="sb_pagN" title="下一页" href="/bing/search?q={_q(keyword)}&first={page * 10}">下一页</a></li>'
+                     if has_next else '')
+        return f'<ol id="b_results">{rows}<li class="b_pag"><nav><ul>{pages}{next_link}</ul></nav></li></ol>'
+
+    def serp_so360(self, keyword, page, items, has_next):
+        rows = ''.join(
+            f'<li class="res-list"><h3 class="res-title"><a href="{_h(r["url"])}" data-mdurl="{_h(r["url"])}">{_h(r["title"])}</a></h3></li>'
+            for r in items)
+        next_link = f'<a href="/so360/s?q={_q(keyword)}&pn={page + 1}">下一页</a>' if has_next else ''
+        return f'<ul class="result">{rows}</ul><div id="page"><ul><li class="active"><span>{page}</span></li></ul>{next_link}</div>'
+
+    def serp_sogou(self, keyword, page, items, has_next):
+        rows = ''.join(
+            f'<div class="vrwrap"><h3 class="vr-title"><a href="{_h(r["url"])}">{_h(r["title"])}</a></h3></div>' for r in items)
+        next_link = f'<a href="/sogou/web?query={_q(keyword)}&page={page + 1}">下一页</a>' if has_next else ''
+        return f'<div class="results">{rows}</div><div class="pagination"><strong>{page}</strong> {next_link}</div>'
+
+    def serp_toutiao(self, keyword, page, items, has_next):
+        # 结果项向上第 5 层祖先中包含“更多”按钮，与头条的嵌套结构一致
+        rows = ''.join(
+            f'<div class="result-content"><div class="cs-card">'
+            f'<div class="cs-view cs-view-block"><div class="cs-view cs-view-block"><div class="cs-view cs-view-block"><div class="cs-view cs-view-block">'
+            f'<div class="cs-view pad-bottom-3 cs-view-block cs-header align-items-center"><a href="{_h(r["url"])}">{_h(r["title"])}</a></div>'
+            f'</div></div></div></div>'
+            f'<div class="cs-view cs-view-block cs-source-extra" onmouseenter="openPopup()">···</div>'
+            f'</div></div>'
+            for r in items)
+        next_link = f'<a href="/toutiao/search?keyword={_q(keyword)}&page={page + 1}">下一页</a>' if has_next else ''
+        return f"""
+            {rows}
+            <div class="cs-pagination"><button class="cs-pagination-item active">{page}</button> {next_link}</div>
+            <div class="cs-trigger-popup" style="display:none"><div onclick="openDialog()">举报反馈</div></div>
+            <div class="cs-feedback-wrap" style="display:none">
+                <div class="cs-view cs-view-flex align-items-center flex-row cs-grid-cell cursor-pointer">页面打不开，无法找到网页</div>
+                <div class="cs-view cs-view-flex align-items-center flex-row cs-grid-cell cursor-pointer">内容陈旧</div>
+                <textarea class="cs-feedback-detail"></textarea>
+                <input class="cs-feedback-contact" type="text">
+                <span onclick="submitDialog()">确定</span>
+            </div>
+            <script>
+            function openPopup() {{
+                var popup = document.querySelector('.cs-trigger-popup');
+                popup.classList.add('cs-trigger-popup-open');
+                popup.style.display = 'block';
+            }}
+            function openDialog() {{
+                var wrap = document.querySelector('.cs-feedback-wrap');
+                wrap.classList.add('cs-feedback-wrap-open');
+                wrap.style.display = 'block';
+            }}
+            function submitDialog() {{
+                var wrap = document.querySelector('.cs-feedback-wrap');
+                wrap.classList.remove('cs-feedback-wrap-open');
+                wrap.style.display = 'none';
+                var popup = document.querySelector('.cs-trigger-popup');
+                popup.classList.remove('cs-trigger-popup-open');
+                popup.style.display = 'none';
+                fetch('/feedback/toutiao', {{method: 'POST'}});
+            }}
+            </script>"""
+
+    # ---- 反馈页 ----
+
+    def feedback_page(self, engine: str) -> str:
+        render = getattr(self, f'feedback_{engine}')
+        return PAGE.format(title=f"{engine} 反馈", body=render())
+
+    def feedback_bing(self):
+        return """
+            <input type="text" placeholder="输入 URL 或粘贴复制的 URL">
+            <input type="radio" name="ChoiceGroup11" id="choice-page"><label for="choice-page">删除页面</label>
+            <button onclick="fetch('/feedback/bing', {method: 'POST'}); this.disabled = true;">提交</button>"""
+
+    def feedback_so360(self):
+        return """
+            <form onsubmit="fetch('/feedback/so360', {method: 'POST'}); return false;">
+                <ul class="cache-items"><li><input type="radio" name="type" value="1">删除快照</li></ul>
+                <input class="input" type="text" name="url">
+                <textarea name="reason"></textarea>
+                <input class="input" type="text" name="email">
+                <span class="v-success-hink-word" style="display:block">验证成功</span>
+                <button type="submit">提交</button>
+            </form>"""
+
+    def feedback_sogou(self):
+        return """
+            <div class="form">
+                <input class="delradio" type="radio" name="kuaizhaotype" value="1">删除快照
+                <input class="vr-input-box" type="text" name="KuaizhaoDelete[webAdr][]">
+                <textarea class="des-area" name="KuaizhaoDelete[reason]"></textarea>
+                <input class="delradio" type="radio" name="apptypeForm1" value="1">个人
+                <input class="delradio" type="radio" name="apptypeForm1" value="2">单位/公司
+                <div id="imgForm1"></div>
+                <a id="imgAddForm1" href="javascript:;" onclick="goAdd('imgForm1', 'Form1')">添加附件</a>
+                <span id="webContactWayDefaultForm1">邮箱</span>
+                <div id="webContactWaySelectForm1" style="display:none"><a class="webContactWaySelectValue">邮箱</a></div>
+                <input id="contactForm1" type="text">
+                <span id="webContactWayOkForm1" style="display:none">✓</span>
+                <span id="webContactWayErrorForm1" style="display:none">格式错误</span>
+                <a href="javascript:;" onclick="fetch('/feedback/sogou', {method: 'POST'});">提交</a>
+            </div>
+            <script>
+            function goAdd(areaId) {
+                var input = document.createElement('input');
+                input.type = 'file';
+                document.getElementById(areaId).appendChild(input);
+            }
+            function showSelect() { document.getElementById('webContactWaySelectForm1').style.display = 'block'; }
+            function hideSelect(el) {
+                document.getElementById('webContactWayDefaultForm1').textContent = el.textContent;
+                document.getElementById('webContactWaySelectForm1').style.display = 'none';
+            }
+            document.getElementById('contactForm1').addEventListener('blur', function () {
+                document.getElementById('webContactWayOkForm1').style.display = /@/.test(this.value) ? 'inline' : 'none';
+            });
+            </script>"""
+
+    # ---- HTTP 处理 ----
+
+    def route(self, method: str, raw_path: str):
+        """返回 (状态码, 页面)"""
+        parts = urlsplit(raw_path)
+        path = parts.path
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        segments = [s for s in path.split('/') if s]
+        engine = segments[0] if segments else ''
+        with self._lock:
+            self.requests[engine or '/'] += 1
+
+        if method == 'POST' and engine == 'feedback' and len(segments) > 1:
+            with self._lock:
+                self.feedback[segments[1]] += 1
+            return 204, ''
+        if engine == 'site':
+            # 软404探测访问的随机地址返回真正的 404，不能拿正常文章当作“不存在”页指纹
+            if not self.is_result_path(path):
+                return 404, ERROR_TEMPLATE.format(text='Not Found')
+            return 200, self.target_page(path)
+        if engine not in ENGINES:
+            return 404, ERROR_TEMPLATE.format(text='Not Found')
+
+        action = segments[1] if len(segments) > 1 else ''
+        if action == 'feedback' and engine in ('bing', 'so360', 'sogou'):
+            return 200, self.feedback_page(engine)
+        if engine == 'baidu' and action == 's':
+            return 200, self.serp('baidu', query.get('wd', ''), int(query.get('pn', 0)) // 10 + 1)
+        if engine == 'bing' and action == 'search':
+            return 200, self.serp('bing', query.get('q', ''), int(query.get('first', 0)) // 10 + 1)
+        if engine == 'so360' and action == 's':
+            return 200, self.serp('so360', query.get('q', ''), int(query.get('pn', 1)))
+        if engine == 'sogou' and action == 'web':
+            return 200, self.serp('sogou', query.get('query', ''), int(query.get('page', 1)))
+        if engine == 'toutiao' and action == 'search':
+            return 200, self.serp('toutiao', query.get('keyword', ''), int(query.get('page', 1)))
+        if not action and engine != 'toutiao':
+            return 200, self.home(engine)
+        return 404, ERROR_TEMPLATE.format(text='Not Found')
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self, method: str):
+                if mock.latency:
+                    time.sleep(mock.latency)
+                try:
+                    status, body = mock.route(method, self.path)
+                except ValueError:
+                    status, body = 400, ''
+                data = body.encode('utf-8')
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    if method != 'HEAD':
+                        self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_HEAD(self):
+                self._respond('HEAD')
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                self._respond('POST')
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='运行本地模拟搜索引擎')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--pages', type=int, default=3, help='每个关键词的结果页数')
+    parser.add_argument('--results', type=int, default=10, help='每页结果数')
+    parser.add_argument('--expired-ratio', type=float, default=0.1, help='过期结果比例')
+    parser.add_argument('--latency', type=float, default=0.0, help='响应延迟（秒）')
+    args = parser.parse_args()
+
+    mock = MockSearchEngine(args.pages, args.results, args.expired_ratio, latency=args.latency, port=args.port)
+    print(f"模拟搜索引擎: {mock.base_url}")
+    for engine, urls in mock.engine_urls().items():
+        print(f"  {engine}: {urls['url']}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        mock.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
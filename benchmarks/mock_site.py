@@ -0,0 +1,128 @@
+"""
+基于 http.server 的本地替身站点：按语料返回页面，支持全局延迟、随机抖动和跳转。
+
+单独运行: python -m benchmarks.mock_site --port 8800 --latency 0.2
+"""
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List
+from urllib.parse import urlsplit, unquote
+
+from benchmarks.corpus import INDEX_PAGE, SOFT_404_TEMPLATE
+
+
+class MockSite:
+    """在后台线程中运行的替身站点，/case/<id> 返回对应语料，未知路径返回站点“不存在”模板"""
+
+    def __init__(self, cases: List[Dict[str, Any]], latency: float = 0.0, jitter: float = 0.0,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.cases = {case['id']: case for case in cases}
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, case: Dict[str, Any]) -> str:
+        return f"{self.base_url}/case/{case['id']}"
+
+    def start(self) -> 'MockSite':
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def delay(self, case: Dict[str, Any] = None) -> float:
+        if case and case.get('latency') is not None:
+            return case['latency']
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self, send_body: bool):
+                with site._lock:
+                    site.requests += 1
+                path = unquote(urlsplit(self.path).path)
+                case = None
+                if path == '/':
+                    status, content_type, body, location = 200, 'text/html; charset=utf-8', INDEX_PAGE, None
+                elif path.startswith('/case/') and path[len('/case/'):] in site.cases:
+                    case = site.cases[path[len('/case/'):]]
+                    status, content_type, body, location = case['status'], case['content_type'], case['body'], case['location']
+                else:
+                    status, content_type, body, location = 200, 'text/html; charset=utf-8', SOFT_404_TEMPLATE, None
+
+                time.sleep(site.delay(case))
+                data = (body or '').encode('utf-8')
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', content_type)
+                    self.send_header('Content-Length', str(len(data)))
+                    if location:
+                        self.send_header('Location', location)
+                    self.end_headers()
+                    if send_body:
+                        self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 检查方超时后主动断开
+                    pass
+
+            def do_GET(self):
+                self._respond(True)
+
+            def do_HEAD(self):
+                self._respond(False)
+
+        return Handler
+
+
+def main():
+    import yaml
+    from benchmarks.corpus import build_corpus
+
+    parser = argparse.ArgumentParser(description='运行过期判定基准的替身站点')
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency', type=float, default=0.0, help='响应延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延迟随机抖动（秒）')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    cases = build_corpus(config)
+    site = MockSite(cases, args.latency, args.jitter, port=args.port)
+    print(f"替身站点: {site.base_url}，共 {len(cases)} 个页面")
+    for case in cases:
+        print(f"  [{case['label']:>7}] {site.url_for(case)}")
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        site.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""
+端到端负载基准：用真实的搜索引擎类和 SearchProcessor 跑本地模拟搜索引擎，
+统计每秒处理结果数、WebDriver 往返次数和数据库耗时。
+
+用法: python -m benchmarks.search_load_bench [--engines baidu,bing,toutiao,so360,sogou] [--keywords 1000]
+                                             [--pages 3] [--results 10] [--expired-ratio 0.1] [--json out.json]
+"""
+import os
+import copy
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import importlib
+from collections import Counter
+from typing import Dict, Any, List
+
+import yaml
+
+from benchmarks.mock_search import MockSearchEngine, ENGINES
+from src.utils.redirect_stats import percentile
+
+logger = logging.getLogger(__name__)
+
+ENGINE_CLASSES = {
+    'baidu': ('src.engines.baidu', 'BaiduEngine'),
+    'bing': ('src.engines.bing', 'BingEngine'),
+    'toutiao': ('src.engines.toutiao', 'ToutiaoEngine'),
+    'so360': ('src.engines.so360', 'So360Engine'),
+    'sogou': ('src.engines.sogou', 'SogouEngine'),
+}
+
+# 计时的数据库方法
+DB_METHODS = ('save_result', 'get_existing_result', 'check_keyword_done', 'save_progress')
+
+
+def bench_config(config: Dict[str, Any], workdir: str, mock: MockSearchEngine, args) -> Dict[str, Any]:
+    """基准使用的独立配置：引擎地址指向模拟服务，临时数据库，不连 MySQL，关闭站点限速和快照归档"""
+    config = copy.deepcopy(config)
+    for name, urls in mock.engine_urls().items():
+        config['engines'][name] = dict(config['engines'].get(name) or {}, **urls)
+    config['keywords'] = [f"基准关键词{i:05d}" for i in range(args.keywords)]
+    config['database'] = dict(config['database'], path=os.path.join(workdir, 'bench.sqlite3'),
+                              mysql_user='', mysql_password='')
+    config['qualification_dir'] = os.path.abspath(config.get('qualification_dir', 'company_qualifications'))
+    config['host_limiter'] = dict(config.get('host_limiter') or {}, rate=1000, burst=1000)
+    config['snapshot_archive'] = dict(config.get('snapshot_archive') or {}, enabled=False)
+    config['browser'] = dict(config.get('browser') or {}, headless=args.headless)
+    return config
+
+
+class CommandCounter:
+    """包装 driver.execute，统计每条 WebDriver 命令的次数和耗时"""
+
+    def __init__(self, driver):
+        self.counts = Counter()
+        self.seconds = Counter()
+        self.attach(driver)
+
+    def attach(self, driver):
+        if getattr(driver, '_bench_counter', None) is self:
+            return
+        original = driver.execute
+
+        def execute(command, params=None):
+            t0 = time.perf_counter()
+            try:
+                return original(command, params)
+            finally:
+                self.counts[command] += 1
+                self.seconds[command] += time.perf_counter() - t0
+
+        driver.execute = execute
+        driver._bench_counter = self
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+class DbTimer:
+    """包装数据库方法，统计调用次数和耗时"""
+
+    def __init__(self, db):
+        self.calls = Counter()
+        self.seconds = Counter()
+        self.latencies = []
+        for name in DB_METHODS:
+            setattr(db, name, self._wrap(name, getattr(db, name)))
+
+    def _wrap(self, name, method):
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t0
+                self.calls[name] += 1
+                self.seconds[name] += elapsed
+                self.latencies.append(elapsed)
+        return timed
+
+
+def count_results(db_path: str) -> Dict[str, int]:
+    import sqlite3
+    try:
+        with sqlite3.connect(db_path) as conn:
+            # results 表在第一次保存结果时才创建
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='results'").fetchone():
+                return {'saved': 0, 'expired': 0}
+            total, expired = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(is_expired), 0) FROM results").fetchone()
+            return {'saved': total, 'expired': expired}
+    except Exception as e:
+        logger.error(f"统计结果失败: {str(e)}")
+        return {'saved': 0, 'expired': 0}
+
+
+def run_engine(name: str, config_path: str, db_path: str, mock: MockSearchEngine) -> Dict[str, Any]:
+    """单个引擎跑完全部关键词；每个引擎使用新的浏览器，SearchProcessor.run 结束时会关闭它"""
+    from src.utils.browser_manager import BrowserManager
+    from src.utils.processor import SearchProcessor
+
+    module, cls = ENGINE_CLASSES[name]
+    engine_class = getattr(importlib.import_module(module), cls)
+    browser_manager = BrowserManager(config_path)
+    engine = engine_class(config_path, browser_manager)
+    # 模拟服务不需要登录，避免去真实站点加载 cookies
+    engine.cookies_loaded = True
+    processor = SearchProcessor(config_path, browser_manager, {name: engine})
+    processor.db.mysql_available = False
+
+    commands = CommandCounter(browser_manager.driver)
+    db_timer = DbTimer(processor.db)
+    before = count_results(db_path)
+    requests_before = sum(mock.requests.values())
+    feedback_before = mock.feedback[name]
+
+    started = time.time()
+    try:
+        processor.run()
+    except KeyboardInterrupt:
+        logger.warning(f"[{name}] 基准被中断，输出已完成部分的统计")
+    wall = time.time() - started
+
+    # 浏览器中途重启时 driver 会被替换，已统计的只是重启前的部分
+    if browser_manager.driver is not None and getattr(browser_manager.driver, '_bench_counter', None) is not commands:
+        logger.warning(f"[{name}] 浏览器在运行中被重启，WebDriver 命令数偏少")
+
+    after = count_results(db_path)
+    processed = after['saved'] - before['saved']
+    db_seconds = sum(db_timer.seconds.values())
+    db_calls = sum(db_timer.calls.values())
+    return {
+        'engine': name,
+        'wall_seconds': wall,
+        'results': processed,
+        'expired': after['expired'] - before['expired'],
+        'feedback': mock.feedback[name] - feedback_before,
+        'results_per_second': processed / wall if wall else 0.0,
+        'webdriver_commands': commands.total,
+        'webdriver_per_result': commands.total / processed if processed else 0.0,
+        'webdriver_seconds': sum(commands.seconds.values()),
+        'top_commands': commands.counts.most_common(8),
+        'db_calls': db_calls,
+        'db_seconds': db_seconds,
+        'db_share': db_seconds / wall if wall else 0.0,
+        'db_p50_ms': percentile(db_timer.latencies, 0.5) * 1000,
+        'db_p99_ms': percentile(db_timer.latencies, 0.99) * 1000,
+        'db_by_method': {k: (db_timer.calls[k], db_timer.seconds[k]) for k in DB_METHODS},
+        'http_requests': sum(mock.requests.values()) - requests_before,
+    }
+
+
+def print_report(reports: List[Dict[str, Any]]):
+    print(f"\n{'引擎':<10}{'结果数':>8}{'过期':>6}{'反馈':>6}{'结果/秒':>10}{'WD命令':>10}{'WD/结果':>9}"
+          f"{'WD耗时':>9}{'DB耗时':>9}{'DB占比':>8}{'DB p99ms':>10}")
+    for r in reports:
+        print(f"{r['engine']:<10}{r['results']:>8}{r['expired']:>6}{r['feedback']:>6}{r['results_per_second']:>10.2f}"
+              f"{r['webdriver_commands']:>10}{r['webdriver_per_result']:>9.1f}{r['webdriver_seconds']:>9.1f}"
+              f"{r['db_seconds']:>9.2f}{r['db_share']:>8.1%}{r['db_p99_ms']:>10.1f}")
+    for r in reports:
+        print(f"\n[{r['engine']}] 耗时 {r['wall_seconds']:.1f} 秒，模拟服务请求 {r['http_requests']} 次")
+        print("  WebDriver 命令: " + '，'.join(f"{command} {count}" for command, count in r['top_commands']))
+        print("  数据库: " + '，'.join(f"{method} {calls} 次/{seconds:.2f} 秒"
+                                     for method, (calls, seconds) in r['db_by_method'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端负载基准')
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--engines', default=','.join(ENGINES), help='逗号分隔的引擎名')
+    parser.add_argument('--keywords', type=int, default=1000, help='生成的关键词数量')
+    parser.add_argument('--pages', type=int, default=3, help='每个关键词的结果页数')
+    parser.add_argument('--results', type=int, default=10, help='每页结果数')
+    parser.add_argument('--expired-ratio', type=float, default=0.1, help='过期结果比例')
+    parser.add_argument('--latency', type=float, default=0.0, help='模拟服务响应延迟（秒）')
+    parser.add_argument('--headless', action='store_true', help='使用无头浏览器')
+    parser.add_argument('--json', help='结果另存为 JSON')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    names = [n.strip() for n in args.engines.split(',') if n.strip()]
+    unknown = [n for n in names if n not in ENGINE_CLASSES]
+    if unknown:
+        parser.error(f"未知引擎: {', '.join(unknown)}")
+
+    workdir = tempfile.mkdtemp(prefix='search_load_bench_')
+    cwd = os.getcwd()
+    reports = []
+    try:
+        with MockSearchEngine(args.pages, args.results, args.expired_ratio,
+                              expired_text=config['expired_conditions']['texts'][0], latency=args.latency) as mock:
+            path_config = bench_config(config, workdir, mock, args)
+            config_path = os.path.join(workdir, 'bench.yaml')
+            with open(config_path, 'w', encoding='utf-8') as f:
+                yaml.safe_dump(path_config, f, allow_unicode=True)
+            print(f"模拟搜索引擎 {mock.base_url}，关键词 {args.keywords} 个，每个 {args.pages} 页 × {args.results} 条")
+            # cookies 和错误日志目录写到临时目录，不影响真实登录状态
+            os.chdir(workdir)
+            for name in names:
+                reports.append(run_engine(name, config_path, path_config['database']['path'], mock))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(reports)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -50,8 +50,8 @@ def main():
         logger.error(f"ChromeDriver 设置失败: {str(e)}")
         return
 
-    browser_manager = BrowserManager()
     config_path = "config.yaml"
+    browser_manager = BrowserManager(config_path)
     
     try:
         # 初始化搜索引擎
@@ -0,0 +1,106 @@
+"""
+用当前配置的过期文本重新判定已归档的页面快照，输出与归档时结论的差异。
+
+用法: python reclassify.py [--config config.yaml] [--workers 4] [--limit N] [--show 20] [--all]
+"""
+import argparse
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+from src.utils.expiry_matcher import ExpiryMatcher
+from src.utils.snapshot_archive import SnapshotArchive, ZSTD_AVAILABLE
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+_matcher = None
+_archive = None
+
+
+def _init_worker(texts, db_path, archive_config):
+    global _matcher, _archive
+    _matcher = ExpiryMatcher(texts)
+    _archive = SnapshotArchive(db_path, dict(archive_config, enabled=False))
+
+
+def _classify(entry):
+    """子进程中解压快照并匹配，返回 (快照 id, 新命中的模式)；快照文件缺失时模式为 False"""
+    try:
+        text = _archive.read_text(entry['content_hash'], entry['codec'])
+    except FileNotFoundError:
+        return entry['id'], False
+    return entry['id'], _matcher.match(text)['pattern']
+
+
+def load_texts(config):
+    texts = list(config['expired_conditions']['texts'])
+    texts += (config.get('host_health') or {}).get('parked_texts') or []
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='用当前过期文本重新判定归档的页面快照')
+    parser.add_argument('--config', default='config.yaml', help='配置文件路径')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认为 CPU 核数')
+    parser.add_argument('--limit', type=int, default=None, help='最多处理的快照数')
+    parser.add_argument('--show', type=int, default=20, help='每类差异最多展示的条数')
+    parser.add_argument('--all', action='store_true', help='处理所有快照，默认每个链接只取最新一次')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    db_path = config['database']['path']
+    archive_config = config.get('snapshot_archive') or {}
+    archive = SnapshotArchive(db_path, dict(archive_config, enabled=False))
+
+    entries = list(archive.iter_index(latest_only=not args.all, limit=args.limit))
+    if not entries:
+        print("没有已归档的快照，请在 config.yaml 中开启 snapshot_archive.enabled 后运行检查")
+        return
+    if not ZSTD_AVAILABLE and any(entry['codec'] == 'zstd' for entry in entries):
+        raise SystemExit("存在 zstd 压缩的快照，但未安装 zstandard，请先执行 pip install zstandard")
+    by_id = {entry['id']: entry for entry in entries}
+
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(load_texts(config), db_path, archive_config)) as executor:
+        outcomes = list(executor.map(_classify, entries, chunksize=64))
+    elapsed = time.time() - start
+
+    diffs = {'新增过期': [], '不再过期': [], '命中模式变化': []}
+    missing = 0
+    new_patterns = Counter()
+    for snapshot_id, pattern in outcomes:
+        entry = by_id[snapshot_id]
+        if pattern is False:
+            missing += 1
+            continue
+        if pattern:
+            new_patterns[pattern] += 1
+        old = entry['matched_pattern']
+        if pattern == old:
+            continue
+        if pattern and not old:
+            diffs['新增过期'].append((entry, pattern))
+        elif old and not pattern:
+            diffs['不再过期'].append((entry, pattern))
+        else:
+            diffs['命中模式变化'].append((entry, pattern))
+
+    print(f"重新判定 {len(entries)} 个快照，耗时 {elapsed:.2f} 秒，快照文件缺失 {missing} 个")
+    for category, items in diffs.items():
+        print(f"\n{category}: {len(items)}")
+        for entry, pattern in items[:args.show]:
+            print(f"  {entry['url']}  [{entry['verdict_status']}/{entry['verdict_method']}]  "
+                  f"{entry['matched_pattern']!r} -> {pattern!r}")
+    print("\n当前命中次数最多的模式:")
+    for pattern, count in new_patterns.most_common(10):
+        print(f"  {count:6d}  {pattern}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@ import logging
 import time
 from typing import Dict, Any
 import traceback
+from src.utils.url_normalizer import url_key
 
 try:
     import mysql.connector
@@ -20,6 +21,15 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# results 表后续补充的列：列名 -> 类型定义
+RESULT_EXTRA_COLUMNS = {
+    'check_status': "TEXT DEFAULT 'done'",  # expired/normal 为结论，timeout/throttled 为超时或限流待重试
+    'check_method': 'TEXT',
+    'confidence': 'REAL',
+    'matched_pattern': 'TEXT',
+    'redirect_target': 'TEXT',
+}
+
 class Database:
 
     def _get_safe_config(self):
@@ -90,6 +100,25 @@ class Database:
                     ''')
                     logger.info("SQLite数据库初始化: 已创建 progress 表")
                 
+                # 旧版 results 表补充 url_key 列，按规范化链接去重
+                cursor.execute("PRAGMA table_info(results)")
+                columns = [row[1] for row in cursor.fetchall()]
+                if columns and 'url_key' not in columns:
+                    cursor.execute("ALTER TABLE results ADD COLUMN url_key TEXT")
+                    rows = cursor.execute("SELECT id, url FROM results").fetchall()
+                    cursor.executemany(
+                        "UPDATE results SET url_key = ? WHERE id = ?",
+                        [(url_key(url), row_id) for row_id, url in rows]
+                    )
+                    logger.info(f"SQLite数据库初始化: results 表已补充 url_key 列 ({len(rows)} 条)")
+                # 补充检查结论相关的列
+                for column, definition in RESULT_EXTRA_COLUMNS.items():
+                    if columns and column not in columns:
+                        cursor.execute(f"ALTER TABLE results ADD COLUMN {column} {definition}")
+                        logger.info(f"SQLite数据库初始化: results 表已补充 {column} 列")
+                if columns:
+                    cursor.execute("CREATE INDEX IF NOT EXISTS idx_results_url_key ON results (url_key)")
+                
                 conn.commit()
         except Exception as e:
             logger.error(f"初始化 SQLite 数据库失败: {str(e)}")
@@ -160,6 +189,8 @@ class Database:
                 logger.error(f"无法查询表结构: {str(e)}")
                 logger.error(traceback.format_exc())
             
+            # 补充 url_key 列失败时抛出，改用 SQLite，避免 MySQL 按原始链接去重
+            self._migrate_mysql_url_key(conn)
             cursor.close()
             conn.close()
             logger.info("MySQL 连接和表结构测试成功")
@@ -168,28 +199,58 @@ class Database:
             logger.error(traceback.format_exc())
             raise
 
+    def _migrate_mysql_url_key(self, conn):
+        """MySQL 结果表补充 url_key 列和索引，并为旧记录回填，按规范化链接去重"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SHOW COLUMNS FROM search_engine_feedback_results LIKE 'url_key'")
+            if not cursor.fetchall():
+                cursor.execute("ALTER TABLE search_engine_feedback_results ADD COLUMN url_key CHAR(40) NULL")
+                logger.info("MySQL 初始化: search_engine_feedback_results 表已补充 url_key 列")
+            cursor.execute("SHOW INDEX FROM search_engine_feedback_results WHERE Key_name = 'idx_feedback_url_key'")
+            if not cursor.fetchall():
+                cursor.execute("CREATE INDEX idx_feedback_url_key ON search_engine_feedback_results (search_engine, url_key)")
+                logger.info("MySQL 初始化: 已创建 url_key 索引")
+
+            cursor.execute("SELECT sysid, url FROM search_engine_feedback_results WHERE url_key IS NULL")
+            rows = cursor.fetchall()
+            for start in range(0, len(rows), 1000):
+                cursor.executemany(
+                    "UPDATE search_engine_feedback_results SET url_key = %s WHERE sysid = %s",
+                    [(url_key(url), sysid) for sysid, url in rows[start:start + 1000]]
+                )
+                conn.commit()
+            if rows:
+                logger.info(f"MySQL 初始化: 已为 {len(rows)} 条记录回填 url_key")
+        finally:
+            cursor.close()
+
     def save_result(self, result: Dict[str, Any]) -> bool:
         """保存搜索结果，根据可用性选择 MySQL 或 SQLite"""
+        # 超时和限流不是结论，只在本地记录，下次运行时重试
+        if result.get('check_status') in ('timeout', 'throttled'):
+            return self._save_result_sqlite(result)
         if self.mysql_available:
             return self._save_result_mysql(result)
         else:
             return self._save_result_sqlite(result)
     
     def _save_result_mysql(self, result: Dict[str, Any]) -> bool:
-        """保存搜索结果到 MySQL，search_engine+url唯一"""
+        """保存搜索结果到 MySQL，search_engine+规范化链接唯一"""
         conn = None
         try:
             conn = self._get_mysql_connection()
             cursor = conn.cursor()
             
-            # 只用search_engine+url查重
+            # 只用search_engine+规范化链接查重
+            key = result.get('url_key') or url_key(result['url'])
             check_query = """
                 SELECT sysid FROM search_engine_feedback_results 
-                WHERE search_engine = %s AND url = %s
+                WHERE search_engine = %s AND url_key = %s
             """
             cursor.execute(check_query, (
                 result['search_engine'],
-                result['url']
+                key
             ))
             
             existing = cursor.fetchone()
@@ -198,15 +259,16 @@ class Database:
                 # 不存在则插入
                 insert_query = """
                     INSERT INTO search_engine_feedback_results 
-                    (key_word, title, url, search_engine, is_expired, last_updated) 
-                    VALUES (%s, %s, %s, %s, %s, NOW())
+                    (key_word, title, url, search_engine, is_expired, last_updated, url_key) 
+                    VALUES (%s, %s, %s, %s, %s, NOW(), %s)
                 """
                 cursor.execute(insert_query, (
                     result['keyword'],
                     result['title'],
                     result['url'],
                     result['search_engine'],
-                    1 if result['is_expired'] else 0
+                    1 if result['is_expired'] else 0,
+                    key
                 ))
                 logger.debug(f"MySQL: 插入新记录 - {result['title'][:20]}...")
             else:
@@ -214,14 +276,14 @@ class Database:
                 update_query = """
                     UPDATE search_engine_feedback_results 
                     SET key_word = %s, title = %s, is_expired = %s, last_updated = NOW()
-                    WHERE search_engine = %s AND url = %s
+                    WHERE search_engine = %s AND url_key = %s
                 """
                 cursor.execute(update_query, (
                     result['keyword'],
                     result['title'],
                     1 if result['is_expired'] else 0,
                     result['search_engine'],
-                    result['url']
+                    key
                 ))
                 logger.debug(f"MySQL: 更新记录 - {result['title'][:20]}...")
             
@@ -266,43 +328,64 @@ class Database:
                             search_engine TEXT NOT NULL,
                             is_expired BOOLEAN NOT NULL,
                             feedback_failed BOOLEAN DEFAULT 0,
-                            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                            url_key TEXT,
+                            check_status TEXT DEFAULT 'done',
+                            check_method TEXT,
+                            confidence REAL,
+                            matched_pattern TEXT,
+                            redirect_target TEXT
                         )
                     ''')
+                    cursor.execute("CREATE INDEX IF NOT EXISTS idx_results_url_key ON results (url_key)")
                 
-                # 只用search_engine+url查重
+                # 只用search_engine+规范化链接查重
+                key = result.get('url_key') or url_key(result['url'])
                 cursor.execute('''
                     SELECT id FROM results 
-                    WHERE search_engine = ? AND url = ?
-                ''', (result['search_engine'], result['url']))
+                    WHERE search_engine = ? AND url_key = ?
+                ''', (result['search_engine'], key))
                 
                 if not cursor.fetchone():
                     # 不存在则插入
                     cursor.execute('''
                         INSERT INTO results (
-                            keyword, title, url, search_engine, is_expired, feedback_failed, last_updated
-                        ) VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+                            keyword, title, url, search_engine, is_expired, feedback_failed, last_updated, url_key,
+                            check_status, check_method, confidence, matched_pattern, redirect_target
+                        ) VALUES (?, ?, ?, ?, ?, ?, datetime('now'), ?, ?, ?, ?, ?, ?)
                     ''', (
                         result['keyword'],
                         result['title'],
                         result['url'],
                         result['search_engine'],
                         result['is_expired'],
-                        result.get('feedback_failed', False)
+                        result.get('feedback_failed', False),
+                        key,
+                        result.get('check_status', 'done'),
+                        result.get('check_method'),
+                        result.get('confidence'),
+                        result.get('matched_pattern'),
+                        result.get('redirect_target')
                     ))
                 else:
                     # 存在则只更新，不再插入新行
                     cursor.execute('''
                         UPDATE results 
-                        SET keyword = ?, title = ?, is_expired = ?, feedback_failed = ?, last_updated = datetime('now')
-                        WHERE search_engine = ? AND url = ?
+                        SET keyword = ?, title = ?, is_expired = ?, feedback_failed = ?, last_updated = datetime('now'),
+                            check_status = ?, check_method = ?, confidence = ?, matched_pattern = ?, redirect_target = ?
+                        WHERE search_engine = ? AND url_key = ?
                     ''', (
                         result['keyword'],
                         result['title'],
                         result['is_expired'],
                         result.get('feedback_failed', False),
+                        result.get('check_status', 'done'),
+                        result.get('check_method'),
+                        result.get('confidence'),
+                        result.get('matched_pattern'),
+                        result.get('redirect_target'),
                         result['search_engine'],
-                        result['url']
+                        key
                     ))
                 
                 conn.commit()
@@ -311,14 +394,16 @@ class Database:
             logger.error(f"保存到 SQLite 失败: {str(e)}")
             return False
 
-    def get_existing_result(self, url: str = None, keyword: str = None, search_engine: str = None, title: str = None) -> Dict[str, Any]:
-        """获取已存在的结果，根据可用性选择 MySQL 或 SQLite"""
+    def get_existing_result(self, url: str = None, keyword: str = None, search_engine: str = None, title: str = None,
+                            key: str = None) -> Dict[str, Any]:
+        """获取已存在的结果，根据可用性选择 MySQL 或 SQLite；key 为去重用的规范化链接，默认由 url 计算"""
         if self.mysql_available:
-            return self._get_existing_result_mysql(url, keyword, search_engine, title)
+            return self._get_existing_result_mysql(url, keyword, search_engine, title, key)
         else:
-            return self._get_existing_result_sqlite(url, keyword, search_engine, title)
+            return self._get_existing_result_sqlite(url, keyword, search_engine, title, key)
     
-    def _get_existing_result_mysql(self, url: str = None, keyword: str = None, search_engine: str = None, title: str = None) -> Dict[str, Any]:
+    def _get_existing_result_mysql(self, url: str = None, keyword: str = None, search_engine: str = None, title: str = None,
+                                   key: str = None) -> Dict[str, Any]:
         """从 MySQL 获取结果"""
         conn = None
         try:
@@ -329,9 +414,9 @@ class Database:
                 query = """
                     SELECT key_word, title, is_expired 
                     FROM search_engine_feedback_results 
-                    WHERE url = %s
+                    WHERE url_key = %s
                 """
-                cursor.execute(query, (url,))
+                cursor.execute(query, (key or url_key(url),))
             elif keyword and search_engine and title:
                 query = """
                     SELECT key_word, title, is_expired 
@@ -360,7 +445,8 @@ class Database:
                 except:
                     pass
     
-    def _get_existing_result_sqlite(self, url: str = None, keyword: str = None, search_engine: str = None, title: str = None) -> Dict[str, Any]:
+    def _get_existing_result_sqlite(self, url: str = None, keyword: str = None, search_engine: str = None, title: str = None,
+                                    key: str = None) -> Dict[str, Any]:
         """从 SQLite 获取结果 (后备方案)"""
         try:
             with sqlite3.connect(self.sqlite_path) as conn:
@@ -380,13 +466,13 @@ class Database:
                     cursor.execute('''
                         SELECT keyword, title, is_expired 
                         FROM results 
-                        WHERE url = ?
-                    ''', (url,))
+                        WHERE url_key = ? AND check_status IS NOT 'timeout' AND check_status IS NOT 'throttled'
+                    ''', (key or url_key(url),))
                 elif keyword and search_engine and title:
                     cursor.execute('''
                         SELECT keyword, title, is_expired 
                         FROM results 
-                        WHERE keyword = ? AND search_engine = ? AND title = ?
+                        WHERE keyword = ? AND search_engine = ? AND title = ? AND check_status IS NOT 'timeout' AND check_status IS NOT 'throttled'
                     ''', (keyword, search_engine, title))
                 else:
                     return None
@@ -444,14 +530,29 @@ class Database:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT id FROM results 
-                    WHERE url = ?
-                ''', (url,))
+                    WHERE url_key = ? AND check_status IS NOT 'timeout' AND check_status IS NOT 'throttled'
+                ''', (url_key(url),))
                 result = cursor.fetchone()
                 return result is not None
         except Exception as e:
             logger.error(f"数据库错误: 检查 URL 是否存在失败 - {str(e)}")
             return False
 
+    def get_check_status(self, search_engine: str, key: str) -> str:
+        """返回本地记录的检查状态（含 timeout/throttled），没有记录时返回 None"""
+        try:
+            with sqlite3.connect(self.sqlite_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT check_status FROM results
+                    WHERE search_engine = ? AND url_key = ?
+                ''', (search_engine, key))
+                result = cursor.fetchone()
+                return result[0] if result else None
+        except Exception as e:
+            logger.error(f"查询检查状态失败: {str(e)}")
+            return None
+
     def get_progress(self, keyword: str, search_engine: str) -> int:
         """获取搜索进度"""
         try:
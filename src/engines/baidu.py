@@ -4,6 +4,7 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from .base import SearchEngine
+from src.utils.verdict import Verdict
 import time
 import logging
 import os
@@ -14,6 +15,11 @@ import sqlite3
 from selenium.webdriver.common.action_chains import ActionChains
 # 导入百度旋转验证码求解器
 from src.verification.baidu.baidu_rotate_captcha_solver import solve_rotation_captcha
+from src.verification.baidu.rotate_image_classifier.inference import warm_up as warm_up_rotate_model
+from src.verification.baidu.captcha_angle_cache import CaptchaAngleCache
+from src.verification.baidu.drag_calibration import DragCalibrator
+from src.verification.baidu.captcha_watch import captcha_state, wait_for_captcha_state
+from src.utils.url_normalizer import unwrap_redirector
 
 # 设置 urllib3 的日志级别为 ERROR，隐藏连接警告
 urllib3.disable_warnings()
@@ -28,6 +34,16 @@ class BaiduEngine(SearchEngine):
         self.feedback_config = self.config['feedback']
         self.config_path = config_path
         self.db_conn = sqlite3.connect(self.config['database']['path'])
+        captcha_config = self.config.get('rotate_captcha') or {}
+        # 验证通过的角度按旋转不变哈希缓存，同一底图再次出现时不用推理
+        self.captcha_cache = CaptchaAngleCache(self.config['database']['path'], captcha_config.get('angle_cache'))
+        self.drag_calibrator = DragCalibrator(self.config['database']['path'], captcha_config.get('drag'))
+        # 后台预加载验证码模型，第一次遇到验证码时不用再等模型加载；使用共享推理服务时不在本进程加载
+        service_enabled = (captcha_config.get('service') or {}).get('enabled', False)
+        if captcha_config.get('warm_up', True) and not service_enabled:
+            warm_up_rotate_model(background=True, num_threads=captcha_config.get('threads', 0),
+                                 backend=captcha_config.get('backend', 'auto'),
+                                 model_path=captcha_config.get('model'))
 
     def _check_and_handle_login(self) -> bool:
         """检查是否需要登录并等待用户登录完成"""
@@ -186,6 +202,8 @@ class BaiduEngine(SearchEngine):
 
                     # 从父级 div 的 mu 属性获取真实 URL
                     url = item.get_attribute('mu') or title_element.get_attribute('href')
+                    if url:
+                        url = unwrap_redirector(url)
                     if not url:
                         logger.debug("未找到URL，跳过当前结果")
                         continue
@@ -210,49 +228,9 @@ class BaiduEngine(SearchEngine):
             logger.error(f"获取搜索结果失败: {str(e)}")
             return []
 
-    def check_expired(self, url: str) -> bool:
+    def check_expired(self, url: str) -> Verdict:
         """检查链接是否过期"""
-        if not self.ensure_browser():
-            logger.error("浏览器连接断开，无法检查链接")
-            return False
-            
-        current_window = self.driver.current_window_handle
-        logger.info(f"开始检查链接: {url}")
-        
-        try:
-            # 新标签页打开链接
-            self.driver.execute_script(f"window.open('{url}', '_blank');")
-            # time.sleep(1)
-            self.driver.switch_to.window(self.driver.window_handles[-1])
-            
-            # 等待页面加载
-            time.sleep(1)
-            
-            # 检查页面内容
-            if self.is_page_expired():
-                logger.info("检测到页面包含过期标志")
-                return True
-            
-            # 检查重定向
-            if self.wait_for_redirect(self.config['expired_conditions']['redirect_timeout']):
-                logger.info("检测到页面发生重定向")
-                return True
-            
-            logger.info("页面正常访问")
-            return False
-            
-        except Exception as e:
-            logger.error(f"检查链接时出错: {str(e)}")
-            return False
-        finally:
-            try:
-                self.driver.close()
-                self.driver.switch_to.window(current_window)
-                time.sleep(1)
-            except Exception as e:
-                logger.error(f"关闭标签页时出错: {str(e)}")
-                # 如果关闭失败，尝试重新初始化浏览器
-                self.ensure_browser()
+        return self.check_in_new_tab(url)
 
     def submit_feedback(self, result: Dict[str, Any]) -> bool:
         """提交反馈"""
@@ -437,25 +415,10 @@ class BaiduEngine(SearchEngine):
     def check_verification(self) -> bool:
         """检查是否需要验证码"""
         try:
-            # 直接查找包含"请完成下方验证后继续操作"文本的元素
-            verification_elements = self.driver.find_elements(
-                By.XPATH, 
-                "//*[contains(text(), '请完成下方验证后继续操作')]"
-            )
-            
-            if verification_elements and len(verification_elements) > 0:
-                logger.info("检测到需要验证码：找到'请完成下方验证后继续操作'文本")
-                return True
-            
-            # 保留原有的检测方法作为备选
-            verify_dialog = self.driver.find_elements(
-                By.CSS_SELECTOR, 
-                'div.passMod_dialog-container'
-            )
-            if verify_dialog and verify_dialog[0].is_displayed():
-                logger.info("通过备选方法检测到需要验证码")
+            # 页面内的 MutationObserver 记录了验证码弹窗是否可见，不再对整个 DOM 做 XPath 查找
+            if captcha_state(self.driver):
+                logger.info("检测到需要验证码")
                 return True
-                
             return False
         except Exception as e:
             logger.error(f"检查验证码状态出错: {str(e)}")
@@ -470,7 +433,14 @@ class BaiduEngine(SearchEngine):
             spin_img = self.driver.find_elements(By.CSS_SELECTOR, "img.vcode-spin-img")
             if spin_img and len(spin_img) > 0:
                 logger.info("检测到旋转验证码，启动自动求解...")
-                result = solve_rotation_captcha(self.driver)#旋转模型
+                captcha_config = self.config.get('rotate_captcha') or {}
+                result = solve_rotation_captcha(self.driver,
+                                                min_confidence=captcha_config.get('min_confidence', 0.0),
+                                                max_refresh=captcha_config.get('max_refresh', 3),
+                                                tta=captcha_config.get('tta'),
+                                                cache=self.captcha_cache,
+                                                service=captcha_config.get('service'),
+                                                calibrator=self.drag_calibrator)#旋转模型
                 if result:
                     logger.info("旋转验证码自动处理成功")
                     return True
@@ -483,13 +453,13 @@ class BaiduEngine(SearchEngine):
             max_wait_time = 120  # 最长等待2分钟
             start_time = time.time()
             
-            while self.check_verification():
+            # 验证码一消失就返回；每 10 秒检查一次浏览器连接
+            while not wait_for_captcha_state(self.driver, False, timeout=10):
                 elapsed_time = time.time() - start_time
                 if elapsed_time > max_wait_time:
                     logger.error(f"等待验证码完成超时（{max_wait_time}秒）")
                     return False
                     
-                time.sleep(2)
                 if not self.ensure_browser():
                     return False
                     
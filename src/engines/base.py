@@ -9,9 +9,25 @@ import time
 import logging
 import sqlite3
 from selenium.webdriver.common.by import By
+from src.utils.expiry_matcher import ExpiryMatcher
+from src.utils.redirect_detector import REDIRECT_SOURCES_SCRIPT, find_scheduled_redirect, is_site_root
+from src.utils.soft404 import Soft404Detector, FINGERPRINT_SCRIPT, random_probe_url
+from src.utils.host_health import HostHealthTable, HOST_PARKED
+from src.utils.host_limiter import HostRateLimiter, HostThrottled
+from src.utils.content_probe import ContentProbe
+from src.utils.redirect_stats import RedirectStats
+from src.utils.verdict import Verdict, VerdictScorer, merge, EXPIRED, NORMAL, TIMEOUT
+from src.utils.http_checker import HttpChecker
+from src.utils.snapshot_archive import SnapshotArchive
+from urllib.parse import urlsplit
 
 logger = logging.getLogger(__name__)
 
+
+class CheckTimeout(Exception):
+    """单个链接检查超出时间预算，结果记为 timeout 留待重试"""
+
+
 class SearchEngine(ABC):
     def __init__(self, config_path: str, browser_manager):
         """初始化搜索引擎"""
@@ -23,6 +39,32 @@ class SearchEngine(ABC):
         self.wait = browser_manager.wait
         self.cookies_loaded = False
         self.db_conn = sqlite3.connect(self.config['database']['path'])
+        # 站点健康表，停放域名文本命中时整个站点标记为不可用
+        host_health_config = self.config.get('host_health') or {}
+        self.host_health = HostHealthTable(self.config['database']['path'], host_health_config)
+        self.parked_texts = {text.strip() for text in host_health_config.get('parked_texts') or [] if text.strip()}
+        # 预编译过期文本模式，页面内匹配时每个标签页只注入一次
+        self.expiry_matcher = ExpiryMatcher(self.config['expired_conditions']['texts'] + list(self.parked_texts))
+        # 按站点限速和熔断，避免触发 WAF 把拦截页当成过期页
+        self.rate_limiter = HostRateLimiter(self.config.get('host_limiter'))
+        # 非网页资源（PDF、安装包、音视频）只按 HTTP 状态码判定
+        self.content_probe = ContentProbe(self.config.get('content_probe'))
+        # 按站点学习的跳转等待时间
+        self.redirect_stats = RedirectStats(self.config['database']['path'], self.config.get('redirect_stats'))
+        # 站点级软 404 指纹
+        self.soft404 = Soft404Detector(self.config['database']['path'], self.config.get('soft404'))
+        # 结论置信度评分，低置信度结论用 HTTP 复查
+        verdict_config = self.config.get('verdict') or {}
+        self.scorer = VerdictScorer(verdict_config)
+        self.http_checker = HttpChecker(self.expiry_matcher, self.scorer,
+                                        verdict_config.get('http_timeout', 5), verdict_config.get('max_bytes', 262144))
+        # 最近一次正文轮询的页面状态（命中的模式、地址等）
+        self.last_page_state = {}
+        # 页面正文快照归档，调整过期文本后可离线重新判定
+        self.archive = SnapshotArchive(self.config['database']['path'], self.config.get('snapshot_archive'))
+        self.last_snapshot = None
+        # 当前链接检查的截止时间，覆盖导航、正文提取和跳转等待
+        self._check_deadline = None
 
     @abstractmethod
     def search(self, keyword: str) -> None:
@@ -40,8 +82,8 @@ class SearchEngine(ABC):
         pass
 
     @abstractmethod
-    def check_expired(self, url: str) -> bool:
-        """检查链接是否过期"""
+    def check_expired(self, url: str) -> Verdict:
+        """检查链接是否过期，返回带置信度的结论"""
         # 获取浏览器信息
         browser_info = "未知浏览器"
         if hasattr(self.browser_manager, 'get_browser_info'):
@@ -71,30 +113,352 @@ class SearchEngine(ABC):
 
     def is_page_expired(self, content: str = None) -> bool:
         """检查页面内容是否符合过期条件"""
-        if content:
-            page_content = content
-        else:
+        if content is not None:
+            return self.expiry_matcher.match(content)['matched']
+        return self.poll_page_expired()
+
+    def poll_page_expired(self) -> bool:
+        """增量轮询正文，命中过期模式或 DOMContentLoaded 后正文空闲即返回"""
+        conditions = self.config['expired_conditions']
+        poll_interval = conditions.get('poll_interval', 0.2)
+        idle_window = conditions.get('idle_window', 0.5)
+        # 仅在调试时才把正文传回 Python
+        debug_capture = conditions.get('debug_capture', False)
+        deadline = time.time() + conditions.get('max_wait', 10)
+        if self._check_deadline is not None:
+            deadline = min(deadline, self._check_deadline)
+        idle_since = None
+        last_length = -1
+        last_response = None  # 上次检查限流时的 (地址, 状态码)，同一次导航只检查一次
+        self.last_page_state = {}
+
+        while True:
             try:
-                # 等待页面完全加载，确保body元素存在
-                wait = WebDriverWait(self.driver, 10)
-                body_element = wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                page_content = body_element.text
-                
+                state = self.last_page_state = self.expiry_matcher.match_in_page(self.driver, with_text=debug_capture)
             except Exception as e:
+                # 页面仍在加载时脚本会等到页面加载超时（即剩余预算）才返回
+                if self.budget_exhausted():
+                    self.rate_limiter.record_failure(self.driver.current_url, '加载超时')
+                    raise CheckTimeout(f"获取页面内容超时: {str(e)}")
                 logger.warning(f"获取页面内容失败: {str(e)}")
                 return False
-        
-        expired_texts = self.config['expired_conditions']['texts']
-        # 将页面内容转换为小写以进行不区分大小写的匹配
-        content_lower = page_content.lower()
-        # 使用模糊匹配，不区分大小写
-        return any(text.strip().lower() in content_lower for text in expired_texts)
-
-    def wait_for_redirect(self, timeout: int = 5) -> bool:
-        """等待并检查是否发生重定向"""
+
+            if debug_capture:
+                logger.debug(f"页面正文({state.get('url')}): {(state.get('text') or '')[:2000]}")
+
+            # 限流/拦截页不做判定，交由上层稍后重试
+            response = (state.get('url'), state.get('status'))
+            if response != last_response:
+                last_response = response
+                if self.rate_limiter.is_throttle(*response):
+                    raise self.rate_limiter.throttled(state.get('url'), f"HTTP {state.get('status')}")
+
+            if state.get('matched'):
+                logger.info(f"命中过期模式: {state.get('pattern')} (位置 {state.get('offset')}/{state.get('textLength')})")
+                if state.get('pattern') in self.parked_texts:
+                    host = urlsplit(state.get('url') or '').hostname
+                    if host:
+                        self.host_health.mark(host, HOST_PARKED)
+                self.rate_limiter.record_success(state.get('url'))
+                return True
+
+            now = time.time()
+            text_length = state.get('textLength', 0)
+            # DOMContentLoaded 之后正文长度不再变化，视为已渲染完成
+            if state.get('ready') and text_length == last_length:
+                if idle_since is None:
+                    idle_since = now
+                elif now - idle_since >= idle_window:
+                    self.rate_limiter.record_success(state.get('url'))
+                    return False
+            else:
+                idle_since = None
+            last_length = text_length
+
+            if now >= deadline:
+                if not state.get('ready'):
+                    # 页面始终未完成 DOMContentLoaded，无法给出结论
+                    self.rate_limiter.record_failure(state.get('url'), '加载超时')
+                    raise CheckTimeout(f"页面加载超时: {state.get('url')}")
+                logger.info("页面内容轮询超时，按当前内容判定")
+                return False
+            time.sleep(poll_interval)
+
+    def remaining_budget(self) -> float:
+        """当前链接检查剩余的时间预算（秒），不在检查中时返回 None"""
+        if self._check_deadline is None:
+            return None
+        return max(0.0, self._check_deadline - time.time())
+
+    def budget_exhausted(self) -> bool:
+        return self._check_deadline is not None and time.time() >= self._check_deadline
+
+    def stop_loading(self):
+        """停止当前标签页的加载，优先使用 CDP，不支持时退回 window.stop()"""
+        try:
+            self.driver.execute_cdp_cmd('Page.stopLoading', {})
+        except Exception:
+            try:
+                self.driver.execute_script("window.stop();")
+            except Exception as e:
+                logger.debug(f"停止页面加载失败: {str(e)}")
+
+    def wait_for_redirect(self, timeout: float = 5, host: str = None) -> bool:
+        """等待并检查是否发生重定向，发生跳转即返回，并记录站点的跳转延迟"""
+        poll_interval = self.config['expired_conditions'].get('poll_interval', 0.2)
         start_url = self.driver.current_url
-        time.sleep(timeout)
-        return self.driver.current_url != start_url 
+        started = time.time()
+        while True:
+            elapsed = time.time() - started
+            if self.driver.current_url != start_url:
+                self.redirect_stats.record(host, elapsed, elapsed)
+                return True
+            if elapsed >= timeout:
+                self.redirect_stats.record(host, None, elapsed)
+                return False
+            time.sleep(min(poll_interval, max(0.0, timeout - elapsed)))
+
+    def check_scheduled_redirect(self, url: str):
+        """静态解析 meta refresh 和定时器跳转，计划跳回站点首页时无需等待即判定过期；其他情况返回 None"""
+        try:
+            sources = self.driver.execute_script(REDIRECT_SOURCES_SCRIPT) or {}
+        except Exception as e:
+            logger.warning(f"解析页面跳转信息失败: {str(e)}")
+            return None
+
+        page_url = sources.get('url') or url
+        # 打开时已被服务端跳回站点首页
+        if page_url != url and is_site_root(page_url, url) and not is_site_root(url, url):
+            logger.info(f"页面已跳转到站点首页: {page_url}")
+            return self.scorer.make(EXPIRED, 'browser', 'site_root_redirect', redirect_target=page_url)
+
+        redirect = find_scheduled_redirect(page_url, sources.get('metas'), sources.get('scripts'))
+        if not redirect:
+            return None
+
+        max_delay = self.config['expired_conditions'].get('scheduled_redirect_max_delay', 10)
+        if redirect['delay'] > max_delay:
+            logger.info(f"计划跳转延迟 {redirect['delay']} 秒，超过 {max_delay} 秒，忽略")
+            return None
+
+        if is_site_root(redirect['target'], page_url):
+            logger.info(f"检测到计划跳转到站点首页({redirect['source']}): {redirect['target']}")
+            return self.scorer.make(EXPIRED, 'scheduled_redirect', 'site_root_redirect', redirect_target=redirect['target'])
+        # 其他目标交给软404比对和跳转等待，跳转等待同样只把跳回首页判为过期
+        logger.info(f"计划跳转目标不是站点首页({redirect['source']}): {redirect['target']}")
+        return None
+
+    def check_soft_404(self, url: str) -> bool:
+        """与站点“不存在”页的指纹比对，首次访问站点时先探测一次"""
+        if not self.soft404.enabled:
+            return False
+        try:
+            page = self.driver.execute_script(FINGERPRINT_SCRIPT) or {}
+        except Exception as e:
+            logger.warning(f"计算页面指纹失败: {str(e)}")
+            return False
+
+        page_url = page.get('url') or url
+        host = urlsplit(page_url).hostname
+        if not host:
+            return False
+
+        reference = self.soft404.get(host)
+        if reference is None:
+            if self.soft404.recently_failed(host):
+                return False
+            reference = self.probe_host_fingerprint(page_url)
+            if not reference:
+                self.soft404.mark_failed(host)
+                return False
+            self.soft404.save(host, reference)
+        return self.soft404.is_soft_404(page, reference)
+
+    def probe_host_fingerprint(self, url: str):
+        """
+        在临时标签页打开站点下随机的不存在路径，采集“不存在”页指纹。
+        探测页被跳走（如跳回首页），或以 2xx 返回且与首页相似时，说明站点没有“不存在”页，返回 None
+        """
+        probe_url = random_probe_url(url)
+        check_window = self.driver.current_window_handle
+        logger.info(f"首次访问站点，探测软404指纹: {probe_url}")
+        try:
+            self.driver.execute_script("window.open(arguments[0], '_blank');", probe_url)
+            self.driver.switch_to.window(self.driver.window_handles[-1])
+            # 等待探测页渲染完成
+            self.poll_page_expired()
+            self.stop_loading()
+            status = self.last_page_state.get('status')
+            reference = self.driver.execute_script(FINGERPRINT_SCRIPT)
+            if not reference:
+                return None
+
+            final_url = reference.get('url') or probe_url
+            if urlsplit(final_url).path != urlsplit(probe_url).path:
+                logger.info(f"探测页被跳转到 {final_url}，站点没有“不存在”页，不采集指纹")
+                return None
+            if status is None or 200 <= status < 300:
+                # 不存在的路径也返回正常内容时，与首页比对，避免把首页当作“不存在”页
+                home_url = f"{urlsplit(probe_url).scheme}://{urlsplit(probe_url).netloc}/"
+                self.driver.get(home_url)
+                self.poll_page_expired()
+                self.stop_loading()
+                home = self.driver.execute_script(FINGERPRINT_SCRIPT)
+                if home and self.soft404.is_soft_404(home, reference):
+                    logger.info(f"探测页与首页相似，站点没有“不存在”页，不采集指纹: {probe_url}")
+                    return None
+            return reference
+        except Exception as e:
+            logger.warning(f"探测站点指纹失败: {str(e)}")
+            return None
+        finally:
+            try:
+                self.driver.close()
+                self.driver.switch_to.window(check_window)
+            except Exception as e:
+                logger.error(f"关闭探测标签页时出错: {str(e)}")
+                self.ensure_browser()
+
+    def check_in_new_tab(self, url: str) -> Verdict:
+        """
+        在新标签页中打开链接并给出结论，低置信度或超时的结论再用 HTTP 复查；
+        时间预算从这里开始计算，覆盖站点探测、预取、浏览器检查和复查
+        """
+        self.last_snapshot = None
+        budget = self.config['expired_conditions'].get('check_deadline', 8)
+        self._check_deadline = time.time() + budget
+        try:
+            try:
+                verdict = self.check_in_tab(url)
+            except CheckTimeout:
+                verdict = Verdict(TIMEOUT, 'browser', 0.0)
+
+            remaining = self.remaining_budget()
+            if self.scorer.needs_recheck(verdict) and remaining > 0:
+                logger.info(f"结论待确认({verdict})，使用 HTTP 复查: {url}")
+                verdict = merge(verdict, self.http_checker.check(url, timeout=remaining))
+        finally:
+            self._check_deadline = None
+        logger.info(f"检查结论: {verdict}")
+        self.archive.store(url, self.last_snapshot, verdict)
+        return verdict
+
+    def capture_snapshot(self):
+        """归档开启时采集当前页面正文"""
+        if not self.archive.enabled:
+            return
+        snapshot = dict(self.last_page_state)
+        if snapshot.get('text') is None:
+            try:
+                snapshot['text'] = self.driver.execute_script("return document.body ? document.body.innerText : '';")
+            except Exception as e:
+                logger.debug(f"采集页面正文失败: {str(e)}")
+                return
+        self.last_snapshot = snapshot
+
+    def check_in_tab(self, url: str) -> Verdict:
+        """在新标签页中打开链接并判断是否过期，在 check_in_new_tab 开始的时间预算内执行，超出时抛出 CheckTimeout"""
+        if not self.ensure_browser():
+            logger.error("浏览器连接断开，无法检查链接")
+            return self.scorer.make(NORMAL, 'browser', 'error')
+
+        budget = self.config['expired_conditions'].get('check_deadline', 8)
+
+        # 已知不可用的站点无需打开页面，探测耗时计入预算
+        dead_state = self.host_health.check(url, timeout=self.remaining_budget())
+        if dead_state:
+            logger.info(f"站点不可用({dead_state})，直接判定过期: {url}")
+            reason = 'host_parked' if dead_state == HOST_PARKED else 'host_dead'
+            return self.scorer.make(EXPIRED, 'host_health', reason, matched_pattern=dead_state)
+
+        # 熔断中的站点直接抛出 HostThrottled，由上层重新排队
+        self.rate_limiter.acquire(url)
+
+        # 非网页资源不在浏览器中打开，避免触发下载或加载查看器
+        head = self.content_probe.classify(url, timeout=self.remaining_budget())
+        if head is not None:
+            if self.rate_limiter.is_throttle(url, head['status'], head.get('retry_after')):
+                raise self.rate_limiter.throttled(url, f"HTTP {head['status']}", head.get('retry_after'))
+            self.rate_limiter.record_success(url)
+            if head['expired']:
+                reason = 'http_gone' if head['status'] in (404, 410) else 'http_error'
+                return self.scorer.make(EXPIRED, 'http_status', reason)
+            return self.scorer.make(NORMAL, 'http_status', 'binary_ok')
+
+        current_window = self.driver.current_window_handle
+        logger.info(f"开始检查链接: {url}")
+
+        # 页面加载超时收紧到剩余预算，避免单个挂起页面拖住整个任务
+        if self.budget_exhausted():
+            raise CheckTimeout(f"打开页面前已用完 {budget} 秒预算: {url}")
+        try:
+            self.driver.set_page_load_timeout(max(1, self.remaining_budget()))
+        except Exception as e:
+            logger.debug(f"设置页面加载超时失败: {str(e)}")
+
+        try:
+            # 新标签页打开链接，不等待页面完全加载
+            self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+            self.driver.switch_to.window(self.driver.window_handles[-1])
+
+            # 边加载边检查页面内容
+            expired = self.is_page_expired()
+            # 正文已稳定，停止剩余的子资源加载，之后的脚本调用不必等待 load 事件
+            self.stop_loading()
+            self.capture_snapshot()
+            if expired:
+                logger.info("检测到页面包含过期标志")
+                pattern = self.last_page_state.get('pattern')
+                reason = 'host_parked' if pattern in self.parked_texts else self.scorer.text_reason(pattern)
+                return self.scorer.make(EXPIRED, 'text', reason, matched_pattern=pattern)
+
+            # 静态识别 meta refresh 和定时器跳转，识别到则无需等待
+            scheduled = self.check_scheduled_redirect(url)
+            if scheduled is not None:
+                return scheduled
+
+            # 与站点“不存在”页指纹比对
+            if self.check_soft_404(url):
+                logger.info("页面与站点不存在页指纹相似，判定为软404")
+                return self.scorer.make(EXPIRED, 'soft404', 'soft404')
+
+            # 检查重定向：按站点学习的等待时间，且不超过剩余预算；只有跳回站点首页才算过期
+            host = urlsplit(url).hostname
+            redirect_timeout = self.redirect_stats.timeout_for(host, self.config['expired_conditions']['redirect_timeout'])
+            redirect_timeout = min(redirect_timeout, self.remaining_budget())
+            if self.wait_for_redirect(redirect_timeout, host):
+                target = self.driver.current_url
+                if is_site_root(target, url) and not is_site_root(url, url):
+                    logger.info(f"页面重定向到站点首页: {target}")
+                    return self.scorer.make(EXPIRED, 'redirect', 'site_root_redirect', redirect_target=target)
+                logger.info(f"页面跳转到非首页地址，按正常页面处理: {target}")
+                return self.scorer.make(NORMAL, 'redirect', 'normal', redirect_target=target)
+
+            logger.info("页面正常访问")
+            return self.scorer.make(NORMAL, 'browser', 'normal')
+
+        except CheckTimeout as e:
+            logger.warning(f"检查超出 {budget} 秒预算: {str(e)}")
+            self.stop_loading()
+            raise
+        except HostThrottled:
+            raise
+        except Exception as e:
+            if self.budget_exhausted():
+                self.stop_loading()
+                raise CheckTimeout(f"检查超出 {budget} 秒预算: {str(e)}")
+            logger.error(f"检查链接时出错: {str(e)}")
+            return self.scorer.make(NORMAL, 'browser', 'error')
+        finally:
+            try:
+                # 直接关闭标签页，丢弃仍在进行的加载
+                self.driver.close()
+                self.driver.switch_to.window(current_window)
+                self.driver.set_page_load_timeout(self.browser_manager.page_load_timeout)
+            except Exception as e:
+                logger.error(f"关闭标签页时出错: {str(e)}")
+                # 如果关闭失败，尝试重新初始化浏览器
+                self.ensure_browser()
 
     def ensure_browser(self, clear_cache=False):
         """确保浏览器正常"""
@@ -108,35 +472,6 @@ class SearchEngine(ABC):
         """等待反馈提交完成"""
         raise NotImplementedError("子类必须实现 wait_for_feedback_completion 方法") 
 
-    def process_pages(self, keyword: str) -> None:
-        """处理所有搜索页面，包括动态加载的新页面"""
-        try:
-            # 执行搜索
-            self.search(keyword)
-            processed_pages = set()  # 记录已处理的页码
-            
-            while True:
-                # 获取当前页码
-                current_page = self.get_current_page()
-                if current_page in processed_pages:
-                    logger.info(f"页面 {current_page} 已处理过，停止搜索")
-                    break
-                
-                # 处理当前页的搜索结果
-                results = self.get_search_results()
-                self.process_search_results(results)
-                processed_pages.add(current_page)
-                
-                # 检查是否有下一页
-                if not self.next_page():
-                    logger.info("没有更多页面")
-                    break
-                    
-                time.sleep(2)  # 等待页面加载
-                
-        except Exception as e:
-            logger.error(f"处理搜索页面时出错: {str(e)}")
-    
     @abstractmethod
     def get_current_page(self) -> int:
         """获取当前页码"""
@@ -172,54 +507,4 @@ class SearchEngine(ABC):
     @abstractmethod
     def get_domain(self) -> str:
         """获取搜索引擎域名"""
-        pass 
-
-    def process_search_results(self, results: List[Dict[str, Any]]) -> None:
-        """处理搜索结果"""
-        for index, result in enumerate(results, 1):
-            try:
-                logger.info(f"检查第 {index} 条结果: {result['title']}")
-                logger.info(f"URL: {result['url']}")
-                
-                # 先查询数据库中是否有记录
-                cursor = self.db_conn.cursor()
-                cursor.execute(
-                    "SELECT is_expired FROM results WHERE url = ?", 
-                    (result['url'],)
-                )
-                record = cursor.fetchone()
-                
-                if record is not None:
-                    # 如果有记录，直接使用数据库中的结果
-                    is_expired = bool(record[0])
-                    logger.info(f"使用数据库记录 - 链接状态: {'已过期' if is_expired else '正常'}")
-                    
-                    if is_expired:
-                        logger.info("跳过已反馈的过期链接")
-                    continue
-                
-                # 如果没有记录，则检查链接
-                is_expired = self.check_expired(result['url'])
-                logger.info(f"检查结果: {'已过期' if is_expired else '正常'}")
-                
-                # 将结果保存到数据库
-                cursor.execute(
-                    """
-                    INSERT INTO results (url, is_expired, check_time, engine)
-                    VALUES (?, ?, datetime('now'), ?)
-                    """,
-                    (result['url'], is_expired, self.get_domain())
-                )
-                self.db_conn.commit()
-                
-                if is_expired:
-                    logger.info(f"发现过期链接，准备提交反馈: {result['url']}")
-                    if self.submit_feedback(result):
-                        logger.info("反馈提交成功")
-                    else:
-                        logger.error("反馈提交失败")
-                        return  # 如果反馈提交失败，停止处理后续结果
-                
-            except Exception as e:
-                logger.error(f"处理搜索结果时出错: {str(e)}")
-                return  # 出错时停止处理后续结果 
\ No newline at end of file
+        pass
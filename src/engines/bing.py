@@ -4,11 +4,13 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from .base import SearchEngine
+from src.utils.verdict import Verdict
 import time
 import logging
 import os
 from selenium.webdriver.support.ui import WebDriverWait
 import re
+from src.utils.url_normalizer import unwrap_redirector
 
 logger = logging.getLogger(__name__)
 
@@ -131,7 +133,7 @@ class BingEngine(SearchEngine):
                         
                         result = {
                             'title': title,
-                            'url': title_element.get_attribute('href'),
+                            'url': unwrap_redirector(title_element.get_attribute('href')),
                             'element': item
                         }
                         results.append(result)
@@ -149,47 +151,11 @@ class BingEngine(SearchEngine):
         
         return results
 
-    def check_expired(self, url: str) -> bool:
+    def check_expired(self, url: str) -> Verdict:
         """检查链接是否过期"""
         logger.debug(f"开始检查: {url}")
-        try:
-            # 设置超时
-            self.driver.set_page_load_timeout(5)
-            logger.debug("页面加载: 设置5秒超时")
-            
-            # 新标签页打开
-            self.driver.execute_script(f"window.open('{url}', '_blank');")
-            self.driver.switch_to.window(self.driver.window_handles[-1])
-            
-            try:
-                time.sleep(2)
-                if self.is_page_expired():
-                    logger.info("检查结果: 页面包含过期标志")
-                    return True
-                
-                logger.debug("检查重定向: 等待页面状态...")
-                if self.wait_for_redirect(self.config['expired_conditions']['redirect_timeout']):
-                    logger.info("检查结果: 检测到页面重定向")
-                    return True
-                
-                logger.info("检查结果: 页面正常访问")
-                return False
-                
-            except TimeoutException:
-                logger.info("检查结果: 页面加载超时，视为正常")
-                return False
-                
-        finally:
-            # 恢复默认超时设置
-            self.driver.set_page_load_timeout(300)  # 恢复默认的300秒
-            # 关闭当前标签页,切回原标签页
-            try:
-                self.driver.close()
-                self.driver.switch_to.window(self.driver.window_handles[0])
-            except Exception as e:
-                logger.error(f"关闭标签页失败: {str(e)}")
-                # 如果关闭失败，尝试重新初始化浏览器
-                self.ensure_browser()
+        # 超时由 check_in_new_tab 的单链接时间预算控制
+        return self.check_in_new_tab(url)
 
     def submit_feedback(self, result: Dict[str, Any]) -> bool:
         """提交反馈"""
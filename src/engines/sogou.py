@@ -4,11 +4,13 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from .base import SearchEngine
+from src.utils.verdict import Verdict
 import time
 import logging
 import os
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support.ui import Select
+from src.utils.url_normalizer import unwrap_redirector
 
 logger = logging.getLogger(__name__)
 
@@ -66,7 +68,7 @@ class SogouEngine(SearchEngine):
                         logger.debug(f"跳过重复标题: {title}")
                         continue
                     
-                    url = link.get_attribute('href')
+                    url = unwrap_redirector(link.get_attribute('href'))
                     
                     result = {
                         'title': title,
@@ -83,39 +85,9 @@ class SogouEngine(SearchEngine):
             
         return results
 
-    def check_expired(self, url: str) -> bool:
+    def check_expired(self, url: str) -> Verdict:
         """检查链接是否过期"""
-        if not self.ensure_browser():
-            return False
-            
-        current_window = self.driver.current_window_handle
-        
-        try:
-            # 新标签页打开链接
-            self.driver.execute_script(f"window.open('{url}', '_blank');")
-            time.sleep(1)
-            self.driver.switch_to.window(self.driver.window_handles[-1])
-            
-            # 等待页面加载
-            time.sleep(2)
-            
-            # 检查页面内容
-            if self.is_page_expired():
-                logger.info("检测到页面包含过期标志")
-                return True
-            
-            # 检查重定向
-            if self.wait_for_redirect(self.config['expired_conditions']['redirect_timeout']):
-                logger.info("检测到页面发生重定向")
-                return True
-            
-            logger.info("页面正常访问")
-            return False
-            
-        finally:
-            self.driver.close()
-            self.driver.switch_to.window(current_window)
-            time.sleep(1)
+        return self.check_in_new_tab(url)
 
     def submit_feedback(self, result: Dict[str, Any]) -> bool:
         """提交反馈"""
@@ -4,12 +4,13 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from .base import SearchEngine
+from src.utils.verdict import Verdict
 import time
 from selenium.webdriver.remote.webdriver import WebDriver
 import logging
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
-from urllib.parse import unquote
+from src.utils.url_normalizer import unwrap_redirector
 import sys
 import os
 
@@ -105,10 +106,7 @@ class ToutiaoEngine(SearchEngine):
                         continue
 
                     # 获取真实的 URL
-                    raw_url = title_element.get_attribute('href')
-                    real_url = raw_url.split('url=')[-1] if 'url=' in raw_url else raw_url
-                    real_url = real_url.split('&')[0]  # 取出第一个参数，确保只得到 URL
-                    real_url = unquote(real_url)  # 进行 URL 解码
+                    real_url = unwrap_redirector(title_element.get_attribute('href'))
                     
                     result = {
                         'title': title_element.text.strip(),
@@ -139,42 +137,9 @@ class ToutiaoEngine(SearchEngine):
             
         return results
 
-    def check_expired(self, url: str) -> bool:
+    def check_expired(self, url: str) -> Verdict:
         """检查链接是否过期"""
-        if not self.ensure_browser():
-            return False
-            
-        current_window = self.driver.current_window_handle
-        
-        try:
-            # 新标签页打开链接
-            self.driver.execute_script(f"window.open('{url}', '_blank');")
-            time.sleep(1)  # 等待新标签页打开
-            self.driver.switch_to.window(self.driver.window_handles[-1])
-            
-            # 等待页面加载
-            # time.sleep(2)
-            
-            # 先检查页面内容是否包含过期标志
-            if self.is_page_expired():
-                logger.info("检测到页面包含过期标志")
-                return True
-            
-            # 如果页面内容没有过期标志，则等待看是否会重定向
-            logger.info("页面内容正常，等待检查是否重定向...")
-            if self.wait_for_redirect(self.config['expired_conditions']['redirect_timeout']):
-                logger.info("检测到页面发生重定向")
-                return True
-            
-            logger.info("页面正常访问")
-            return False
-            
-        finally:
-            # 关闭当前标签页,切回原标签页
-            self.driver.close()
-            # time.sleep(1)  # 等待标签页关闭
-            self.driver.switch_to.window(current_window)
-            # time.sleep(1)  # 等待切换完成
+        return self.check_in_new_tab(url)
 
     def submit_feedback(self, result: Dict[str, Any]) -> bool:
         """提交反馈"""
@@ -317,9 +282,10 @@ class ToutiaoEngine(SearchEngine):
                 logger.info(f"检查第 {index} 条结果: {result['title']}")
                 logger.info(f"URL: {result['url']}")
                 
-                # 检查链接是否过期
-                is_expired = self.check_expired(result['url'])
-                logger.info(f"检查结果: {'已过期' if is_expired else '正常'}")
+                # 检查链接是否过期，置信度不足的过期结论不提交反馈
+                verdict = self.check_expired(result['url'])
+                is_expired = self.scorer.should_submit(verdict)
+                logger.info(f"检查结果: {'已过期' if is_expired else '正常'} ({verdict})")
                 
                 if is_expired:
                     try:
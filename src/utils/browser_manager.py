@@ -1,4 +1,5 @@
 import logging
+import yaml
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
@@ -20,11 +21,22 @@ from selenium.webdriver.support import expected_conditions as EC
 logger = logging.getLogger(__name__)
 
 class BrowserManager:
-    def __init__(self):
+    def __init__(self, config_path: str = None):
         """初始化浏览器管理器"""
         # 禁用统计数据收集
         os.environ['WDM_DISABLE_USAGE_STATS'] = 'true'
         
+        # 浏览器配置（可选）
+        self.browser_config = {}
+        if config_path:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                self.browser_config = (yaml.safe_load(f) or {}).get('browser') or {}
+        # 作用于整个浏览器会话（搜索结果页、验证码、反馈表单），默认等待页面完全加载；
+        # 检查标签页通过 CDP 轮询正文，不受该策略影响，判定后用 Page.stopLoading 停止剩余加载
+        self.page_load_strategy = self.browser_config.get('page_load_strategy', 'normal')
+        self.page_load_timeout = self.browser_config.get('page_load_timeout', 300)
+        self.headless = self.browser_config.get('headless', False)
+        
         self.driver = None
         self.cookies_dir = "cookies"  # cookie 保存目录
         self.error_logs_dir = "error_logs"  # 添加错误日志目录
@@ -52,8 +64,15 @@ class BrowserManager:
         options.add_argument('--no-sandbox')
         options.add_argument('--disable-dev-shm-usage')
         options.add_argument('--disable-extensions')
-        # options.add_argument('--headless')  # 添加无头模式
+        if self.headless:
+            options.add_argument('--headless=new')  # 无头模式
         options.add_argument('--window-size=1920,1080')    # 设置窗口大小
+        options.page_load_strategy = self.page_load_strategy
+        # 检查标签页不下载文件、不渲染 PDF 查看器，非网页资源由 HTTP 预取判定
+        options.add_experimental_option('prefs', {
+            'download_restrictions': 3,
+            'plugins.always_open_pdf_externally': True,
+        })
         
         # 如果需要清理缓存，添加相关参数
         if clear_cache:
@@ -85,7 +104,7 @@ class BrowserManager:
                     logger.info(f"尝试使用本地 ChromeDriver: {driver_path}")
                     service = Service(driver_path)
                     self.driver = webdriver.Chrome(service=service, options=options)
-                    self.driver.set_page_load_timeout(300)
+                    self.driver.set_page_load_timeout(self.page_load_timeout)
                     self.wait = WebDriverWait(self.driver, 10)
                     logger.info("浏览器: 使用本地 ChromeDriver 初始化成功")
                     return
@@ -159,7 +178,7 @@ class BrowserManager:
             # 使用下载的驱动
             service = Service(driver_path)
             self.driver = webdriver.Chrome(service=service, options=options)
-            self.driver.set_page_load_timeout(300)
+            self.driver.set_page_load_timeout(self.page_load_timeout)
             self.wait = WebDriverWait(self.driver, 10)
             logger.info("浏览器: 使用自动下载的 ChromeDriver 初始化成功")
             
@@ -0,0 +1,84 @@
+import logging
+import posixpath
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+from src.utils.http_client import get_session
+
+logger = logging.getLogger(__name__)
+
+# 常见非网页资源扩展名：文档、压缩包、安装包、音视频
+BINARY_EXTENSIONS = {
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.txt', '.csv',
+    '.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.iso',
+    '.apk', '.ipa', '.exe', '.msi', '.dmg', '.pkg', '.deb', '.rpm',
+    '.mp4', '.avi', '.mkv', '.flv', '.mov', '.wmv', '.m3u8', '.ts',
+    '.mp3', '.m4a', '.wav', '.flac', '.aac',
+}
+
+# 需要浏览器渲染判定的内容类型
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+
+# HEAD 不被支持时返回的状态码，需要改用 GET
+HEAD_UNSUPPORTED = (405, 501)
+
+
+def has_binary_extension(url: str) -> bool:
+    """根据路径扩展名判断是否为非网页资源"""
+    try:
+        path = urlsplit(url or '').path
+    except ValueError:
+        return False
+    return posixpath.splitext(path.lower())[1] in BINARY_EXTENSIONS
+
+
+def is_html(content_type: str) -> bool:
+    """缺少 Content-Type 时按网页处理"""
+    if not content_type:
+        return True
+    return content_type.split(';', 1)[0].strip().lower() in HTML_TYPES
+
+
+class ContentProbe:
+    """HTTP 预取响应头，非网页资源只按状态码判定，不在浏览器中打开"""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        config = config or {}
+        self.enabled = config.get('enabled', True)
+        # extension: 仅预取带非网页扩展名的链接；always: 预取所有链接
+        self.mode = config.get('mode', 'extension')
+        self.timeout = config.get('timeout', 5)
+
+    def should_probe(self, url: str) -> bool:
+        if not self.enabled:
+            return False
+        return self.mode == 'always' or has_binary_extension(url)
+
+    def fetch_head(self, url: str, timeout: float = None) -> Optional[Dict[str, Any]]:
+        """获取最终响应的状态码和内容类型；HEAD 不可用时改用流式 GET，只读响应头"""
+        session = get_session()
+        timeout = self.timeout if timeout is None else min(self.timeout, timeout)
+        try:
+            response = session.head(url, timeout=timeout, allow_redirects=True)
+            if response.status_code in HEAD_UNSUPPORTED:
+                response = session.get(url, timeout=timeout, allow_redirects=True, stream=True)
+                response.close()
+        except Exception as e:
+            logger.debug(f"预取响应头失败 {url}: {str(e)}")
+            return None
+        return {
+            'status': response.status_code,
+            'content_type': response.headers.get('Content-Type', ''),
+            'final_url': response.url,
+            'retry_after': response.headers.get('Retry-After'),
+        }
+
+    def classify(self, url: str, timeout: float = None) -> Optional[Dict[str, Any]]:
+        """非网页资源返回 {'expired', 'status', 'content_type'}；网页或无法确定时返回 None，交由浏览器判定"""
+        if not self.should_probe(url) or (timeout is not None and timeout <= 0):
+            return None
+        head = self.fetch_head(url, timeout)
+        if head is None or is_html(head['content_type']):
+            return None
+        head['expired'] = head['status'] >= 400
+        logger.info(f"非网页资源({head['content_type']})，按状态码 {head['status']} 判定: {url}")
+        return head
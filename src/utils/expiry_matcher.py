@@ -0,0 +1,92 @@
+import re
+import json
+import logging
+from typing import List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# 在页面内执行的匹配脚本：每个标签页只编译一次正则，只回传匹配摘要
+# arguments[0]: 正则源码, arguments[1]: 是否回传正文（调试用）
+MATCHER_SCRIPT = """
+    var source = arguments[0], withText = arguments[1];
+    var matcher = window.__expiryMatcher;
+    if (!matcher || matcher.source !== source) {
+        matcher = window.__expiryMatcher = new RegExp(source, 'i');
+    }
+    var body = document.body;
+    var text = body ? body.innerText : '';
+    var m = matcher.exec(text);
+    var nav = performance.getEntriesByType ? performance.getEntriesByType('navigation')[0] : null;
+    var state = {
+        url: location.href,
+        status: nav && nav.responseStatus ? nav.responseStatus : null,
+        ready: location.href !== 'about:blank' && document.readyState !== 'loading',
+        matched: !!m,
+        pattern: m ? m[0] : null,
+        offset: m ? m.index : -1,
+        textLength: text.length
+    };
+    if (withText) {
+        state.text = text;
+    }
+    return state;
+"""
+
+
+def _js_escape(text: str) -> str:
+    """转义 JavaScript 正则中的特殊字符"""
+    return re.sub(r'[-/\\^$*+?.()|\[\]{}]', lambda m: '\\' + m.group(0), text)
+
+
+class ExpiryMatcher:
+    """过期文本匹配器，同时提供 Python 正则和页面内使用的 JS 正则源码"""
+
+    def __init__(self, texts: List[str]):
+        patterns = [text.strip() for text in texts if text and text.strip()]
+        # 长文本优先，保证命中时返回最具体的模式
+        patterns.sort(key=len, reverse=True)
+        self.patterns = patterns
+        self._canonical = {p.lower(): p for p in patterns}
+        self.pattern = re.compile('|'.join(re.escape(p) for p in patterns) or r'(?!x)x', re.IGNORECASE)
+        self.js_source = '|'.join(_js_escape(p) for p in patterns) or '(?!x)x'
+
+    def canonical(self, matched: str) -> str:
+        """将页面中命中的原文映射回配置中的模式"""
+        if matched is None:
+            return None
+        return self._canonical.get(matched.lower(), matched)
+
+    def match(self, text: str) -> Dict[str, Any]:
+        """在 Python 侧匹配文本，返回与页面内脚本一致的结构"""
+        text = text or ''
+        m = self.pattern.search(text)
+        return {
+            'matched': bool(m),
+            'pattern': self.canonical(m.group(0)) if m else None,
+            'offset': m.start() if m else -1,
+            'textLength': len(text),
+        }
+
+    def _evaluate_cdp(self, driver, with_text: bool):
+        """
+        通过 CDP Runtime.evaluate 执行匹配脚本。execute_script 会按页面加载策略等到 load 事件后才执行，
+        CDP 命令不等待导航，页面仍在加载时也能读取已到达的正文；不支持或执行失败时返回 None
+        """
+        expression = f"(function(){{{MATCHER_SCRIPT}}}).apply(null, {json.dumps([self.js_source, with_text])})"
+        try:
+            result = driver.execute_cdp_cmd('Runtime.evaluate', {'expression': expression, 'returnByValue': True})
+        except Exception as e:
+            logger.debug(f"CDP 执行匹配脚本失败: {str(e)}")
+            return None
+        if result.get('exceptionDetails'):
+            # 导航过程中执行上下文切换，按未就绪处理，下一轮再取
+            return {'ready': False, 'matched': False, 'textLength': 0}
+        return (result.get('result') or {}).get('value') or {}
+
+    def match_in_page(self, driver, with_text: bool = False) -> Dict[str, Any]:
+        """在当前标签页内执行匹配，只回传匹配摘要；优先使用 CDP，以便在 DOMContentLoaded 之前开始轮询"""
+        state = self._evaluate_cdp(driver, with_text) if hasattr(driver, 'execute_cdp_cmd') else None
+        if state is None:
+            state = driver.execute_script(MATCHER_SCRIPT, self.js_source, with_text) or {}
+        state['pattern'] = self.canonical(state.get('pattern'))
+        return state
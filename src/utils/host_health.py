@@ -0,0 +1,230 @@
+import socket
+import ssl
+import sqlite3
+import time
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# 站点状态
+HOST_OK = 'ok'
+HOST_NXDOMAIN = 'nxdomain'
+HOST_REFUSED = 'refused'
+HOST_TLS_ERROR = 'tls_error'
+HOST_PARKED = 'parked'
+
+DEAD_STATES = (HOST_NXDOMAIN, HOST_REFUSED, HOST_TLS_ERROR, HOST_PARKED)
+
+# 各状态默认有效期（秒），过期后重新探测
+DEFAULT_TTLS = {
+    HOST_OK: 3600,
+    HOST_NXDOMAIN: 24 * 3600,
+    HOST_REFUSED: 3600,
+    HOST_TLS_ERROR: 6 * 3600,
+    HOST_PARKED: 7 * 24 * 3600,
+}
+
+
+# 解析线程池：getaddrinfo 本身不支持超时，放到线程中按超时等待结果
+_resolver = ThreadPoolExecutor(max_workers=4, thread_name_prefix='host-health-dns')
+
+
+def resolve(host: str, port: int, timeout: float):
+    """带超时的 DNS 解析，超时抛出 socket.timeout"""
+    future = _resolver.submit(socket.getaddrinfo, host, port, type=socket.SOCK_STREAM)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        raise socket.timeout(f"解析 {host} 超时")
+
+
+def _tls_context() -> ssl.SSLContext:
+    """存活探测只确认能完成握手，不校验证书：证书过期或自签名的站点浏览器仍能打开"""
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def is_tls_dead(error: ssl.SSLError) -> bool:
+    """只有证书校验失败和服务端发回握手告警才视为 TLS 故障；EOF、重置等是临时错误"""
+    if isinstance(error, ssl.SSLCertVerificationError):
+        return True
+    if isinstance(error, (ssl.SSLEOFError, ssl.SSLZeroReturnError, ssl.SSLSyscallError)):
+        return False
+    return 'ALERT' in (getattr(error, 'reason', None) or '').upper()
+
+
+def probe_host(host: str, port: int, use_tls: bool, timeout: float = 5) -> Optional[str]:
+    """
+    探测站点的 DNS、TCP 和 TLS 状态，总耗时不超过 timeout；
+    依次尝试解析出的每个地址，无法确定（如超时）时返回 None
+    """
+    deadline = time.time() + timeout
+    try:
+        addresses = resolve(host, port, timeout)
+    except socket.gaierror as e:
+        if e.errno in (socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)):
+            return HOST_NXDOMAIN
+        # EAI_AGAIN 等临时错误不下结论
+        logger.debug(f"DNS 临时错误 {host}: {str(e)}")
+        return None
+    except socket.timeout as e:
+        logger.debug(str(e))
+        return None
+
+    refused = False
+    undetermined = False
+    for family, socktype, proto, _, address in addresses:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            undetermined = True
+            break
+        sock = socket.socket(family, socktype, proto)
+        try:
+            sock.settimeout(remaining)
+            sock.connect(address)
+            if not use_tls:
+                return HOST_OK
+            try:
+                with _tls_context().wrap_socket(sock, server_hostname=host):
+                    return HOST_OK
+            except ssl.SSLError as e:
+                if is_tls_dead(e):
+                    logger.debug(f"TLS 握手失败 {host}: {str(e)}")
+                    return HOST_TLS_ERROR
+                # 连接被重置、提前断开或旧式重协商等，浏览器可能仍能打开，不下结论
+                logger.debug(f"TLS 握手中断 {host} {address[0]}:{port}: {str(e)}")
+                undetermined = True
+        except ConnectionRefusedError:
+            refused = True
+        except socket.timeout as e:
+            logger.debug(f"连接 {host} {address[0]}:{port} 超时: {str(e)}")
+            undetermined = True
+        except OSError as e:
+            # 本机没有 IPv6 连通性等，换下一个地址
+            logger.debug(f"连接 {host} {address[0]}:{port} 失败: {str(e)}")
+        finally:
+            sock.close()
+    # 所有地址都不可用：有地址明确拒绝且没有超时的才判定拒绝连接
+    return HOST_REFUSED if refused and not undetermined else None
+
+
+class HostHealthTable:
+    """站点健康表：内存 + SQLite 持久化，死站点在有效期内直接判定过期"""
+
+    def __init__(self, db_path: str, config: Dict[str, Any] = None):
+        config = config or {}
+        self.db_path = db_path
+        self.enabled = config.get('enabled', True)
+        self.probe_timeout = config.get('probe_timeout', 5)
+        # 用于确认本机网络正常的参照站点，避免断网时误判所有站点
+        self.reference_host = config.get('reference_host', 'www.baidu.com')
+        self.ttls = dict(DEFAULT_TTLS)
+        for state, minutes in (config.get('ttl_minutes') or {}).items():
+            self.ttls[state] = minutes * 60
+        self._cache = {}
+        self._network_checked_at = 0
+        self._network_ok = True
+        self.init_table()
+
+    def init_table(self):
+        """初始化站点健康表"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS host_health (
+                        host TEXT PRIMARY KEY,
+                        state TEXT NOT NULL,
+                        checked_at REAL NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                ''')
+                conn.commit()
+        except Exception as e:
+            logger.error(f"初始化站点健康表失败: {str(e)}")
+            logger.error(traceback.format_exc())
+
+    def get_state(self, host: str) -> Optional[str]:
+        """获取未过期的站点状态"""
+        entry = self._cache.get(host)
+        if entry is None:
+            try:
+                with sqlite3.connect(self.db_path) as conn:
+                    row = conn.execute(
+                        'SELECT state, expires_at FROM host_health WHERE host = ?', (host,)
+                    ).fetchone()
+            except Exception as e:
+                logger.error(f"读取站点状态失败: {str(e)}")
+                return None
+            if not row:
+                return None
+            entry = self._cache[host] = (row[0], row[1])
+
+        state, expires_at = entry
+        if time.time() >= expires_at:
+            return None
+        return state
+
+    def mark(self, host: str, state: str):
+        """记录站点状态"""
+        now = time.time()
+        expires_at = now + self.ttls.get(state, DEFAULT_TTLS[HOST_OK])
+        self._cache[host] = (state, expires_at)
+        if state != HOST_OK:
+            logger.info(f"站点状态: {host} -> {state}")
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    INSERT INTO host_health (host, state, checked_at, expires_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(host) DO UPDATE SET
+                        state = excluded.state,
+                        checked_at = excluded.checked_at,
+                        expires_at = excluded.expires_at
+                ''', (host, state, now, expires_at))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"保存站点状态失败: {str(e)}")
+
+    def network_ok(self, timeout: float = None) -> bool:
+        """确认本机网络正常（结果缓存 60 秒）"""
+        now = time.time()
+        if now - self._network_checked_at > 60:
+            timeout = self.probe_timeout if timeout is None else min(self.probe_timeout, timeout)
+            self._network_ok = probe_host(self.reference_host, 443, False, timeout) == HOST_OK
+            self._network_checked_at = now
+            if not self._network_ok:
+                logger.warning(f"参照站点 {self.reference_host} 无法访问，暂停站点健康判定")
+        return self._network_ok
+
+    def check(self, url: str, timeout: float = None) -> Optional[str]:
+        """返回链接所在站点的死亡状态；站点正常或无法确定时返回 None。timeout 为本次可用的时间（秒）"""
+        if not self.enabled:
+            return None
+        parts = urlsplit(url)
+        host = parts.hostname
+        if not host or parts.scheme not in ('http', 'https'):
+            return None
+
+        state = self.get_state(host)
+        if state is None:
+            use_tls = parts.scheme == 'https'
+            try:
+                port = parts.port or (443 if use_tls else 80)
+            except ValueError:
+                return None
+            deadline = time.time() + (self.probe_timeout if timeout is None else min(self.probe_timeout, timeout))
+            if deadline <= time.time():
+                return None
+            state = probe_host(host, port, use_tls, deadline - time.time())
+            if state is None:
+                return None
+            if state in DEAD_STATES and not self.network_ok(max(0.1, deadline - time.time())):
+                return None
+            self.mark(host, state)
+        return state if state in DEAD_STATES else None
@@ -0,0 +1,182 @@
+import time
+import threading
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# WAF/限流常见状态码，页面内容（如 forbidden）不可作为过期依据
+THROTTLE_STATUSES = (403, 429)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数或 HTTP 日期），无法解析时返回 None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostThrottled(Exception):
+    """站点被限流或熔断，链接应稍后重试，不记录结论"""
+
+    def __init__(self, host: str, retry_after: float, reason: str = ''):
+        super().__init__(f"{host} 暂停访问 {retry_after:.0f} 秒: {reason}")
+        self.host = host
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class TokenBucket:
+    """令牌桶：rate 为每秒补充的令牌数，capacity 为突发上限"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """预占一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        """获取一个令牌，不足时阻塞等待"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后打开，按指数退避时间后半开试探"""
+
+    def __init__(self, failure_threshold: int = 3, open_seconds: float = 30, max_open_seconds: float = 600):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        """熔断剩余秒数，0 表示允许访问（关闭或半开）"""
+        with self._lock:
+            return max(0.0, self.open_until - time.monotonic())
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.trips = 0
+
+    def record_failure(self) -> float:
+        """记录一次失败，熔断打开时返回打开时长"""
+        with self._lock:
+            self.failures += 1
+            if self.failures < self.failure_threshold:
+                return 0.0
+            # 半开状态下再次失败会继续加倍退避
+            duration = min(self.max_open_seconds, self.open_seconds * (2 ** self.trips))
+            self.trips += 1
+            self.failures = 0
+            self.open_until = time.monotonic() + duration
+            return duration
+
+
+class HostRateLimiter:
+    """按站点限速和熔断，跨站点保持并发，单站点保持克制"""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        config = config or {}
+        self.rate = config.get('rate', 1.0)
+        self.burst = config.get('burst', 3)
+        self.failure_threshold = config.get('failure_threshold', 3)
+        self.open_seconds = config.get('open_seconds', 30)
+        self.max_open_seconds = config.get('max_open_seconds', 600)
+        # 不带 Retry-After 的 403 在该时间窗口内出现在该数量的不同页面上才视为限流，单个 403 页面是页面本身的结论
+        self.forbidden_threshold = config.get('forbidden_threshold', 3)
+        self.forbidden_window = config.get('forbidden_window', 60)
+        self._buckets = {}
+        self._breakers = {}
+        self._forbidden = {}  # host -> {返回 403 的链接: 最近一次的时间}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        try:
+            return (urlsplit(url or '').hostname or '').lower()
+        except ValueError:
+            return ''
+
+    def _get(self, host: str):
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.open_seconds, self.max_open_seconds)
+            return self._buckets[host], self._breakers[host]
+
+    def acquire(self, url: str):
+        """访问前调用：熔断中抛出 HostThrottled，否则按令牌桶限速"""
+        host = self.host_of(url)
+        if not host:
+            return
+        bucket, breaker = self._get(host)
+        retry_after = breaker.retry_after()
+        if retry_after > 0:
+            raise HostThrottled(host, retry_after, '熔断中')
+        bucket.acquire()
+
+    def record_success(self, url: str):
+        host = self.host_of(url)
+        if host:
+            self._get(host)[1].record_success()
+
+    def record_failure(self, url: str, reason: str) -> float:
+        """记录超时或限流响应，返回建议的重试等待秒数"""
+        host = self.host_of(url)
+        if not host:
+            return self.open_seconds
+        opened = self._get(host)[1].record_failure()
+        if opened:
+            logger.warning(f"站点熔断: {host} 连续失败({reason})，暂停 {opened:.0f} 秒")
+        return opened or self.open_seconds
+
+    def is_throttle(self, url: str, status: Optional[int], retry_after: Optional[str] = None) -> bool:
+        """
+        429 总是限流；403 只有带 Retry-After，或同一站点短时间内多个不同页面都返回 403 时才视为限流，
+        否则按页面本身（禁止访问、已删除）判定。同一页面重复查询（轮询、HEAD 后再打开）只计一次
+        """
+        if status == 429:
+            return True
+        if status != 403:
+            return False
+        if parse_retry_after(retry_after) is not None:
+            return True
+        host = self.host_of(url)
+        now = time.monotonic()
+        with self._lock:
+            hits = {page: t for page, t in self._forbidden.get(host, {}).items() if now - t < self.forbidden_window}
+            hits[url] = now
+            self._forbidden[host] = hits
+        return len(hits) >= self.forbidden_threshold
+
+    def throttled(self, url: str, reason: str, retry_after: Optional[str] = None) -> HostThrottled:
+        """记录一次限流响应并构造对应异常，响应带 Retry-After 时按其等待"""
+        wait = self.record_failure(url, reason)
+        header_wait = parse_retry_after(retry_after)
+        if header_wait is not None:
+            wait = max(wait, header_wait)
+        return HostThrottled(self.host_of(url), wait, reason)
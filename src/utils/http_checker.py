@@ -0,0 +1,74 @@
+import re
+import logging
+from typing import Optional
+from src.utils.http_client import get_session
+from src.utils.content_probe import is_html
+from src.utils.host_limiter import THROTTLE_STATUSES
+from src.utils.redirect_detector import find_html_redirect, is_site_root
+from src.utils.verdict import Verdict, VerdictScorer, EXPIRED, NORMAL
+
+logger = logging.getLogger(__name__)
+
+_INVISIBLE = re.compile(r'<(script|style|noscript|template)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r'<[^>]+>')
+_SPACE = re.compile(r'\s+')
+
+
+def html_to_text(html: str) -> str:
+    """粗略提取 HTML 可见文本，用于过期文本匹配"""
+    text = _TAG.sub(' ', _INVISIBLE.sub(' ', html or ''))
+    return _SPACE.sub(' ', text.replace('&nbsp;', ' ')).strip()
+
+
+class HttpChecker:
+    """
+    不经过浏览器的 HTTP 检查，作为低置信度结论的第二意见。
+    只采用浏览器之外的证据：状态码、最终地址和具体的过期文本；泛化文本与浏览器看到的是同一证据，不给结论
+    """
+
+    def __init__(self, matcher, scorer: VerdictScorer, timeout: float = 5, max_bytes: int = 262144):
+        self.matcher = matcher
+        self.scorer = scorer
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+    def check(self, url: str, timeout: float = None) -> Optional[Verdict]:
+        """返回 HTTP 检查结论；请求失败、被限流或只命中泛化文本时返回 None。timeout 为本次可用的时间（秒）"""
+        timeout = self.timeout if timeout is None else min(self.timeout, timeout)
+        try:
+            response = get_session().get(url, timeout=timeout, allow_redirects=True, stream=True)
+        except Exception as e:
+            logger.debug(f"HTTP 复查失败 {url}: {str(e)}")
+            return None
+        try:
+            status = response.status_code
+            final_url = response.url
+            if status in THROTTLE_STATUSES:
+                return None
+            if status in (404, 410):
+                return self.scorer.make(EXPIRED, 'http', 'http_gone')
+            if status >= 400:
+                return self.scorer.make(EXPIRED, 'http', 'http_error')
+            if final_url != url and is_site_root(final_url, url) and not is_site_root(url, url):
+                return self.scorer.make(EXPIRED, 'http', 'site_root_redirect', redirect_target=final_url)
+
+            content_type = response.headers.get('Content-Type', '')
+            if not is_html(content_type):
+                return self.scorer.make(NORMAL, 'http', 'binary_ok')
+            html = response.raw.read(self.max_bytes, decode_content=True).decode(response.encoding or 'utf-8', 'ignore')
+        except Exception as e:
+            logger.debug(f"HTTP 复查读取失败 {url}: {str(e)}")
+            return None
+        finally:
+            response.close()
+
+        target = find_html_redirect(html, final_url)
+        if target and is_site_root(target, final_url) and not is_site_root(final_url, final_url):
+            return self.scorer.make(EXPIRED, 'http', 'site_root_redirect', redirect_target=target)
+
+        match = self.matcher.match(html_to_text(html))
+        if match['matched']:
+            if self.scorer.text_reason(match['pattern']) == 'generic_text':
+                return None
+            return self.scorer.make(EXPIRED, 'http', 'text', matched_pattern=match['pattern'])
+        return self.scorer.make(NORMAL, 'http', 'http_ok')
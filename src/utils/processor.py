@@ -5,7 +5,11 @@ from typing import Dict, Any
 from selenium.webdriver.remote.webdriver import WebDriver
 from src.database import Database
 from src.engines.base import SearchEngine
+from src.utils.verdict import Verdict, TIMEOUT, THROTTLED
 from selenium.webdriver.common.by import By
+from src.utils.url_normalizer import url_key
+from src.utils.redirect_resolver import RedirectResolver
+from src.utils.host_limiter import HostThrottled
 import sys
 import os
 
@@ -22,6 +26,14 @@ class SearchProcessor: # 搜索处理器
         self.engines = engines # 搜索引擎
         # 初始化数据库
         self.db = Database(self.config['database'])
+        # 搜索引擎跳转链接解析器
+        self.resolver = RedirectResolver(self.config['database']['path'], self.config.get('redirect_resolver'))
+        # 被限流/熔断站点的链接重新排队，不记录结论
+        limiter_config = self.config.get('host_limiter') or {}
+        self.max_requeue = limiter_config.get('max_requeue', 3)
+        self.max_requeue_wait = limiter_config.get('max_requeue_wait', 60)
+        self.retry_queue = []  # (可重试时间, 已重试次数, 结果)，只在结果所在的搜索结果页上穿插重试
+        self.pending_keywords = set()  # 留有超时/限流记录、下次运行需要重新检查的 (引擎, 关键词)
 
     def highlight_result(self, result: Dict[str, Any], highlight: bool = True):
         """高亮或取消高亮搜索结果"""
@@ -41,6 +53,18 @@ class SearchProcessor: # 搜索处理器
         except Exception as e:
             logger.error(f"{'高亮' if highlight else '取消高亮'}搜索结果失败: {str(e)}")
 
+    def hold_for_retry(self, result: Dict[str, Any]):
+        """
+        超时或限流的链接留到下次运行重查：所属关键词不标记完成，下次重新搜索时再检查。
+        上次已经是超时/限流的不再保留，每个链接最多多等一次运行，避免关键词永远完成不了
+        """
+        previous = self.db.get_check_status(result['search_engine'], result['url_key'])
+        if previous in (TIMEOUT, THROTTLED):
+            logger.warning(f"链接连续两次运行未得出结论，不再重试: {result['url']}")
+            return
+        self.pending_keywords.add((result['search_engine'], result['keyword']))
+        self.db.save_progress(result['keyword'], result['search_engine'], is_done=False)
+
     def process_single_result(self, engine: SearchEngine, result: Dict[str, Any], keyword: str, engine_name: str) -> bool:
         """处理单个搜索结果"""
         browser_info = self.browser_manager.get_browser_info() if hasattr(self.browser_manager, 'get_browser_info') else "默认浏览器"
@@ -58,7 +82,8 @@ class SearchProcessor: # 搜索处理器
                 return True
             
             # 检查search_engine+url是否已存在
-            engine_url_exists = self.db.get_existing_result(url=result['url'], search_engine=engine_name)
+            engine_url_exists = self.db.get_existing_result(url=result['url'], search_engine=engine_name,
+                                                            key=result.get('url_key'))
             if engine_url_exists and engine_url_exists.get('is_expired'):
                 logger.info(f"【{browser_info}】该URL已存在过期记录，跳过反馈: {engine_name} - {result['url']}")
                 print(f"该URL已存在过期记录，跳过反馈: {engine_name} - {result['url']}")
@@ -70,9 +95,25 @@ class SearchProcessor: # 搜索处理器
             
             # 检查是否过期
             logger.info(f"【{browser_info}】过期检测：{engine_name} - {keyword} - {result['title']}")
-            is_expired = engine.check_expired(result['url'])
-            result['is_expired'] = is_expired
+            verdict = engine.check_expired(result.get('check_url') or result['url'])
+            result.update(verdict.to_dict())
+            # 置信度不足的过期结论只记录，不提交反馈，也不算作过期链接
+            result['is_expired'] = is_expired = engine.scorer.should_submit(verdict)
+            if verdict.expired and not is_expired:
+                logger.info(f"【{browser_info}】过期结论置信度不足({verdict.confidence:.2f})，不提交反馈：{engine_name} - {result['url']}")
+            if verdict.status == TIMEOUT:
+                # 超时不是结论，只在本地记录，关键词保持未完成，下次运行时重试
+                logger.warning(f"【{browser_info}】检查超时，下次运行重试：{engine_name} - {result['url']}")
+                self.hold_for_retry(result)
+                self.db.save_result(result)
+                return True
             
+            # 提交反馈需要搜索结果页上的元素，元素已失效时不提交，下次运行重新检查
+            if is_expired and 'element' not in result:
+                logger.warning(f"【{browser_info}】搜索结果元素已失效，下次运行重新检查：{engine_name} - {result['url']}")
+                self.hold_for_retry(result)
+                return True
+
             # 提交反馈
             if is_expired:
                 logger.info(f"【{browser_info}】发现过期链接：{engine_name} - {keyword} - {result['title']}")
@@ -117,6 +158,49 @@ class SearchProcessor: # 搜索处理器
             # 取消高亮
             self.highlight_result(result, False)
 
+    def try_process_result(self, engine: SearchEngine, result: Dict[str, Any], keyword: str, engine_name: str, attempts: int = 0) -> bool:
+        """处理单个结果，站点被限流时按退避时间重新排队，不阻塞其他链接的检查"""
+        try:
+            return self.process_single_result(engine, result, keyword, engine_name)
+        except HostThrottled as e:
+            if attempts >= self.max_requeue:
+                logger.warning(f"站点持续限流，放弃本次检查: {result['url']} ({e.reason})")
+                self.save_throttled(result)
+                return True
+            retry_after = min(e.retry_after, self.max_requeue_wait)
+            logger.info(f"站点限流，{retry_after:.0f} 秒后重试: {result['url']} ({e.reason})")
+            self.retry_queue.append((time.time() + retry_after, attempts + 1, result))
+            return True
+
+    def run_ready_retries(self, engine: SearchEngine) -> bool:
+        """处理已到重试时间的排队链接，未到时间的留在队列中，穿插在其他链接之间检查"""
+        now = time.time()
+        ready = [item for item in self.retry_queue if item[0] <= now]
+        if not ready:
+            return True
+        self.retry_queue = [item for item in self.retry_queue if item[0] > now]
+        for _, attempts, result in sorted(ready, key=lambda item: item[0]):
+            if not self.try_process_result(engine, result, result['keyword'], result['search_engine'], attempts):
+                return False
+        return True
+
+    def save_throttled(self, result: Dict[str, Any]):
+        """限流不是结论，记为 throttled 只保存在本地，关键词保持未完成，下次运行时重新检查"""
+        result.update(Verdict(THROTTLED, 'host_limiter', 0.0).to_dict())
+        result['is_expired'] = False
+        self.hold_for_retry(result)
+        self.db.save_result(result)
+
+    def defer_page_retries(self):
+        """
+        离开当前搜索结果页前调用：排队中的链接失去页面元素，过期也无法提交反馈，
+        不再等待，留到下次运行重新搜索时检查
+        """
+        for _, _, result in self.retry_queue:
+            logger.info(f"站点仍在限流，下次运行重试: {result['url']}")
+            self.save_throttled(result)
+        self.retry_queue = []
+
     def process_keyword(self, engine_name: str, keyword: str): 
         """处理单个关键词"""
         engine = self.engines[engine_name]
@@ -145,6 +229,7 @@ class SearchProcessor: # 搜索处理器
 
             Limit = 20
             current_page = 1
+            seen_keys = set()  # 本关键词下已处理的规范化链接
             
             while True:
                 results = engine.get_search_results() # 保存当前页检索条目
@@ -152,12 +237,22 @@ class SearchProcessor: # 搜索处理器
                 if not results:
                     logger.info(f"【{browser_info}】搜索完成: {engine_name} - {keyword}")
                     break
+                
+                # 整页并发解析跳转链接，去重和检查前即可拿到真实目标（check_url）
+                self.resolver.resolve_results(results)
                     
                 for result in results:
                     result['keyword'] = keyword
                     result['search_engine'] = engine_name
-                    # 处理单个结果
-                    if not self.process_single_result(engine, result, keyword, engine_name):
+                    # 同一目标只检查一次
+                    result['url_key'] = url_key(result.get('check_url') or result['url'])
+                    if result['url_key'] in seen_keys:
+                        logger.info(f"【{browser_info}】跳过重复目标: {engine_name} - {result['url']}")
+                        continue
+                    seen_keys.add(result['url_key'])
+                    # 处理单个结果，并穿插处理已到重试时间的限流链接
+                    if not (self.try_process_result(engine, result, keyword, engine_name)
+                            and self.run_ready_retries(engine)):
                         logger.info(f"【{browser_info}】处理中断: {engine_name} - {keyword}")
                         # 异常计数+1
                         self._keyword_retry_count[retry_key] += 1
@@ -165,6 +260,9 @@ class SearchProcessor: # 搜索处理器
                             logger.info(f"【{browser_info}】关键词异常/重启次数已达上限，强制标记为已完成: {engine_name} - {keyword}")
                             self.db.save_progress(keyword, engine_name, is_done=True)
                         return
+
+                # 未到重试时间的链接留到下次运行
+                self.defer_page_retries()
                         
                 if not engine.next_page():
                     logger.info(f"【{browser_info}】已到最后一页，关键词完成: {engine_name} - {keyword}")
@@ -177,8 +275,11 @@ class SearchProcessor: # 搜索处理器
                     break
 
                 time.sleep(1)  # 翻页后等待加载
-            # 只有所有流程顺利跑完才写入完成状态
-            self.db.save_progress(keyword, engine_name, is_done=True)
+            # 只有所有流程顺利跑完、且没有超时/限流待重查的链接才写入完成状态
+            if (engine_name, keyword) in self.pending_keywords:
+                logger.info(f"【{browser_info}】关键词有超时/限流的链接，下次运行重新检查: {engine_name} - {keyword}")
+            else:
+                self.db.save_progress(keyword, engine_name, is_done=True)
         except Exception as e:
             logger.error(f"【{browser_info}】处理关键词出错: {keyword} - {str(e)}")
             # 异常计数+1
@@ -204,6 +305,8 @@ class SearchProcessor: # 搜索处理器
                     logger.info(f"【{browser_info}】开始关键词搜索: {engine_name} 搜索 '{keyword}'")
                     print(f"【{browser_info}】开始关键词搜索: {engine_name} 搜索 '{keyword}'")
                     self.process_keyword(engine_name, keyword)
+                    # 关键词中途中断时仍在排队的限流链接同样留到下次运行
+                    self.defer_page_retries()
                 logger.info(f"【{browser_info}】完成 {engine_name} 引擎的所有关键词处理")
         finally:
             self.browser_manager.quit() 
\ No newline at end of file
@@ -0,0 +1,175 @@
+import re
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+# 收集页面中的 meta refresh 和包含 location 的内联脚本
+REDIRECT_SOURCES_SCRIPT = """
+    var metas = [], scripts = [];
+    var nodes = document.querySelectorAll('meta[http-equiv]');
+    for (var i = 0; i < nodes.length; i++) {
+        if ((nodes[i].getAttribute('http-equiv') || '').toLowerCase() === 'refresh') {
+            metas.push(nodes[i].getAttribute('content') || '');
+        }
+    }
+    nodes = document.querySelectorAll('script:not([src])');
+    for (var j = 0; j < nodes.length && scripts.length < 20; j++) {
+        var text = nodes[j].text || '';
+        if (text.indexOf('location') !== -1) {
+            scripts.push(text.length > 20000 ? text.slice(0, 20000) : text);
+        }
+    }
+    var onload = document.body ? document.body.getAttribute('onload') : null;
+    if (onload && onload.indexOf('location') !== -1) {
+        scripts.push(onload);
+    }
+    return {url: location.href, metas: metas, scripts: scripts};
+"""
+
+# 首页常见的默认文档
+INDEX_PAGES = {'', '/', '/index.html', '/index.htm', '/index.php', '/index.shtml',
+               '/index.asp', '/index.aspx', '/default.html', '/default.htm', '/default.aspx'}
+
+_META_REFRESH = re.compile(r'^\s*(\d+(?:\.\d+)?)?\s*[;,]?\s*(?:url\s*=\s*)?([\'"]?)(.*?)\2\s*$', re.IGNORECASE | re.DOTALL)
+_LOCATION = r'(?:(?:window|document|top|self|parent)\s*\.\s*)?location'
+_LOCATION_ASSIGN = re.compile(
+    _LOCATION + r'(?:\s*\.\s*href)?\s*=\s*([\'"])(.*?)\1'
+    r'|' + _LOCATION + r'\s*\.\s*(?:replace|assign)\s*\(\s*([\'"])(.*?)\3\s*\)'
+)
+# location.href = location.origin / location.protocol + '//' + location.host 之类跳回站点根
+_LOCATION_ORIGIN = re.compile(
+    _LOCATION + r'(?:\s*\.\s*href)?\s*=\s*(?:'
+    + _LOCATION + r'\s*\.\s*origin'
+    r'|' + _LOCATION + r'\s*\.\s*protocol\s*\+\s*[\'"]//[\'"]\s*\+\s*' + _LOCATION + r'\s*\.\s*host(?:name)?'
+    r')\s*(?:\+\s*[\'"]/?[\'"]\s*)?(?=[;,)}\n]|$)'
+)
+_TIMER_CALL = re.compile(r'\bset(?:Timeout|Interval)\s*\(')
+_DELAY_LITERAL = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*$')
+_BRACKETS = {'(': ')', '[': ']', '{': '}'}
+
+
+def parse_meta_refresh(content: str) -> Optional[Dict[str, Any]]:
+    """解析 meta refresh 的 content，返回延迟（秒）和跳转目标"""
+    m = _META_REFRESH.match(content or '')
+    if not m or not m.group(3).strip():
+        # 没有 url 的 refresh 只是刷新当前页
+        return None
+    delay = float(m.group(1)) if m.group(1) else 0.0
+    return {'delay': delay, 'target': m.group(3).strip(), 'source': 'meta'}
+
+
+def split_call_arguments(script: str, start: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    从调用的左括号之后（start）开始扫描，返回各顶层参数的 (起, 止) 区间；
+    字符串中的括号和逗号不计入，括号不匹配时返回 None
+    """
+    stack = [')']
+    arguments = []
+    arg_start = start
+    quote = None
+    i = start
+    while i < len(script):
+        ch = script[i]
+        if quote:
+            if ch == '\\':
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch in '\'"`':
+            quote = ch
+        elif ch in _BRACKETS:
+            stack.append(_BRACKETS[ch])
+        elif ch in ')]}':
+            if ch != stack.pop():
+                return None
+            if not stack:
+                arguments.append((arg_start, i))
+                return arguments
+        elif ch == ',' and len(stack) == 1:
+            arguments.append((arg_start, i))
+            arg_start = i + 1
+        i += 1
+    return None
+
+
+def find_location_timers(script: str) -> List[Dict[str, Any]]:
+    """
+    查找定时器触发的 location 跳转：跳转语句必须写在 setTimeout/setInterval 的回调参数内，
+    且延迟为数字字面量；回调是函数名或延迟无法解析时不视为计划跳转
+    """
+    redirects = []
+    for call in _TIMER_CALL.finditer(script or ''):
+        arguments = split_call_arguments(script, call.end())
+        if not arguments or len(arguments) < 2:
+            continue
+        delay = _DELAY_LITERAL.match(script[arguments[1][0]:arguments[1][1]])
+        if not delay:
+            continue
+        callback = script[arguments[0][0]:arguments[0][1]]
+        m = _LOCATION_ASSIGN.search(callback)
+        if m:
+            target = m.group(2) if m.group(2) is not None else m.group(4)
+        elif _LOCATION_ORIGIN.search(callback):
+            target = '/'
+        else:
+            continue
+        redirects.append({'delay': float(delay.group(1)) / 1000.0, 'target': target, 'source': 'script'})
+    return redirects
+
+
+def find_scheduled_redirect(page_url: str, metas: List[str], scripts: List[str]) -> Optional[Dict[str, Any]]:
+    """从 meta refresh 和脚本定时器中找出计划中的跳转，并解析为绝对地址"""
+    candidates = [r for r in (parse_meta_refresh(content) for content in metas or []) if r]
+    for script in scripts or []:
+        candidates.extend(find_location_timers(script))
+
+    for redirect in candidates:
+        target = redirect['target']
+        if target.lower().startswith(('javascript:', 'about:', 'data:')) or target.startswith('#'):
+            continue
+        resolved = urljoin(page_url, target)
+        # 跳回当前页（自动刷新）不算跳转
+        if resolved.split('#')[0] == page_url.split('#')[0]:
+            continue
+        return dict(redirect, target=resolved)
+    return None
+
+
+def _strip_www(host: str) -> str:
+    host = (host or '').lower().rstrip('.')
+    return host[4:] if host.startswith('www.') else host
+
+
+def is_site_root(target: str, page_url: str) -> bool:
+    """判断 target 是否为 page_url 所属站点（或其上级站点）的首页"""
+    try:
+        target_parts = urlsplit(target)
+        page_parts = urlsplit(page_url)
+    except ValueError:
+        return False
+    if target_parts.scheme not in ('http', 'https'):
+        return False
+
+    target_host = _strip_www(target_parts.hostname)
+    page_host = _strip_www(page_parts.hostname)
+    same_site = target_host == page_host or page_host.endswith('.' + target_host)
+    if not same_site:
+        return False
+    return target_parts.path.lower() in INDEX_PAGES and not target_parts.query
+
+
+_META_TAG = re.compile(r'<meta\b[^>]*>', re.IGNORECASE)
+_META_ATTR = re.compile(r'([\w-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))')
+
+
+def find_html_redirect(html: str, base_url: str) -> Optional[str]:
+    """从原始 HTML 中提取跳转目标（meta refresh 或脚本直接跳转），用于解析跳转页"""
+    for tag in _META_TAG.findall(html or ''):
+        attrs = {m.group(1).lower(): m.group(2) or m.group(3) or m.group(4) or '' for m in _META_ATTR.finditer(tag)}
+        if attrs.get('http-equiv', '').lower() == 'refresh':
+            redirect = parse_meta_refresh(attrs.get('content', ''))
+            if redirect:
+                return urljoin(base_url, redirect['target'])
+    m = _LOCATION_ASSIGN.search(html or '')
+    if m:
+        return urljoin(base_url, m.group(2) if m.group(2) is not None else m.group(4))
+    return None
@@ -0,0 +1,156 @@
+import sqlite3
+import time
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlsplit, urljoin
+from src.utils.http_client import get_session
+from src.utils.redirect_detector import find_html_redirect
+from src.utils.url_normalizer import unwrap_redirector
+
+logger = logging.getLogger(__name__)
+
+# 需要通过 HTTP 解析的搜索引擎跳转链接：域名后缀 -> 路径前缀
+WRAPPER_PATHS = {
+    'baidu.com': '/link',
+    'sogou.com': '/link',
+}
+
+
+def is_wrapper(url: str) -> bool:
+    """判断是否为无法静态还原的搜索引擎跳转链接"""
+    try:
+        parts = urlsplit(url or '')
+    except ValueError:
+        return False
+    host = (parts.hostname or '').lower()
+    for domain, prefix in WRAPPER_PATHS.items():
+        if (host == domain or host.endswith('.' + domain)) and parts.path.startswith(prefix):
+            return True
+    return False
+
+
+class RedirectResolver:
+    """用连接池 HTTP 请求解析搜索引擎跳转链接，不经过浏览器渲染"""
+
+    def __init__(self, db_path: str, config: Dict[str, Any] = None):
+        config = config or {}
+        self.db_path = db_path
+        self.enabled = config.get('enabled', True)
+        self.timeout = config.get('timeout', 5)
+        self.max_workers = config.get('max_workers', 8)
+        self.max_hops = config.get('max_hops', 3)
+        self._cache = {}
+        self.init_table()
+
+    def init_table(self):
+        """初始化跳转缓存表"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS redirect_cache (
+                        wrapper_url TEXT PRIMARY KEY,
+                        target_url TEXT NOT NULL,
+                        resolved_at REAL NOT NULL
+                    )
+                ''')
+                conn.commit()
+        except Exception as e:
+            logger.error(f"初始化跳转缓存表失败: {str(e)}")
+            logger.error(traceback.format_exc())
+
+    def _load_cached(self, urls: List[str]) -> Dict[str, str]:
+        """批量读取已缓存的跳转结果"""
+        found = {url: self._cache[url] for url in urls if url in self._cache}
+        missing = [url for url in urls if url not in found]
+        if not missing:
+            return found
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                placeholders = ','.join('?' * len(missing))
+                rows = conn.execute(
+                    f'SELECT wrapper_url, target_url FROM redirect_cache WHERE wrapper_url IN ({placeholders})',
+                    missing
+                ).fetchall()
+        except Exception as e:
+            logger.error(f"读取跳转缓存失败: {str(e)}")
+            return found
+        for wrapper_url, target_url in rows:
+            self._cache[wrapper_url] = found[wrapper_url] = target_url
+        return found
+
+    def _save_cached(self, mapping: Dict[str, str]):
+        """保存跳转结果"""
+        if not mapping:
+            return
+        self._cache.update(mapping)
+        now = time.time()
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO redirect_cache (wrapper_url, target_url, resolved_at)
+                    VALUES (?, ?, ?)
+                ''', [(wrapper, target, now) for wrapper, target in mapping.items()])
+                conn.commit()
+        except Exception as e:
+            logger.error(f"保存跳转缓存失败: {str(e)}")
+
+    def resolve(self, url: str) -> Optional[str]:
+        """跟随跳转直到离开搜索引擎域名，失败返回 None"""
+        session = get_session()
+        current = url
+        for _ in range(self.max_hops):
+            try:
+                # 不自动跟随跳转，只取 Location 或跳转页中的目标，不下载目标页面
+                response = session.get(current, allow_redirects=False, timeout=self.timeout, stream=True)
+            except Exception as e:
+                logger.debug(f"解析跳转失败 {current}: {str(e)}")
+                return None
+            try:
+                if response.is_redirect or response.status_code in (301, 302, 303, 307, 308):
+                    target = urljoin(current, response.headers.get('Location', ''))
+                elif response.status_code == 200:
+                    html = response.raw.read(65536, decode_content=True).decode(response.encoding or 'utf-8', 'ignore')
+                    target = find_html_redirect(html, current)
+                else:
+                    target = None
+            finally:
+                response.close()
+
+            if not target or target == current:
+                return None
+            target = unwrap_redirector(target)
+            if not is_wrapper(target):
+                return target
+            current = target
+        return None
+
+    def resolve_all(self, urls: List[str]) -> Dict[str, str]:
+        """并发解析一批跳转链接，返回 跳转链接 -> 目标地址"""
+        wrappers = list(dict.fromkeys(url for url in urls if is_wrapper(url)))
+        if not self.enabled or not wrappers:
+            return {}
+
+        resolved = self._load_cached(wrappers)
+        pending = [url for url in wrappers if url not in resolved]
+        if pending:
+            start = time.time()
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+                targets = dict(zip(pending, executor.map(self.resolve, pending)))
+            fresh = {wrapper: target for wrapper, target in targets.items() if target}
+            self._save_cached(fresh)
+            resolved.update(fresh)
+            logger.info(f"解析跳转链接: {len(fresh)}/{len(pending)} 成功，耗时 {time.time() - start:.2f} 秒")
+        return resolved
+
+    def resolve_results(self, results: List[Dict[str, Any]]):
+        """
+        为搜索结果中的跳转链接补充真实目标地址 check_url，只用于检查和去重；
+        url 保持搜索引擎给出的原链接，反馈表单和结果记录仍使用它
+        """
+        resolved = self.resolve_all([result['url'] for result in results])
+        for result in results:
+            target = resolved.get(result['url'])
+            if target:
+                result['check_url'] = target
@@ -0,0 +1,114 @@
+import math
+import sqlite3
+import time
+import logging
+import traceback
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """线性插值分位数，q 取 0~1"""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q
+    low, high = math.floor(position), math.ceil(position)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+class RedirectStats:
+    """按站点记录跳转延迟，学习“刚好够用”的跳转等待时间"""
+
+    def __init__(self, db_path: str, config: Dict[str, Any] = None):
+        config = config or {}
+        self.db_path = db_path
+        self.enabled = config.get('enabled', True)
+        self.min_samples = config.get('min_samples', 5)
+        self.max_samples = config.get('max_samples', 50)
+        self.quantile = config.get('percentile', 0.9)
+        self.margin = config.get('margin', 0.5)
+        self.min_wait = config.get('min_wait', 0.3)
+        self.max_wait = config.get('max_wait', 10)
+        # 每隔若干次按全局等待时间检查一次，以便发现站点跳转行为的变化
+        self.explore_every = config.get('explore_every', 10)
+        self._samples = {}
+        self._checks = {}
+        self.init_table()
+
+    def init_table(self):
+        """初始化跳转延迟表"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS redirect_stats (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        host TEXT NOT NULL,
+                        delay REAL,
+                        waited REAL NOT NULL,
+                        observed_at REAL NOT NULL
+                    )
+                ''')
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_redirect_stats_host ON redirect_stats (host)")
+                conn.commit()
+        except Exception as e:
+            logger.error(f"初始化跳转延迟表失败: {str(e)}")
+            logger.error(traceback.format_exc())
+
+    def samples(self, host: str) -> List[tuple]:
+        """站点最近的 (延迟, 等待时长) 样本，延迟为 None 表示等待期间未跳转"""
+        if host not in self._samples:
+            try:
+                with sqlite3.connect(self.db_path) as conn:
+                    rows = conn.execute('''
+                        SELECT delay, waited FROM redirect_stats
+                        WHERE host = ? ORDER BY id DESC LIMIT ?
+                    ''', (host, self.max_samples)).fetchall()
+            except Exception as e:
+                logger.error(f"读取跳转延迟失败: {str(e)}")
+                rows = []
+            self._samples[host] = list(reversed(rows))
+        return self._samples[host]
+
+    def record(self, host: str, delay: Optional[float], waited: float):
+        """记录一次观测；只保留每个站点最近 max_samples 条"""
+        if not self.enabled or not host:
+            return
+        samples = self.samples(host)
+        samples.append((delay, waited))
+        del samples[:-self.max_samples]
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    INSERT INTO redirect_stats (host, delay, waited, observed_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (host, delay, waited, time.time()))
+                conn.execute('''
+                    DELETE FROM redirect_stats WHERE host = ? AND id NOT IN (
+                        SELECT id FROM redirect_stats WHERE host = ? ORDER BY id DESC LIMIT ?
+                    )
+                ''', (host, host, self.max_samples))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"保存跳转延迟失败: {str(e)}")
+
+    def timeout_for(self, host: str, default: float) -> float:
+        """站点的跳转等待时间：样本不足或探索轮次使用全局值，从不跳转的站点接近零等待"""
+        if not self.enabled or not host:
+            return default
+        samples = self.samples(host)
+        if len(samples) < self.min_samples:
+            return default
+
+        self._checks[host] = self._checks.get(host, 0) + 1
+        if self.explore_every and self._checks[host] % self.explore_every == 0:
+            return max(default, self.learned(samples))
+        return self.learned(samples)
+
+    def learned(self, samples: List[tuple]) -> float:
+        delays = [delay for delay, _ in samples if delay is not None]
+        if not delays:
+            return self.min_wait
+        wait = percentile(delays, self.quantile) + self.margin
+        return min(self.max_wait, max(self.min_wait, wait))
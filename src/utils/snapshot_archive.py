@@ -0,0 +1,140 @@
+import os
+import zlib
+import hashlib
+import sqlite3
+import time
+import logging
+import traceback
+from typing import Dict, Any, Iterator, Optional
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def compress(data: bytes, codec: str, level: int) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return zlib.compress(data, min(level, 9))
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("快照为 zstd 压缩，需要安装 zstandard: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class SnapshotArchive:
+    """页面正文快照归档：按内容哈希存储压缩正文，SQLite 记录索引，用于离线重新判定"""
+
+    def __init__(self, db_path: str, config: Dict[str, Any] = None):
+        config = config or {}
+        self.db_path = db_path
+        self.enabled = config.get('enabled', False)
+        self.directory = config.get('directory', 'snapshots')
+        self.level = config.get('level', 10)
+        # 未安装 zstandard 时退回 zlib（已有的 zstd 快照仍需安装 zstandard 才能读取）
+        self.codec = 'zstd' if ZSTD_AVAILABLE else 'zlib'
+        if self.enabled:
+            if not ZSTD_AVAILABLE:
+                logger.warning("未安装 zstandard，新快照改用 zlib 压缩；请按 requirements.txt 安装 zstandard")
+            os.makedirs(self.directory, exist_ok=True)
+            self.init_table()
+
+    def init_table(self):
+        """初始化快照索引表"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS snapshots (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        url TEXT NOT NULL,
+                        final_url TEXT,
+                        status INTEGER,
+                        content_hash TEXT NOT NULL,
+                        codec TEXT NOT NULL,
+                        text_length INTEGER NOT NULL,
+                        matched_pattern TEXT,
+                        verdict_status TEXT,
+                        verdict_method TEXT,
+                        captured_at REAL NOT NULL
+                    )
+                ''')
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_url ON snapshots (url)")
+                conn.commit()
+        except Exception as e:
+            logger.error(f"初始化快照索引表失败: {str(e)}")
+            logger.error(traceback.format_exc())
+
+    def blob_path(self, content_hash: str, codec: str) -> str:
+        return os.path.join(self.directory, content_hash[:2], f"{content_hash}.{codec}")
+
+    def write_blob(self, text: str) -> str:
+        """写入压缩正文，相同内容只存一份，返回内容哈希"""
+        data = text.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(content_hash, self.codec)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(compress(data, self.codec, self.level))
+            os.replace(temp_path, path)
+        return content_hash
+
+    def read_text(self, content_hash: str, codec: str) -> str:
+        with open(self.blob_path(content_hash, codec), 'rb') as f:
+            return decompress(f.read(), codec).decode('utf-8')
+
+    def store(self, url: str, snapshot: Dict[str, Any], verdict=None) -> Optional[str]:
+        """归档一次检查的最终地址、状态码和正文；snapshot 为页面状态，需包含 text"""
+        if not self.enabled or not snapshot or snapshot.get('text') is None:
+            return None
+        try:
+            content_hash = self.write_blob(snapshot['text'])
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    INSERT INTO snapshots (
+                        url, final_url, status, content_hash, codec, text_length,
+                        matched_pattern, verdict_status, verdict_method, captured_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    url,
+                    snapshot.get('url'),
+                    snapshot.get('status'),
+                    content_hash,
+                    self.codec,
+                    len(snapshot['text']),
+                    snapshot.get('pattern'),
+                    getattr(verdict, 'status', None),
+                    getattr(verdict, 'method', None),
+                    time.time()
+                ))
+                conn.commit()
+            return content_hash
+        except Exception as e:
+            logger.error(f"保存页面快照失败: {str(e)}")
+            return None
+
+    def iter_index(self, latest_only: bool = True, limit: int = None) -> Iterator[Dict[str, Any]]:
+        """遍历快照索引；latest_only 时每个链接只取最新一次"""
+        query = '''
+            SELECT id, url, final_url, status, content_hash, codec, matched_pattern, verdict_status, verdict_method
+            FROM snapshots
+        '''
+        if latest_only:
+            query += ' WHERE id IN (SELECT MAX(id) FROM snapshots GROUP BY url)'
+        query += ' ORDER BY id'
+        if limit:
+            query += f' LIMIT {int(limit)}'
+        columns = ('id', 'url', 'final_url', 'status', 'content_hash', 'codec',
+                   'matched_pattern', 'verdict_status', 'verdict_method')
+        with sqlite3.connect(self.db_path) as conn:
+            for row in conn.execute(query):
+                yield dict(zip(columns, row))
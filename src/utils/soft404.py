@@ -0,0 +1,190 @@
+import random
+import sqlite3
+import string
+import time
+import logging
+import traceback
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# 在页面内计算正文和 DOM 结构的 64 位 simhash，只回传指纹
+FINGERPRINT_SCRIPT = """
+    function fnv(str, seed) {
+        var h = seed >>> 0;
+        for (var i = 0; i < str.length; i++) {
+            h ^= str.charCodeAt(i);
+            h = Math.imul(h, 16777619) >>> 0;
+        }
+        return h;
+    }
+    function hex(n) {
+        return ('00000000' + (n >>> 0).toString(16)).slice(-8);
+    }
+    function simhash(tokens) {
+        var v = [], i, bit;
+        for (i = 0; i < 64; i++) v.push(0);
+        for (i = 0; i < tokens.length; i++) {
+            var lo = fnv(tokens[i], 2166136261), hi = fnv(tokens[i], 1540483477);
+            for (bit = 0; bit < 32; bit++) {
+                v[bit] += (lo >>> bit) & 1 ? 1 : -1;
+                v[32 + bit] += (hi >>> bit) & 1 ? 1 : -1;
+            }
+        }
+        var outLo = 0, outHi = 0;
+        for (bit = 0; bit < 32; bit++) {
+            if (v[bit] > 0) outLo |= (1 << bit);
+            if (v[32 + bit] > 0) outHi |= (1 << bit);
+        }
+        return hex(outHi) + hex(outLo);
+    }
+    var body = document.body;
+    // 归一化：小写、合并空白、数字统一为 0，降低动态编号的影响
+    var text = (body ? body.innerText : '').toLowerCase().replace(/\\s+/g, ' ').replace(/[0-9]/g, '0').slice(0, 5000);
+    var textTokens = [];
+    for (var i = 0; i + 3 <= text.length; i++) textTokens.push(text.substr(i, 3));
+    var tags = body ? body.getElementsByTagName('*') : [];
+    var structTokens = [], limit = Math.min(tags.length, 3000);
+    for (var j = 0; j + 3 <= limit; j++) {
+        structTokens.push(tags[j].tagName + '>' + tags[j + 1].tagName + '>' + tags[j + 2].tagName);
+    }
+    return {
+        url: location.href,
+        textHash: simhash(textTokens),
+        structHash: simhash(structTokens),
+        textLength: text.length
+    };
+"""
+
+
+def hamming(a: str, b: str) -> int:
+    """两个十六进制 simhash 的汉明距离"""
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def random_probe_url(url: str) -> str:
+    """构造同站点下一个必然不存在的路径，尽量模仿原路径最后一段的形态"""
+    parts = urlsplit(url)
+    segments = parts.path.split('/')
+    last = segments[-1] if len(segments) > 1 else ''
+    stem, dot, ext = last.partition('.')
+    if stem.isdigit():
+        # 数字 ID 保持长度，命中同一路由的“不存在”模板
+        token = str(random.randint(1, 9)) + ''.join(random.choices(string.digits, k=max(len(stem), 8) - 1))
+    else:
+        token = ''.join(random.choices(string.ascii_lowercase + string.digits, k=16))
+    segments[-1] = token + (dot + ext if dot else '')
+    path = '/'.join(segments) if len(segments) > 1 else '/' + token
+    return f"{parts.scheme}://{parts.netloc}{path}"
+
+
+class Soft404Detector:
+    """站点级软 404 指纹缓存：内存 + SQLite 持久化，带过期时间"""
+
+    def __init__(self, db_path: str, config: Dict[str, Any] = None):
+        config = config or {}
+        self.db_path = db_path
+        self.enabled = config.get('enabled', True)
+        self.ttl = config.get('ttl_hours', 72) * 3600
+        self.max_text_distance = config.get('max_text_distance', 6)
+        self.max_struct_distance = config.get('max_struct_distance', 10)
+        self.min_text_length = config.get('min_text_length', 20)
+        # 探测失败的站点在该时间内不再探测，避免每个链接都打开一次探测标签页
+        self.failure_ttl = config.get('failure_ttl_minutes', 30) * 60
+        self._cache = {}
+        self._failures = {}  # host -> 探测失败时间
+        self.init_table()
+
+    def init_table(self):
+        """初始化指纹表"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS host_fingerprints (
+                        host TEXT PRIMARY KEY,
+                        text_hash TEXT NOT NULL,
+                        struct_hash TEXT NOT NULL,
+                        text_length INTEGER NOT NULL,
+                        probe_url TEXT,
+                        created_at REAL NOT NULL
+                    )
+                ''')
+                conn.commit()
+        except Exception as e:
+            logger.error(f"初始化指纹表失败: {str(e)}")
+            logger.error(traceback.format_exc())
+
+    def get(self, host: str) -> Optional[Dict[str, Any]]:
+        """获取未过期的站点指纹"""
+        fingerprint = self._cache.get(host)
+        if fingerprint is None:
+            try:
+                with sqlite3.connect(self.db_path) as conn:
+                    row = conn.execute('''
+                        SELECT text_hash, struct_hash, text_length, probe_url, created_at
+                        FROM host_fingerprints WHERE host = ?
+                    ''', (host,)).fetchone()
+            except Exception as e:
+                logger.error(f"读取站点指纹失败: {str(e)}")
+                return None
+            if not row:
+                return None
+            fingerprint = {
+                'textHash': row[0],
+                'structHash': row[1],
+                'textLength': row[2],
+                'url': row[3],
+                'created_at': row[4],
+            }
+            self._cache[host] = fingerprint
+
+        if time.time() - fingerprint['created_at'] > self.ttl:
+            self._cache.pop(host, None)
+            return None
+        return fingerprint
+
+    def save(self, host: str, fingerprint: Dict[str, Any]):
+        """保存站点指纹"""
+        fingerprint = dict(fingerprint, created_at=time.time())
+        self._cache[host] = fingerprint
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    INSERT INTO host_fingerprints (host, text_hash, struct_hash, text_length, probe_url, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(host) DO UPDATE SET
+                        text_hash = excluded.text_hash,
+                        struct_hash = excluded.struct_hash,
+                        text_length = excluded.text_length,
+                        probe_url = excluded.probe_url,
+                        created_at = excluded.created_at
+                ''', (host, fingerprint['textHash'], fingerprint['structHash'],
+                      fingerprint['textLength'], fingerprint.get('url'), fingerprint['created_at']))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"保存站点指纹失败: {str(e)}")
+
+    def mark_failed(self, host: str):
+        """记录一次探测失败"""
+        self._failures[host] = time.time()
+
+    def recently_failed(self, host: str) -> bool:
+        """站点最近探测失败过，失败记录过期后允许重新探测"""
+        failed_at = self._failures.get(host)
+        if failed_at is None:
+            return False
+        if time.time() - failed_at > self.failure_ttl:
+            del self._failures[host]
+            return False
+        return True
+
+    def is_soft_404(self, page: Dict[str, Any], reference: Dict[str, Any]) -> bool:
+        """页面指纹与站点“不存在”页指纹足够相似即判定为软 404"""
+        if min(page.get('textLength', 0), reference.get('textLength', 0)) < self.min_text_length:
+            # 空白页之间天然相似，不做判断
+            return False
+        text_distance = hamming(page['textHash'], reference['textHash'])
+        struct_distance = hamming(page['structHash'], reference['structHash'])
+        logger.debug(f"软404指纹距离: 正文 {text_distance}, 结构 {struct_distance}")
+        return text_distance <= self.max_text_distance and struct_distance <= self.max_struct_distance
@@ -0,0 +1,113 @@
+import re
+import base64
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+
+# 搜索引擎跳转链接：域名 -> (路径前缀, 目标地址参数名)
+# 百度 /link?url= 和搜狗 /link?url= 是加密参数，无法静态还原，需要 HTTP 解析
+REDIRECTORS = {
+    'so.toutiao.com': ('', 'url'),
+    'www.toutiao.com': ('', 'url'),
+    'www.so.com': ('/link', 'url'),
+    'so.com': ('/link', 'url'),
+    'm.so.com': ('/link', 'url'),
+}
+
+# 常见追踪参数，不影响页面内容
+TRACKING_PARAMS = {
+    'spm', 'gclid', 'fbclid', 'msclkid', 'yclid', 'dclid', 'igshid',
+    '_hsenc', '_hsmid', 'mc_cid', 'mc_eid', 'share_token', 'share_source',
+}
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def _decode_bing_target(value: str) -> str:
+    """必应 /ck/a 的 u 参数为 a1 + urlsafe base64 编码的目标地址"""
+    if not value or not value.startswith('a1'):
+        return None
+    encoded = value[2:]
+    try:
+        decoded = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode('utf-8')
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return decoded if decoded.startswith(('http://', 'https://')) else None
+
+
+def unwrap_redirector(url: str) -> str:
+    """还原搜索引擎跳转链接中的真实目标地址，无法静态还原时原样返回"""
+    if not url:
+        return url
+    for _ in range(3):  # 处理多层嵌套跳转
+        try:
+            parts = urlsplit(url)
+        except ValueError:
+            return url
+        host = (parts.hostname or '').lower()
+        params = dict(parse_qsl(parts.query, keep_blank_values=True))
+
+        target = None
+        if host in REDIRECTORS:
+            prefix, param = REDIRECTORS[host]
+            if parts.path.startswith(prefix):
+                target = params.get(param)
+        elif host.endswith('bing.com') and parts.path.startswith('/ck/a'):
+            target = _decode_bing_target(params.get('u'))
+
+        if not target:
+            return url
+        target = target.strip()
+        # 部分跳转参数经过了双重编码
+        if not target.startswith(('http://', 'https://')):
+            target = unquote(target)
+        if not target.startswith(('http://', 'https://')):
+            return url
+        url = target
+    return url
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url: str) -> str:
+    """规范化链接：统一协议和域名大小写、去掉默认端口、片段、追踪参数和末尾斜杠，参数排序"""
+    if not url:
+        return url
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return url
+
+    host = (parts.hostname or '').lower().rstrip('.')
+    netloc = host
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{host}:{port}"
+
+    path = re.sub(r'%[0-9a-fA-F]{2}', lambda m: m.group(0).upper(), parts.path or '/')
+    path = re.sub(r'/{2,}', '/', path)
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking_param(k)]
+    query.sort()
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+def canonicalize(url: str) -> str:
+    """还原跳转并规范化"""
+    return normalize_url(unwrap_redirector(url))
+
+
+def url_key(url: str) -> str:
+    """链接的稳定哈希键，用于缓存和去重；http 与 https 视为同一目标"""
+    canonical = canonicalize(url)
+    canonical = canonical.split('://', 1)[-1] if canonical.startswith(('http://', 'https://')) else canonical
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
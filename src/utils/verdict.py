@@ -0,0 +1,108 @@
+from typing import Dict, Any, Optional
+
+# 判定结果状态
+EXPIRED = 'expired'
+NORMAL = 'normal'
+TIMEOUT = 'timeout'
+THROTTLED = 'throttled'  # 站点持续限流，放弃本次检查
+
+# 默认的泛化过期文本：正常页面中也常出现，单独命中时置信度低
+DEFAULT_GENERIC_TEXTS = ['404', 'nginx', 'Not Found', 'forbidden', '很抱歉']
+
+# 各判定依据的默认置信度
+DEFAULT_CONFIDENCE = {
+    'host_dead': 0.95,        # DNS 不存在、拒绝连接、证书错误
+    'host_parked': 0.9,       # 停放域名页
+    'http_gone': 0.95,        # HTTP 404/410
+    'http_error': 0.7,        # 其他 4xx/5xx
+    'http_ok': 0.6,           # HTTP 正文未命中过期模式（未执行脚本）
+    'binary_ok': 0.9,         # 非网页资源正常返回
+    'text': 0.9,              # 命中具体的过期文本
+    'generic_text': 0.4,      # 只命中泛化文本
+    'site_root_redirect': 0.9,
+    'soft404': 0.75,
+    'normal': 0.8,            # 浏览器渲染后未发现过期迹象
+    'error': 0.0,             # 检查出错，结论不可信
+}
+
+
+class Verdict:
+    """链接检查结论：状态、命中的模式、跳转目标、置信度和判定方法；是否过期用 expired 判断，不用布尔值"""
+
+    def __init__(self, status: str, method: str, confidence: float = 1.0,
+                 matched_pattern: Optional[str] = None, redirect_target: Optional[str] = None):
+        self.status = status
+        self.method = method
+        self.confidence = confidence
+        self.matched_pattern = matched_pattern
+        self.redirect_target = redirect_target
+
+    @property
+    def expired(self) -> bool:
+        return self.status == EXPIRED
+
+    def __repr__(self) -> str:
+        return (f"Verdict({self.status}, method={self.method}, confidence={self.confidence:.2f}, "
+                f"pattern={self.matched_pattern!r}, redirect={self.redirect_target!r})")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'check_status': self.status,
+            'check_method': self.method,
+            'confidence': self.confidence,
+            'matched_pattern': self.matched_pattern,
+            'redirect_target': self.redirect_target,
+        }
+
+
+def merge(first: Verdict, second: Optional[Verdict]) -> Verdict:
+    """
+    合并两种方法的结论：一致且依据独立时提高置信度，命中同一文本时只取较高的置信度；
+    不一致时取置信度更高的一方
+    """
+    if second is None or second.status == TIMEOUT:
+        return first
+    if first.status == TIMEOUT:
+        return second
+    method = f"{first.method}+{second.method}"
+    if first.status == second.status:
+        same_evidence = (first.matched_pattern is not None
+                         and (first.matched_pattern or '').lower() == (second.matched_pattern or '').lower())
+        if same_evidence:
+            confidence = max(first.confidence, second.confidence)
+        else:
+            confidence = 1 - (1 - first.confidence) * (1 - second.confidence)
+        return Verdict(first.status, method, confidence,
+                       first.matched_pattern or second.matched_pattern,
+                       first.redirect_target or second.redirect_target)
+    winner, loser = (second, first) if second.confidence > first.confidence else (first, second)
+    # 结论冲突时置信度取两者之差，仍然存疑
+    return Verdict(winner.status, method, winner.confidence - loser.confidence,
+                   winner.matched_pattern, winner.redirect_target)
+
+
+class VerdictScorer:
+    """按配置为判定依据给出置信度，并决定是否需要复查"""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        config = config or {}
+        self.confidence = dict(DEFAULT_CONFIDENCE)
+        self.confidence.update(config.get('confidence') or {})
+        self.generic_texts = {text.lower() for text in config.get('generic_texts', DEFAULT_GENERIC_TEXTS)}
+        self.recheck_enabled = config.get('recheck', True)
+        self.recheck_threshold = config.get('recheck_threshold', 0.6)
+        self.submit_threshold = config.get('submit_threshold', 0.6)
+
+    def make(self, status: str, method: str, reason: str, **kwargs) -> Verdict:
+        return Verdict(status, method, self.confidence[reason], **kwargs)
+
+    def text_reason(self, pattern: str) -> str:
+        """泛化文本（如 404、nginx）单独命中时置信度低"""
+        return 'generic_text' if (pattern or '').lower() in self.generic_texts else 'text'
+
+    def needs_recheck(self, verdict: Verdict) -> bool:
+        return self.recheck_enabled and (verdict.status == TIMEOUT or verdict.confidence < self.recheck_threshold)
+
+    def should_submit(self, verdict: Verdict) -> bool:
+        """过期且置信度达到阈值才提交反馈"""
+        return verdict.expired and verdict.confidence >= self.submit_threshold
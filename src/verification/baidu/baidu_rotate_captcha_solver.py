@@ -1,45 +1,177 @@
-import time
+import base64
+import cv2
+import requests
 from .rotate_image_classifier.inference import *
+from .drag_calibration import DragCalibrator
+from .captcha_watch import wait_for_captcha_state
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
-def solve_rotation_captcha(driver, max_retries=50):
+# 把已加载的验证码图片画到 canvas 上导出；跨域且未开启 CORS 时 canvas 被污染，返回 null
+CANVAS_EXPORT_SCRIPT = """
+const img = arguments[0];
+if (!img || !img.complete || !img.naturalWidth) return null;
+try {
+    const canvas = document.createElement('canvas');
+    canvas.width = img.naturalWidth;
+    canvas.height = img.naturalHeight;
+    canvas.getContext('2d').drawImage(img, 0, 0);
+    return canvas.toDataURL('image/png');
+} catch (e) {
+    return null;
+}
+"""
+
+
+def _from_canvas(driver, img_element):
+    data_url = driver.execute_script(CANVAS_EXPORT_SCRIPT, img_element)
+    if not data_url or ',' not in data_url:
+        return None
+    return decode_image(base64.b64decode(data_url.split(',', 1)[1]))
+
+
+def _from_resource_cache(driver, img_url):
+    """通过 CDP 读取页面已经下载的图片资源"""
+    if not img_url or not hasattr(driver, 'execute_cdp_cmd'):
+        return None
+    frame_id = driver.execute_cdp_cmd('Page.getFrameTree', {})['frameTree']['frame']['id']
+    resource = driver.execute_cdp_cmd('Page.getResourceContent', {'frameId': frame_id, 'url': img_url})
+    content = resource.get('content') or ''
+    data = base64.b64decode(content) if resource.get('base64Encoded') else content.encode('latin-1')
+    return decode_image(data)
+
+
+def _from_screenshot(driver, img_element):
+    return decode_image(img_element.screenshot_as_png)
+
+
+def read_captcha_image(driver, img_element, img_url):
+    """
+    从浏览器中取出当前显示的验证码图片，依次尝试 canvas 导出、CDP 资源缓存和元素截图，
+    不再重新下载；都失败时返回 None
+    """
+    sources = (
+        ('canvas', lambda: _from_canvas(driver, img_element)),
+        ('资源缓存', lambda: _from_resource_cache(driver, img_url)),
+        ('元素截图', lambda: _from_screenshot(driver, img_element)),
+    )
+    for name, read in sources:
+        try:
+            img = read()
+        except Exception as e:
+            print(f"从{name}读取验证码图片失败: {e}")
+            continue
+        if img is not None:
+            return img
+    return None
+
+
+IMAGE_LOADED_SCRIPT = """
+const img = document.querySelector('img.vcode-spin-img');
+return !!img && img.complete && img.naturalWidth > 0;
+"""
+
+
+# 验证码的“换一张”按钮
+REFRESH_XPATH = ("//*[contains(@class, 'vcode-spin')]//*[contains(text(), '换一张') or contains(@class, 'refresh')]"
+                 " | //*[contains(@class, 'vcode-refresh')]")
+
+
+def refresh_captcha(driver, img_url):
+    """点击“换一张”并等待图片更新，返回是否成功换图"""
+    try:
+        driver.find_element(By.XPATH, REFRESH_XPATH).click()
+        WebDriverWait(driver, 3).until(
+            lambda d: d.find_element(By.CSS_SELECTOR, "img.vcode-spin-img").get_attribute("src") != img_url
+        )
+        return True
+    except Exception as e:
+        print(f"刷新验证码失败: {e}")
+        return False
+
+
+def predict_via_service(service, image, tta):
+    """
+    调用本机共享推理服务，返回 (角度, 置信度)；服务未配置或不可用时返回 None
+    """
+    if not service or not service.get('enabled') or image is None:
+        return None
+    ok, encoded = cv2.imencode('.png', image)
+    if not ok:
+        return None
+    params = {
+        'offsets': ','.join(str(o) for o in tta.get('offsets', TTA_OFFSETS)),
+        'flip': '1' if tta.get('flip', TTA_FLIP) else '0',
+        'window': tta.get('window', CONFIDENCE_WINDOW),
+    }
+    try:
+        response = requests.post(f"{service.get('url', 'http://127.0.0.1:8765').rstrip('/')}/angle",
+                                 params=params, data=encoded.tobytes(),
+                                 headers={'Content-Type': 'image/png'}, timeout=service.get('timeout', 5))
+        response.raise_for_status()
+        result = response.json()
+        return int(result['angle']), float(result['confidence'])
+    except Exception as e:
+        print(f"推理服务不可用，改为本进程推理: {e}")
+        return None
+
+
+def _record_attempt(cache, calibrator, attempt, success):
+    """把上一次拖动的结果记入角度缓存和拖动校准"""
+    if attempt is None:
+        return
+    image, angle, entry_id, (fraction, calibrated) = attempt
+    calibrator.record(angle, fraction, calibrated, success)
+    if cache is None or image is None:
+        return
+    if success:
+        cache.record_success(image, angle, entry_id)
+    elif entry_id is not None:
+        cache.record_failure(entry_id)
+
+
+def solve_rotation_captcha(driver, max_retries=50, min_confidence=0.0, max_refresh=3, tta=None, cache=None,
+                           service=None, calibrator=None):
     """
     解决百度旋转验证码，如果失败会自动重试
     
     Args:
         driver: Selenium WebDriver 实例
         max_retries: 最大重试次数，默认20次
+        min_confidence: 预测置信度低于该值时换一张图而不是拖动，0 表示总是拖动
+        max_refresh: 连续换图的次数上限，超过后按当前预测拖动
+        tta: 测试时增强参数 {'offsets': [...], 'flip': bool, 'window': int}
+        cache: CaptchaAngleCache，命中时跳过模型推理，验证通过后记录角度
+        service: 共享推理服务配置 {'enabled': bool, 'url': str, 'timeout': 秒}，不可用时在本进程推理
+        calibrator: DragCalibrator，负责角度到拖动距离的换算和拖动轨迹，默认按线性映射且不持久化
         
     Returns:
         bool: 验证是否成功
     """
+    tta = tta or {}
+    calibrator = calibrator or DragCalibrator()
     retry_count = 0
+    refresh_count = 0
+    last_attempt = None  # 上一次拖动的 (图片, 角度, 缓存条目 id, (拖动比例, 是否使用拟合映射))
     
     while retry_count < max_retries:
         try:
-            # 等待验证码加载
-            time.sleep(1)
-            
-            # 检查验证码是否还存在
+            # 检查验证码是否还存在：页面内的监听脚本记录了状态，短暂等待以防验证码正在重新渲染
+            if not wait_for_captcha_state(driver, True, timeout=1):
+                print("验证成功，验证码已消失")
+                _record_attempt(cache, calibrator, last_attempt, True)
+                return True
+
+            # 等待验证码图片加载完成
             try:
-                # 使用短超时等待验证码文本元素
-                verification_text = WebDriverWait(driver, 4).until(
-                    EC.presence_of_element_located((By.XPATH, "//*[contains(text(), '请完成下方验证后继续操作')]"))
-                )
-                
-                # 如果验证码文本不可见，说明已经验证成功
-                if not verification_text.is_displayed():
-                    print("验证成功，验证码已消失")
-                    return True
-                    
+                WebDriverWait(driver, 3, poll_frequency=0.1).until(lambda d: d.execute_script(IMAGE_LOADED_SCRIPT))
             except TimeoutException:
-                # 如果找不到验证码文本，可能已经验证成功
-                print("验证成功，验证码文本已消失")
-                return True
+                pass
+
+            # 验证码还在，上一次拖动没有通过
+            _record_attempt(cache, calibrator, last_attempt, False)
+            last_attempt = None
             
             # 获取验证码图片的URL
             img_element = driver.find_element(By.CSS_SELECTOR, "img.vcode-spin-img")
@@ -50,47 +182,49 @@ def solve_rotation_captcha(driver, max_retries=50):
                 retry_count += 1
                 continue
                 
-            # 获取图片需要旋转的角度
-            angle = getAngle(img_url)
-       
-            print(f"重试 {retry_count + 1}/{max_retries} - 获取到的旋转角度: {angle}")
+            # 获取图片需要旋转的角度：优先使用浏览器中已显示的图片，取不到时再下载
+            captcha_image = read_captcha_image(driver, img_element, img_url)
+            hit = cache.lookup(captcha_image) if cache is not None and captcha_image is not None else None
+            if hit is not None:
+                # 见过的底图，直接用缓存换算出的角度，不做推理
+                angle, entry_id = hit
+                confidence = 1.0
+                print(f"重试 {retry_count + 1}/{max_retries} - 验证码角度缓存命中: {angle}")
+            else:
+                entry_id = None
+                prediction = predict_via_service(service, captcha_image, tta)
+                if prediction is None:
+                    prediction = predict_angle(
+                        captcha_image if captcha_image is not None else img_url,
+                        offsets=tuple(tta.get('offsets', TTA_OFFSETS)),
+                        flip=tta.get('flip', TTA_FLIP),
+                        window=tta.get('window', CONFIDENCE_WINDOW),
+                    )
+                angle, confidence = prediction
+                print(f"重试 {retry_count + 1}/{max_retries} - 获取到的旋转角度: {angle}，置信度 {confidence:.2f}")
+
+            # 没把握时换一张图，省下一次拖动和等待
+            if confidence < min_confidence and refresh_count < max_refresh:
+                refresh_count += 1
+                print(f"置信度低于 {min_confidence}，换一张验证码（{refresh_count}/{max_refresh}）")
+                if refresh_captcha(driver, img_url):
+                    retry_count += 1
+                    continue
+            refresh_count = 0
             
-            # 计算需要拖动的距离
-            # 找到滑块和滑动区域元素
+            # 按校准后的映射换算拖动距离（图片需要逆时针旋转，滑块向右移动），分多步拖动
             slider = driver.find_element(By.CSS_SELECTOR, "div.vcode-spin-button")
-            slider_container = driver.find_element(By.CSS_SELECTOR, "div.vcode-spin-bottom")
-            
-            # 获取滑块宽度和滑动区域的总宽度
-            slider_width = slider.size['width']
-            container_width = slider_container.size['width']
-            
-            # 可拖动的总长度 = 滑动区域宽度 - 滑块宽度
-            total_drag_width = container_width - slider_width
-            
-            # 根据角度计算拖动距离：图片需要逆时针旋转，因此滑块需要向右移动
-            # 计算需要拖动的距离：360度对应总拖动距离，角度对应的距离 = 角度/360 * 总距离
-            drag_distance = (angle / 360) * total_drag_width
-            
-            # 创建一个动作链
-            actions = ActionChains(driver)
-            
-            # 拖动滑块
-            actions.click_and_hold(slider)
-            actions.move_by_offset(drag_distance, 0)
-            actions.release()
-            actions.perform()
-            
-            # 等待验证结果
-            time.sleep(2)
+            drag = calibrator.drag(driver, slider, angle)
+            if drag is None:
+                print(f"无法获取滑块尺寸，重试次数: {retry_count + 1}/{max_retries}")
+                retry_count += 1
+                continue
+            last_attempt = (captcha_image, angle, entry_id, drag)
             
-            # 检查验证是否成功（验证码文本消失）
-            try:
-                verification_text = driver.find_element(By.XPATH, "//*[contains(text(), '请完成下方验证后继续操作')]")
-                if not verification_text.is_displayed():
-                    print("验证成功，验证码已消失")
-                    return True
-            except NoSuchElementException:
-                print("验证成功，验证码文本已消失")
+            # 等待验证结果：验证码一消失就返回，最多等 2 秒
+            if wait_for_captcha_state(driver, False, timeout=2):
+                print("验证成功，验证码已消失")
+                _record_attempt(cache, calibrator, last_attempt, True)
                 return True
                 
             # 如果执行到这里，说明验证可能失败，检查是否有新的验证码图片
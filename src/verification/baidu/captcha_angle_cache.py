@@ -0,0 +1,195 @@
+import time
+import sqlite3
+import logging
+import traceback
+from typing import Dict, Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ANGLE_BINS = 360  # 极坐标展开的角度分辨率，1 度一格
+HASH_COEFFS = 8   # 每个圆环取的低频傅里叶系数个数
+
+
+def polar_profile(img: np.ndarray, rings: int = 8, inner: float = 0.2, outer: float = 0.95) -> np.ndarray:
+    """
+    把圆形验证码图按极坐标展开，得到 (rings, 360) 的角度剖面；每个圆环减均值除标准差。
+    图片旋转对应剖面沿角度方向的循环平移。
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    height, width = gray.shape[:2]
+    size = min(width, height)
+    top, left = (height - size) // 2, (width - size) // 2
+    gray = gray[top:top + size, left:left + size].astype(np.float32)
+
+    radius = size / 2
+    samples = max(rings * 4, 32)
+    # warpPolar 的行对应角度，列对应半径
+    polar = cv2.warpPolar(gray, (samples, ANGLE_BINS), (radius, radius), radius, cv2.WARP_POLAR_LINEAR)
+    start, stop = int(samples * inner), int(samples * outer)
+    bands = np.array_split(polar[:, start:stop], rings, axis=1)
+    profile = np.stack([band.mean(axis=1) for band in bands])
+    profile -= profile.mean(axis=1, keepdims=True)
+    profile /= profile.std(axis=1, keepdims=True) + 1e-6
+    return profile.astype(np.float32)
+
+
+def rotation_hash(profile: np.ndarray) -> int:
+    """
+    旋转不变的感知哈希：各圆环低频傅里叶系数的幅值（不受循环平移影响）与中位数比较，得到 64 位整数
+    """
+    magnitude = np.abs(np.fft.rfft(profile, axis=1))[:, 1:HASH_COEFFS + 1].ravel()
+    bits = magnitude > np.median(magnitude)
+    value = 0
+    for bit in bits[:64]:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def best_shift(current: np.ndarray, upright: np.ndarray) -> Tuple[int, float]:
+    """
+    循环互相关求 current 相对 upright 的平移，返回 (平移格数, 相关系数 -1~1)
+    """
+    corr = np.fft.irfft(np.fft.rfft(current, axis=1) * np.conj(np.fft.rfft(upright, axis=1)),
+                        n=ANGLE_BINS, axis=1).mean(axis=0) / ANGLE_BINS
+    shift = int(np.argmax(corr))
+    return shift, float(corr[shift])
+
+
+class CaptchaAngleCache:
+    """按旋转不变哈希缓存验证通过的角度；命中时通过剖面对齐换算当前图片的角度"""
+
+    def __init__(self, db_path: str, config: Dict[str, Any] = None):
+        config = config or {}
+        self.db_path = db_path
+        self.enabled = config.get('enabled', True)
+        self.max_distance = config.get('max_distance', 6)      # 哈希允许的汉明距离
+        self.min_score = config.get('min_score', 0.8)          # 剖面对齐的最低相关系数
+        self.rings = config.get('rings', 8)
+        self._entries = {}  # id -> {'hash', 'profile', 'angle', 'successes', 'failures'}
+        if self.enabled:
+            self.init_table()
+            self.load()
+
+    def init_table(self):
+        """初始化验证码角度缓存表"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS captcha_angles (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        phash TEXT NOT NULL,
+                        profile BLOB NOT NULL,
+                        angle INTEGER NOT NULL,
+                        successes INTEGER DEFAULT 1,
+                        failures INTEGER DEFAULT 0,
+                        created_at REAL NOT NULL,
+                        updated_at REAL NOT NULL
+                    )
+                ''')
+                conn.commit()
+        except Exception as e:
+            logger.error(f"初始化验证码角度缓存表失败: {str(e)}")
+            logger.error(traceback.format_exc())
+
+    def load(self):
+        """验证码图库有限，全部读入内存按汉明距离查找"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute(
+                    "SELECT id, phash, profile, angle, successes, failures FROM captcha_angles").fetchall()
+        except Exception as e:
+            logger.error(f"读取验证码角度缓存失败: {str(e)}")
+            return
+        for entry_id, phash, profile, angle, successes, failures in rows:
+            self._entries[entry_id] = {
+                'hash': int(phash, 16),
+                'profile': np.frombuffer(profile, dtype=np.float16).astype(np.float32).reshape(-1, ANGLE_BINS),
+                'angle': angle,
+                'successes': successes,
+                'failures': failures,
+            }
+        logger.info(f"已加载 {len(self._entries)} 条验证码角度缓存")
+
+    def _match(self, profile: np.ndarray):
+        """返回 (条目 id, 平移格数, 相关系数)，未命中返回 None"""
+        phash = rotation_hash(profile)
+        best = None
+        for entry_id, entry in self._entries.items():
+            if bin(entry['hash'] ^ phash).count('1') > self.max_distance:
+                continue
+            if entry['profile'].shape != profile.shape:
+                continue
+            shift, score = best_shift(profile, entry['profile'])
+            if score >= self.min_score and (best is None or score > best[2]):
+                best = (entry_id, shift, score)
+        return best
+
+    def lookup(self, img: np.ndarray) -> Optional[Tuple[int, int]]:
+        """
+        查找缓存，命中时返回 (当前图片应旋转的角度, 条目 id)
+        """
+        if not self.enabled or img is None or not self._entries:
+            return None
+        try:
+            match = self._match(polar_profile(img, self.rings))
+        except Exception as e:
+            logger.error(f"查找验证码角度缓存失败: {str(e)}")
+            return None
+        if match is None:
+            return None
+        entry_id, shift, score = match
+        # 存的是转正后的剖面，当前剖面相对它平移 -角度
+        angle = (-shift) % ANGLE_BINS
+        logger.info(f"验证码角度缓存命中: 条目 {entry_id}，角度 {angle}，相关系数 {score:.2f}")
+        return angle, entry_id
+
+    def record_success(self, img: np.ndarray, angle: int, entry_id: int = None):
+        """验证通过后记录：命中的条目累加成功次数，新图片存入转正后的剖面"""
+        if not self.enabled or img is None:
+            return
+        now = time.time()
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                if entry_id is not None and entry_id in self._entries:
+                    conn.execute("UPDATE captcha_angles SET successes = successes + 1, updated_at = ? WHERE id = ?",
+                                 (now, entry_id))
+                    self._entries[entry_id]['successes'] += 1
+                    return
+                profile = polar_profile(img, self.rings)
+                if self._match(profile) is not None:
+                    return
+                # 把当前剖面按通过的角度转正后保存，之后同一底图任意旋转都能对齐
+                upright = np.roll(profile, int(angle), axis=1)
+                phash = rotation_hash(upright)
+                cursor = conn.execute('''
+                    INSERT INTO captcha_angles (phash, profile, angle, successes, failures, created_at, updated_at)
+                    VALUES (?, ?, ?, 1, 0, ?, ?)
+                ''', (f"{phash:016x}", upright.astype(np.float16).tobytes(), int(angle), now, now))
+                self._entries[cursor.lastrowid] = {
+                    'hash': phash, 'profile': upright, 'angle': int(angle), 'successes': 1, 'failures': 0,
+                }
+                conn.commit()
+        except Exception as e:
+            logger.error(f"保存验证码角度缓存失败: {str(e)}")
+
+    def record_failure(self, entry_id: int):
+        """缓存给出的角度没有通过；失败次数超过成功次数时删除该条目"""
+        if not self.enabled or entry_id not in self._entries:
+            return
+        entry = self._entries[entry_id]
+        entry['failures'] += 1
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                if entry['failures'] > entry['successes']:
+                    conn.execute("DELETE FROM captcha_angles WHERE id = ?", (entry_id,))
+                    del self._entries[entry_id]
+                    logger.info(f"删除不可靠的验证码角度缓存: 条目 {entry_id}")
+                else:
+                    conn.execute("UPDATE captcha_angles SET failures = failures + 1, updated_at = ? WHERE id = ?",
+                                 (time.time(), entry_id))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"更新验证码角度缓存失败: {str(e)}")
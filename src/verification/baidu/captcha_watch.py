@@ -0,0 +1,114 @@
+import time
+import logging
+from typing import Optional
+
+from selenium.common.exceptions import JavascriptException, TimeoutException
+
+logger = logging.getLogger(__name__)
+
+VERIFICATION_TEXT = '请完成下方验证后继续操作'
+DIALOG_SELECTOR = 'div.passMod_dialog-container'
+CAPTCHA_SELECTORS = 'img.vcode-spin-img, ' + DIALOG_SELECTOR
+
+# 页面内只装一次的 MutationObserver：节点增删或 style/class 变化时（合并到 50ms 一次）重新判断验证码是否可见，
+# 结果写入 window.__captchaWatch.present，并通知等待中的回调。
+# 只查验证码元素，提示文字只在验证弹窗内查找，不读取整页文本
+INSTALL_SCRIPT = """
+if (!window.__captchaWatch) {
+    const watch = window.__captchaWatch = {present: false, changedAt: 0, changes: 0, listeners: new Set()};
+    const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    const detect = () => {
+        for (const el of document.querySelectorAll('%(selectors)s')) {
+            if (visible(el)) return true;
+        }
+        const dialog = document.querySelector('%(dialog)s');
+        return !!dialog && (dialog.textContent || '').includes('%(text)s');
+    };
+    const update = () => {
+        watch.scheduled = false;
+        const present = detect();
+        if (present === watch.present) return;
+        watch.present = present;
+        watch.changedAt = Date.now();
+        watch.changes += 1;
+        watch.listeners.forEach(listener => listener(present));
+    };
+    new MutationObserver(() => {
+        if (!watch.scheduled) {
+            watch.scheduled = true;
+            setTimeout(update, 50);
+        }
+    }).observe(document, {childList: true, subtree: true, attributes: true, attributeFilter: ['style', 'class']});
+    update();
+}
+""" % {'selectors': CAPTCHA_SELECTORS, 'dialog': DIALOG_SELECTOR, 'text': VERIFICATION_TEXT}
+
+# 通过 CDP 注册到新页面时只在百度的页面上安装，检查链接时打开的其他站点不受影响
+NEW_DOCUMENT_SCRIPT = "if (/(^|\\.)baidu\\.com$/.test(location.hostname)) {\n" + INSTALL_SCRIPT + "}\n"
+
+STATE_SCRIPT = INSTALL_SCRIPT + "return window.__captchaWatch.present;"
+
+# 异步等待状态变为期望值，最多等 waitMs 毫秒，返回当时的状态
+WAIT_SCRIPT = INSTALL_SCRIPT + """
+const [want, waitMs, done] = arguments;
+const watch = window.__captchaWatch;
+if (watch.present === want) return done(watch.present);
+const listener = present => {
+    if (present !== want) return;
+    clearTimeout(timer);
+    watch.listeners.delete(listener);
+    done(present);
+};
+const timer = setTimeout(() => {
+    watch.listeners.delete(listener);
+    done(watch.present);
+}, waitMs);
+watch.listeners.add(listener);
+"""
+
+# 单次异步脚本的最长等待，需小于 WebDriver 默认的 30 秒脚本超时
+MAX_SCRIPT_WAIT = 10
+
+_registered_sessions = set()
+
+
+def install_captcha_watch(driver):
+    """通过 CDP 注册到之后打开的百度页面，每个浏览器会话只注册一次；不支持 CDP 或其他页面由查询脚本按需注入"""
+    if driver.session_id in _registered_sessions or not hasattr(driver, 'execute_cdp_cmd'):
+        return
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': NEW_DOCUMENT_SCRIPT})
+        _registered_sessions.add(driver.session_id)
+    except Exception as e:
+        logger.warning(f"注册验证码监听脚本失败，改为按需注入: {str(e)}")
+
+
+def captcha_state(driver) -> bool:
+    """当前页面是否显示验证码"""
+    install_captcha_watch(driver)
+    return bool(driver.execute_script(STATE_SCRIPT))
+
+
+def wait_for_captcha_state(driver, present: bool, timeout: float) -> bool:
+    """
+    等待验证码出现（present=True）或消失（present=False），页面内状态一变化就返回。
+
+    Returns:
+        bool: 超时前是否达到期望状态
+    """
+    install_captcha_watch(driver)
+    deadline = time.time() + timeout
+    while True:
+        remaining = deadline - time.time()
+        wait_ms = int(max(0.0, min(remaining, MAX_SCRIPT_WAIT)) * 1000)
+        state: Optional[bool] = None
+        try:
+            state = bool(driver.execute_async_script(WAIT_SCRIPT, present, wait_ms))
+        except (JavascriptException, TimeoutException) as e:
+            # 等待期间页面跳转会中断脚本，在新页面上重新等待
+            logger.debug(f"等待验证码状态时脚本被中断: {str(e)}")
+            time.sleep(0.1)
+        if state == present:
+            return True
+        if time.time() >= deadline:
+            return False
@@ -0,0 +1,190 @@
+import time
+import random
+import sqlite3
+import logging
+import traceback
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+from selenium.webdriver.common.action_chains import ActionChains
+
+logger = logging.getLogger(__name__)
+
+# 一次往返取回滑块和滑槽的宽度
+GEOMETRY_SCRIPT = """
+const slider = document.querySelector('div.vcode-spin-button');
+const track = document.querySelector('div.vcode-spin-bottom');
+if (!slider || !track) return null;
+return {slider: slider.getBoundingClientRect().width, track: track.getBoundingClientRect().width};
+"""
+
+
+def ease_out_cubic(t: float) -> float:
+    return 1 - (1 - t) ** 3
+
+
+class DragCalibrator:
+    """
+    学习“角度 → 滑块拖动比例”的映射，缓存滑块几何尺寸，并按缓动轨迹分多步拖动。
+
+    拖动比例为拖动距离 / 可拖动总长度；默认按 角度/360 线性映射。每次拖动在映射结果上加一个小的随机偏移并记录
+    实际比例，验证通过的样本足够后用多项式拟合“角度 → 通过时的比例”，失败样本用来检验拟合是否有效。
+    """
+
+    def __init__(self, db_path: Optional[str] = None, config: Dict[str, Any] = None):
+        config = config or {}
+        self.db_path = db_path
+        self.enabled = config.get('enabled', True)
+        self.min_samples = config.get('min_samples', 20)   # 拟合所需的最少成功样本
+        self.max_samples = config.get('max_samples', 500)  # 参与拟合的最近样本数
+        self.degree = config.get('degree', 1)
+        # 拟合映射的单次成功率低于默认映射超过该值时停用拟合
+        self.margin = config.get('margin', 0.1)
+        self.steps = config.get('steps', 15)
+        self.step_ms = config.get('step_ms', 15)
+        # 探索偏移：拖动比例在 ±explore 内随机偏移，样本才能反映哪个比例能通过；不记录样本时不偏移
+        self.explore = config.get('explore', 0.02) if self.db_path and self.enabled else 0.0
+        self._geometry = {}  # 窗口尺寸 -> (滑块宽度, 可拖动总长度)
+        self._coeffs = None
+        self._stats = {True: [0, 0], False: [0, 0]}  # 是否使用拟合 -> [成功, 尝试]
+        if self.db_path and self.enabled:
+            self.init_table()
+            self.refit()
+
+    def init_table(self):
+        """初始化拖动样本表"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS captcha_drag_samples (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        angle REAL NOT NULL,
+                        fraction REAL NOT NULL,
+                        success INTEGER NOT NULL,
+                        calibrated INTEGER NOT NULL,
+                        observed_at REAL NOT NULL
+                    )
+                ''')
+                conn.commit()
+        except Exception as e:
+            logger.error(f"初始化拖动样本表失败: {str(e)}")
+            logger.error(traceback.format_exc())
+
+    def refit(self):
+        """用最近的样本重新拟合映射并统计两种映射的成功率"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute(
+                    "SELECT angle, fraction, success, calibrated FROM captcha_drag_samples ORDER BY id DESC LIMIT ?",
+                    (self.max_samples,)).fetchall()
+        except Exception as e:
+            logger.error(f"读取拖动样本失败: {str(e)}")
+            return
+
+        self._stats = {True: [0, 0], False: [0, 0]}
+        for _, _, success, calibrated in rows:
+            stat = self._stats[bool(calibrated)]
+            stat[0] += success
+            stat[1] += 1
+
+        successes = [(angle, fraction) for angle, fraction, success, _ in rows if success]
+        if len(successes) < max(self.min_samples, self.degree + 1):
+            self._coeffs = None
+            return
+        angles, fractions = np.array(successes, dtype=np.float64).T
+        coeffs = np.polyfit(angles / 360, fractions, self.degree)
+
+        # 成功样本残差的 90 分位作为可通过范围；范围内的通过率不高于整体通过率时，拟合没有学到东西，不采用
+        residuals = np.abs(fractions - np.polyval(coeffs, angles / 360))
+        band = max(float(np.percentile(residuals, 90)), 1e-3)
+        inside_successes = int((residuals <= band).sum())
+        failures = [(angle, fraction) for angle, fraction, success, _ in rows if not success]
+        inside_failures = 0
+        if failures:
+            failed_angles, failed_fractions = np.array(failures, dtype=np.float64).T
+            inside_failures = int((np.abs(failed_fractions - np.polyval(coeffs, failed_angles / 360)) <= band).sum())
+        inside_rate = inside_successes / (inside_successes + inside_failures)
+        overall_rate = len(successes) / len(rows)
+        if inside_rate < overall_rate:
+            logger.info(f"拖动映射拟合无效: 范围内通过率 {inside_rate:.2f} 低于整体 {overall_rate:.2f}")
+            self._coeffs = None
+            return
+        self._coeffs = coeffs
+        logger.info(f"拖动映射已重新拟合: {len(successes)} 个成功样本，范围 ±{band:.3f}，"
+                    f"范围内通过率 {inside_rate:.2f}，系数 {np.round(coeffs, 4).tolist()}")
+
+    def _success_rate(self, calibrated: bool) -> Optional[float]:
+        successes, attempts = self._stats[calibrated]
+        return successes / attempts if attempts >= self.min_samples else None
+
+    def use_fit(self) -> bool:
+        """有拟合结果，且拟合映射的实际成功率不明显低于默认映射时才使用"""
+        if not self.enabled or self._coeffs is None:
+            return False
+        fitted, default = self._success_rate(True), self._success_rate(False)
+        return fitted is None or default is None or fitted >= default - self.margin
+
+    def fraction_for(self, angle: float) -> Tuple[float, bool]:
+        """返回 (加上探索偏移后的拖动比例, 是否使用拟合映射)"""
+        calibrated = self.use_fit()
+        fraction = np.polyval(self._coeffs, angle / 360) if calibrated else angle / 360
+        if self.explore:
+            fraction += random.uniform(-self.explore, self.explore)
+        return float(np.clip(fraction, 0.0, 1.0)), calibrated
+
+    def geometry(self, driver) -> Optional[Tuple[float, float]]:
+        """(滑块宽度, 可拖动总长度)，同一窗口尺寸下只测量一次"""
+        size = driver.get_window_size()
+        key = (size.get('width'), size.get('height'))
+        if key not in self._geometry:
+            measured = driver.execute_script(GEOMETRY_SCRIPT)
+            if not measured or measured['track'] <= measured['slider']:
+                return None
+            self._geometry[key] = (measured['slider'], measured['track'] - measured['slider'])
+        return self._geometry[key]
+
+    def drag(self, driver, slider, angle: float) -> Optional[Tuple[float, bool]]:
+        """
+        按缓动轨迹分多步拖动滑块，返回 (实际拖动比例, 是否使用拟合映射)；取不到几何尺寸时返回 None
+        """
+        geometry = self.geometry(driver)
+        if geometry is None:
+            return None
+        _, total = geometry
+        fraction, calibrated = self.fraction_for(angle)
+        distance = fraction * total
+
+        actions = ActionChains(driver, duration=self.step_ms)
+        actions.click_and_hold(slider)
+        moved = 0
+        for step in range(1, self.steps + 1):
+            # 整数像素移动，误差累积到下一步，最后一步正好到达目标
+            target = round(distance * ease_out_cubic(step / self.steps))
+            if target != moved:
+                actions.move_by_offset(target - moved, 0)
+                moved = target
+        actions.pause(0.1)
+        actions.release()
+        actions.perform()
+        return fraction, calibrated
+
+    def record(self, angle: float, fraction: float, calibrated: bool, success: bool):
+        """记录一次拖动结果，成功样本每增加一批重新拟合"""
+        stat = self._stats[calibrated]
+        stat[0] += int(success)
+        stat[1] += 1
+        if not self.db_path or not self.enabled:
+            return
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    INSERT INTO captcha_drag_samples (angle, fraction, success, calibrated, observed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (float(angle), float(fraction), int(success), int(calibrated), time.time()))
+                total = conn.execute("SELECT COUNT(*) FROM captcha_drag_samples WHERE success = 1").fetchone()[0]
+                conn.commit()
+        except Exception as e:
+            logger.error(f"保存拖动样本失败: {str(e)}")
+            return
+        if success and total % 10 == 0:
+            self.refit()
@@ -0,0 +1,111 @@
+# !/usr/bin/env python3
+"""
+把训练好的 RotateNet 导出为 ONNX（失败时导出 TorchScript），并在 img_examples 上做一致性检查。
+
+用法: python export_model.py [--model models/model_13.pth] [--format auto|onnx|torchscript] [--atol 1e-3]
+"""
+import os
+import re
+import sys
+import glob
+import argparse
+
+import numpy as np
+import torch
+
+from model import load_model
+from inference import (DEFAULT_MODEL_PATH, input_shape, exported_paths, open_backend,
+                       preprocess_array, softmax)
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'img_examples')
+
+
+def export_onnx(model, path: str, opset: int):
+    dummy = torch.zeros((1,) + input_shape, dtype=torch.float32)
+    torch.onnx.export(
+        model, dummy, path,
+        input_names=['input'], output_names=['logits'],
+        dynamic_axes={'input': {0: 'batch'}, 'logits': {0: 'batch'}},
+        opset_version=opset, do_constant_folding=True,
+    )
+    try:
+        import onnx
+        onnx.checker.check_model(onnx.load(path))
+    except ImportError:
+        pass
+
+
+def export_torchscript(model, path: str):
+    dummy = torch.zeros((1,) + input_shape, dtype=torch.float32)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, dummy)
+    traced = torch.jit.freeze(traced)
+    traced.save(path)
+
+
+def check_parity(model, backend, atol: float) -> bool:
+    """逐张比较导出模型与原模型的输出，返回是否全部一致"""
+    paths = sorted(glob.glob(os.path.join(EXAMPLES_DIR, 'angle_*.png')))
+    if not paths:
+        print(f"没有找到示例图片: {EXAMPLES_DIR}")
+        return False
+
+    ok = True
+    print(f"\n{'图片':<20}{'标注':>6}{'原模型':>8}{'导出':>8}{'最大误差':>12}")
+    for path in paths:
+        batch = preprocess_array(path, input_shape)
+        with torch.no_grad():
+            expected = model(torch.from_numpy(batch)).numpy()
+        actual = backend.predict(batch)
+        diff = float(np.abs(softmax(expected) - softmax(actual)).max())
+        expected_angle = int(np.argmax(expected, axis=1)[0])
+        actual_angle = int(np.argmax(actual, axis=1)[0])
+        match = re.search(r'angle_(\d+)', os.path.basename(path))
+        label = match.group(1) if match else '-'
+        print(f"{os.path.basename(path):<20}{label:>6}{expected_angle:>8}{actual_angle:>8}{diff:>12.2e}")
+        if expected_angle != actual_angle or diff > atol:
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='导出旋转角度模型并检查一致性')
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help='训练得到的 .pth 文件')
+    parser.add_argument('--format', default='auto', choices=['auto', 'onnx', 'torchscript'])
+    parser.add_argument('--opset', type=int, default=13)
+    parser.add_argument('--atol', type=float, default=1e-3, help='概率的最大允许误差')
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    if model is None:
+        sys.exit(1)
+    model.eval()
+    onnx_path, script_path = exported_paths(args.model)
+
+    exported = None
+    if args.format in ('auto', 'onnx'):
+        try:
+            export_onnx(model, onnx_path, args.opset)
+            exported = 'onnx'
+            print(f"已导出 ONNX: {onnx_path}")
+        except Exception as e:
+            print(f"导出 ONNX 失败: {e}")
+            if args.format == 'onnx':
+                sys.exit(1)
+    if exported is None:
+        export_torchscript(model, script_path)
+        exported = 'torchscript'
+        print(f"已导出 TorchScript: {script_path}")
+
+    backend = open_backend(exported, args.model, max(1, min(4, os.cpu_count() or 1)))
+    if backend is None:
+        print("已导出，但当前环境无法加载该后端（ONNX 需要安装 onnxruntime），跳过一致性检查")
+        return
+    if not check_parity(model, backend, args.atol):
+        print("\n一致性检查未通过")
+        sys.exit(1)
+    print("\n一致性检查通过")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,22 +2,23 @@
 """
 验证训练模型。
 
+推理后端：
+    onnx         ONNX Runtime（需要 onnxruntime 和 export_model.py 导出的 .onnx 文件），不导入 torch
+    torchscript  TorchScript（export_model.py 导出 ONNX 失败时的备选 .pt 文件）
+    torch        直接加载训练得到的 .pth
+    auto         按以上顺序选第一个可用的
+    int8         quantize.py 生成的 INT8 量化模型，只在显式指定时使用
+
 Author: pankeyu
 Date: 2022/05/19
 """
 import os
 import sys
-import requests
 import numpy as np
-from io import BytesIO
 import logging
 import cv2
-import pickle
-
-import torch
-import torch.nn as nn
-from torchvision import models
-import torch.nn.functional as F
+import time
+import threading
 
 # 添加日志记录
 logger = logging.getLogger(__name__)
@@ -28,171 +29,418 @@ logger.addHandler(handler)
 
 input_shape = (3, 224, 224)  # 修正为224x224，标准ResNet输入尺寸
 
-class RotateNet(nn.Module):
-    def __init__(self):
-        super().__init__()
-        self.model = models.resnet50(pretrained=False)  # 不加载预训练权重
-        self.model.fc = nn.Linear(2048, 360)
-
-    def forward(self, x):
-        """
-        前向传播，使用resnet 50作为backbone，后面接一个线性层。
-
-        Args:
-            x (_type_): (batch, 3, 224, 224)
-
-        Returns:
-            _type_: 360维的一个tensor，表征属于每一个角度类别的概率
-        """
-        x = self.model(x)
-        return x
-
-# 添加类重定向，解决模块不匹配问题
-class _RenameUnpickler(pickle.Unpickler):
-    def find_class(self, module, name):
-        # 将__main__.RotateNet重定向到当前模块的RotateNet
-        if module == "__main__" and name == "RotateNet":
-            return RotateNet
-        return super().find_class(module, name)
-
-def custom_load(file_obj):
-    """自定义模型加载函数，处理模块重定向"""
-    return _RenameUnpickler(file_obj).load()
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+DEFAULT_MODEL_PATH = os.path.join(MODEL_DIR, 'model_13.pth')
 
-def preprocess_image(img_path, input_shape=(3, 224, 224)):
+BACKENDS = ('onnx', 'torchscript', 'torch')
+
+
+def exported_paths(model_path: str):
+    """训练权重对应的导出文件路径: (onnx, torchscript)"""
+    stem = os.path.splitext(model_path)[0]
+    return stem + '.onnx', stem + '.pt'
+
+
+def quantized_path(model_path: str) -> str:
+    """quantize.py 输出的 INT8 TorchScript 路径"""
+    return os.path.splitext(model_path)[0] + '.int8.pt'
+
+
+def quantized_engine() -> str:
+    """按平台选择量化算子引擎，量化和推理必须使用同一引擎"""
+    import torch
+    supported = torch.backends.quantized.supported_engines
+    for engine in ('x86', 'fbgemm', 'qnnpack'):
+        if engine in supported:
+            return engine
+    return supported[0]
+
+
+def _model_module():
+    """延迟导入模型定义，只有 torch 后端需要 torch/torchvision"""
+    try:
+        from . import model as model_module
+    except ImportError:
+        import model as model_module
+    return model_module
+
+
+def decode_image(data: bytes):
+    """把图片字节解码为 OpenCV 的 BGR 数组，无法解码时返回 None"""
+    if not data:
+        return None
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def load_image(img_path):
+    """读取本地图片或下载在线图片，返回 OpenCV 的 BGR 数组；已解码的数组原样返回"""
+    if isinstance(img_path, np.ndarray):
+        return img_path
+    if isinstance(img_path, (bytes, bytearray)):
+        img = decode_image(bytes(img_path))
+        if img is None:
+            raise ValueError("无法解码图片数据")
+        return img
+    if img_path.startswith(('http://', 'https://')):
+        # 下载在线图片，只在这里需要 requests，不拖慢 ONNX 路径的导入
+        import requests
+        logger.info(f"下载图片: {img_path}")
+        response = requests.get(img_path, timeout=10)
+        # 转换为OpenCV格式
+        img = decode_image(response.content)
+    else:
+        # 加载本地图片
+        img = cv2.imread(img_path, cv2.IMREAD_COLOR)
+
+    if img is None:
+        logger.error(f"无法加载图片: {img_path}")
+        raise ValueError(f"无法加载图片: {img_path}")
+    return img
+
+
+def normalize_image(img_path, input_shape=(3, 224, 224)) -> np.ndarray:
     """
     使用OpenCV对图像进行预处理，与原始项目保持一致
+
+    Returns:
+        np.ndarray: (H, W, 3) 的 float32 数组，已按 ImageNet 均值方差归一化
     """
     try:
-        if img_path.startswith(('http://', 'https://')):
-            # 下载在线图片
-            logger.info(f"下载图片: {img_path}")
-            response = requests.get(img_path, timeout=10)
-            # 转换为OpenCV格式
-            img_array = np.asarray(bytearray(response.content), dtype=np.uint8)
-            img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-        else:
-            # 加载本地图片
-            img = cv2.imread(img_path, cv2.IMREAD_COLOR)
-        
-        if img is None:
-            logger.error(f"无法加载图片: {img_path}")
-            raise ValueError(f"无法加载图片: {img_path}")
-            
+        img = load_image(img_path)
+
         # OpenCV默认是BGR格式，转换为RGB
         img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        
+
         # 裁剪为正方形（从中心裁剪）
         height, width = img.shape[:2]
         size = min(width, height)
         start_x = (width - size) // 2
         start_y = (height - size) // 2
         img = img[start_y:start_y + size, start_x:start_x + size]
-        
+
         # 调整大小为224x224
         img = cv2.resize(img, (input_shape[1], input_shape[2]))
-        
+
         # 转换为PyTorch所需的格式并归一化
         img = img.astype(np.float32) / 255.0
-        
+
         # 应用ImageNet均值和标准差进行归一化
         mean = np.array([0.485, 0.456, 0.406], dtype=np.float32)
         std = np.array([0.229, 0.224, 0.225], dtype=np.float32)
-        
-        img = (img - mean) / std
-        
-        # 调整维度顺序（HWC->CHW）
-        img = np.transpose(img, (2, 0, 1))
-        img_tensor = torch.from_numpy(img).unsqueeze(0)  # 添加batch维度
-        
-        return img_tensor
+
+        return (img - mean) / std
     except Exception as e:
         logger.error(f"图像预处理失败: {e}")
         raise e
 
-def getAngle(imgPath: str) -> int:
+
+def to_batch(images) -> np.ndarray:
+    """HWC 图像列表转换为 (N, 3, H, W) 的连续 float32 数组"""
+    return np.ascontiguousarray(np.stack([np.transpose(img, (2, 0, 1)) for img in images]), dtype=np.float32)
+
+
+def preprocess_array(img_path, input_shape=(3, 224, 224)) -> np.ndarray:
+    """
+    预处理单张图片
+
+    Returns:
+        np.ndarray: (1, 3, H, W) 的 float32 数组
+    """
+    return to_batch([normalize_image(img_path, input_shape)])
+
+
+def preprocess_image(img_path, input_shape=(3, 224, 224)):
+    """预处理并转换为 torch 张量，供 torch 后端和导出脚本使用"""
+    import torch
+    return torch.from_numpy(preprocess_array(img_path, input_shape))
+
+
+class OnnxBackend:
+    """ONNX Runtime 推理，开启全部图优化"""
+    name = 'onnx'
+
+    def __init__(self, path: str, threads: int):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class TorchBackend:
+    """eager 模型或 TorchScript 模型"""
+
+    def __init__(self, model, name: str = 'torch'):
+        self.model = model
+        self.name = name
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        import torch
+        with torch.no_grad():
+            return self.model(torch.from_numpy(batch)).numpy()
+
+
+def set_torch_threads(threads: int):
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # 已有并行任务运行过时不能再设置
+        pass
+
+
+def open_backend(name: str, model_path: str, threads: int):
+    """
+    打开指定后端；所需依赖或导出文件不存在时返回 None
+    """
+    onnx_path, script_path = exported_paths(model_path)
+    if name == 'onnx':
+        if not os.path.exists(onnx_path):
+            return None
+        try:
+            return OnnxBackend(onnx_path, threads)
+        except ImportError:
+            return None
+    if name == 'torchscript':
+        if not os.path.exists(script_path):
+            return None
+        import torch
+        set_torch_threads(threads)
+        model = torch.jit.load(script_path, map_location='cpu')
+        model.eval()
+        return TorchBackend(model, 'torchscript')
+    if name == 'int8':
+        path = quantized_path(model_path)
+        if not os.path.exists(path):
+            return None
+        import torch
+        set_torch_threads(threads)
+        torch.backends.quantized.engine = quantized_engine()
+        model = torch.jit.load(path, map_location='cpu')
+        model.eval()
+        return TorchBackend(model, 'int8')
+    if name == 'torch':
+        set_torch_threads(threads)
+        model = _model_module().load_model(model_path)
+        if model is None:
+            return None
+        model.eval()
+        return TorchBackend(model, 'torch')
+    raise ValueError(f"未知的推理后端: {name}")
+
+
+class ModelHolder:
+    """
+    进程内共享的模型：权重只加载一次，可在启动时由后台线程预热。
+    """
+
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH, num_threads: int = 0, backend: str = 'auto'):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.backend = backend
+        self._model = None
+        self._lock = threading.Lock()
+        self._warm_thread = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def configure(self, model_path: str = None, num_threads: int = None, backend: str = None):
+        """修改模型路径、线程数或后端，只在模型加载前生效"""
+        with self._lock:
+            if self._model is not None:
+                logger.warning("模型已加载，忽略新的推理配置")
+                return
+            if model_path:
+                self.model_path = model_path
+            if num_threads is not None:
+                self.num_threads = num_threads
+            if backend:
+                self.backend = backend
+
+    def _load(self):
+        start = time.time()
+        # 验证码一次只推理一张图，线程数超过物理核数只会互相抢占，默认最多 4 个
+        threads = self.num_threads or max(1, min(4, os.cpu_count() or 1))
+        # 指定的后端不可用时退回自动选择，不让验证码因为缺少导出文件而无法处理
+        candidates = BACKENDS if self.backend == 'auto' else (self.backend,) + tuple(b for b in BACKENDS if b != self.backend)
+        model = None
+        for name in candidates:
+            try:
+                model = open_backend(name, self.model_path, threads)
+            except Exception as e:
+                logger.warning(f"推理后端 {name} 加载失败: {str(e)}")
+            if model is not None:
+                break
+            if name == self.backend:
+                logger.warning(f"推理后端 {name} 不可用，改为自动选择")
+        if model is None:
+            logger.error(f"没有可用的推理后端: {', '.join(candidates)}")
+            return None
+        # 空跑一次前向，让首个真实验证码不再承担内存分配和算子初始化的开销
+        model.predict(np.zeros((1,) + input_shape, dtype=np.float32))
+        logger.info(f"旋转角度模型已就绪（{model.name}），耗时 {time.time() - start:.2f} 秒，推理线程 {threads}")
+        return model
+
+    def get(self):
+        """返回已加载的推理后端，首次调用时同步加载；没有可用后端时返回 None"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load()
+        return self._model
+
+    def warm_up(self, background: bool = True):
+        """预热模型；background 为 True 时在守护线程中加载，不阻塞调用方"""
+        if self._model is not None:
+            return
+        if not background:
+            self.get()
+            return
+        with self._lock:
+            if self._warm_thread is not None and self._warm_thread.is_alive():
+                return
+            self._warm_thread = threading.Thread(target=self._warm_up_quietly, name='rotate-net-warmup', daemon=True)
+            self._warm_thread.start()
+
+    def _warm_up_quietly(self):
+        try:
+            self.get()
+        except Exception as e:
+            logger.error(f"模型预热失败: {str(e)}")
+
+
+model_holder = ModelHolder()
+
+
+def warm_up(background: bool = True, model_path: str = None, num_threads: int = None, backend: str = None):
+    """启动时预热共享模型；model_path 可以是 models 目录下的文件名，如蒸馏得到的 student_mobilenet_v3_large.pth"""
+    if model_path and not os.path.isabs(model_path):
+        model_path = os.path.join(MODEL_DIR, model_path)
+    model_holder.configure(model_path, num_threads, backend)
+    model_holder.warm_up(background)
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+# 测试时增强：预先旋转 90° 的整数倍（无插值损失）再加一张水平翻转
+TTA_OFFSETS = (0, 90, 180, 270)
+TTA_FLIP = True
+CONFIDENCE_WINDOW = 5  # 置信度统计预测角度左右各几度内的概率
+
+
+def validate_offsets(offsets):
+    """增强视图用 np.rot90 旋转，偏移角度只能是 90 的倍数，否则对齐后的分布与视图不一致"""
+    invalid = [offset for offset in offsets if offset % 90 != 0]
+    if invalid:
+        raise ValueError(f"TTA 偏移角度必须是 90 的倍数: {invalid}")
+
+
+def tta_views(img: np.ndarray, offsets=TTA_OFFSETS, flip: bool = TTA_FLIP):
+    """
+    生成增强视图和对应的对齐方式: [(视图, 偏移角度, 是否翻转)]。
+    np.rot90 逆时针旋转，与训练时 getRotationMatrix2D 正角度方向一致，视图的标注角度为 原角度 + 偏移。
+    """
+    validate_offsets(offsets)
+    views = []
+    for offset in offsets:
+        k = (offset // 90) % 4
+        views.append((np.rot90(img, k), offset, False))
+    if flip:
+        # 水平翻转后图片仍然是“正的”，旋转方向相反，标注角度为 -原角度
+        views.append((img[:, ::-1], 0, True))
+    return views
+
+
+def align_probs(probs: np.ndarray, offset: int, flipped: bool) -> np.ndarray:
+    """把视图的角度分布循环对齐回原图的角度坐标"""
+    if flipped:
+        # aligned[i] = probs[-i mod 360]
+        return np.roll(probs[::-1], 1)
+    # aligned[i] = probs[i + offset]
+    return np.roll(probs, -offset)
+
+
+def fuse_probs(aligned: np.ndarray, window: int = CONFIDENCE_WINDOW):
+    """
+    平均对齐后的分布，返回 (角度, 置信度)；置信度为预测角度 ±window 度内的概率和，角度按圆周处理。
+    """
+    fused = aligned.mean(axis=0)
+    angle = int(np.argmax(fused))
+    indices = np.arange(angle - window, angle + window + 1) % fused.shape[-1]
+    return angle, float(fused[indices].sum())
+
+
+def prepare_views(imgPath, offsets=TTA_OFFSETS, flip: bool = TTA_FLIP):
+    """预处理并生成增强视图，返回 (批量数组, [(偏移角度, 是否翻转)])"""
+    views = tta_views(normalize_image(imgPath, input_shape=input_shape), offsets, flip)
+    return to_batch([view for view, _, _ in views]), [(offset, flipped) for _, offset, flipped in views]
+
+
+def fuse_views(probs: np.ndarray, layout, window: int = CONFIDENCE_WINDOW):
+    """把各视图的概率分布对齐后融合，返回 (角度, 置信度)"""
+    aligned = np.stack([align_probs(p, offset, flipped) for p, (offset, flipped) in zip(probs, layout)])
+    return fuse_probs(aligned, window)
+
+
+def predict_angle(imgPath, offsets=TTA_OFFSETS, flip: bool = TTA_FLIP, window: int = CONFIDENCE_WINDOW):
+    """
+    一次批量前向推理所有增强视图，融合后返回 (角度, 置信度)；失败时返回 (0, 0.0)
+
+    Args:
+        imgPath: 图片路径、URL、图片字节，或 OpenCV 的 BGR 数组
+    """
+    try:
+        validate_offsets(offsets)
+        model = model_holder.get()
+        if model is None:
+            return 0, 0.0
+
+        batch, layout = prepare_views(imgPath, offsets, flip)
+        angle, confidence = fuse_views(softmax(model.predict(batch)), layout, window)
+
+        logger.info(f"预测的旋转角度: {angle}，置信度 {confidence:.2f}（{len(layout)} 个视图）")
+        return angle, confidence
+
+    except Exception as e:
+        logger.error(f"预测图片旋转角度失败: {str(e)}")
+        return 0, 0.0
+
+
+def getAngle(imgPath) -> int:
     """
     获取图片的旋转角度
 
     Args:
-        imgPath (str): 图片路径或URL
+        imgPath: 图片路径、URL、图片字节，或 OpenCV 的 BGR 数组
 
     Returns:
         int: 预测的旋转角度 (0-359)
     """
     try:
-        # 获取模型文件的绝对路径
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(current_dir, 'models', 'model_13.pth')
-        
-        if not os.path.exists(model_path):
-            logger.error(f"模型文件不存在: {model_path}")
+        model = model_holder.get()
+        if model is None:
             return 0
-            
-        # 创建一个新的模型实例
-        model = RotateNet()
-        
-        # 加载模型权重
-        try:
-            # 使用自定义加载函数处理模块重定向问题
-            with open(model_path, 'rb') as f:
-                checkpoint = custom_load(f)
-            
-            # 根据不同情况处理权重
-            if isinstance(checkpoint, dict):
-                if 'state_dict' in checkpoint:
-                    model.load_state_dict(checkpoint['state_dict'])
-                else:
-                    model.load_state_dict(checkpoint)
-            else:
-                # 如果加载的是整个模型对象，提取其状态字典
-                try:
-                    model.load_state_dict(checkpoint.state_dict())
-                except:
-                    # 作为最后的尝试，直接使用加载的模型
-                    model = checkpoint
-            
-            model.eval()
-            logger.info("成功使用自定义加载函数加载模型权重")
-        except Exception as e:
-            # 如果自定义加载函数失败，尝试使用torch.load加载
-            logger.warning(f"自定义加载函数失败，尝试其他方法: {e}")
-            try:
-                # 设置模块重定向
-                sys.modules['__main__'] = sys.modules[__name__]
-                
-                # 使用torch.load加载
-                checkpoint = torch.load(model_path, map_location=torch.device('cpu'))
-                
-                if isinstance(checkpoint, dict):
-                    if 'state_dict' in checkpoint:
-                        model.load_state_dict(checkpoint['state_dict'])
-                    else:
-                        model.load_state_dict(checkpoint)
-                else:
-                    model = checkpoint
-                
-                model.eval()
-                logger.info("使用模块重定向成功加载模型权重")
-            except Exception as e2:
-                logger.error(f"所有加载模型尝试均失败: {e2}")
-                # 创建一个"干净"的模型
-                model = RotateNet()
-                model.eval()
-                logger.warning("使用未训练的模型进行推理")
 
         # 预处理图像
-        img_tensor = preprocess_image(imgPath, input_shape=input_shape)
-        
-        # 确保输入是float类型
-        img_tensor = img_tensor.float()
-        
+        batch = preprocess_array(imgPath, input_shape=input_shape)
+
         # 预测
-        with torch.no_grad():
-            logits = model(img_tensor)
-            probs = F.softmax(logits, dim=-1)
-            pred_angle = int(torch.argmax(probs, dim=1).item())
-        
+        probs = softmax(model.predict(batch))
+        pred_angle = int(np.argmax(probs, axis=1)[0])
+
         logger.info(f"预测的旋转角度: {pred_angle}")
         return pred_angle
 
@@ -210,10 +458,8 @@ if __name__ == '__main__':
             # 如果是GitHub URL但不是raw格式，尝试替换为raw.githubusercontent.com
             image_path = image_path.replace("github.com", "raw.githubusercontent.com")
             image_path = image_path.replace("/blob/", "/")
-        
+
         angle = getAngle(image_path)
         print(f"图片 {image_path} 的旋转角度为: {angle}°")
     else:
         print("请提供图片路径或URL作为参数")
-
-
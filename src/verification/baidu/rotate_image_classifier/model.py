@@ -0,0 +1,156 @@
+# !/usr/bin/env python3
+"""
+旋转角度模型定义与权重加载，推理、导出脚本共用。
+"""
+import os
+import sys
+import pickle
+import logging
+
+import torch
+import torch.nn as nn
+from torchvision import models
+
+logger = logging.getLogger(__name__)
+
+input_shape = (3, 224, 224)  # 修正为224x224，标准ResNet输入尺寸
+
+
+class RotateNet(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.model = models.resnet50(pretrained=False)  # 不加载预训练权重
+        self.model.fc = nn.Linear(2048, 360)
+
+    def forward(self, x):
+        """
+        前向传播，使用resnet 50作为backbone，后面接一个线性层。
+
+        Args:
+            x (_type_): (batch, 3, 224, 224)
+
+        Returns:
+            _type_: 360维的一个tensor，表征属于每一个角度类别的概率
+        """
+        x = self.model(x)
+        return x
+
+
+STUDENT_ARCHS = ('resnet18', 'mobilenet_v3_large', 'mobilenet_v3_small')
+
+
+class StudentNet(nn.Module):
+    """蒸馏用的轻量学生模型，输出与 RotateNet 相同的 360 类角度"""
+
+    def __init__(self, arch: str = 'resnet18', pretrained: bool = False):
+        super().__init__()
+        if arch not in STUDENT_ARCHS:
+            raise ValueError(f"不支持的学生模型: {arch}")
+        self.arch = arch
+        weights = 'DEFAULT' if pretrained else None
+        self.model = getattr(models, arch)(weights=weights)
+        if arch == 'resnet18':
+            self.model.fc = nn.Linear(self.model.fc.in_features, 360)
+        else:
+            last = self.model.classifier[-1]
+            self.model.classifier[-1] = nn.Linear(last.in_features, 360)
+
+    def forward(self, x):
+        return self.model(x)
+
+
+def save_student(model: StudentNet, path: str):
+    """学生模型只保存结构名和权重，加载时不依赖 pickle 的类路径"""
+    torch.save({'arch': model.arch, 'state_dict': model.state_dict()}, path)
+
+
+def count_parameters(model: nn.Module) -> int:
+    return sum(p.numel() for p in model.parameters())
+
+
+# 添加类重定向，解决模块不匹配问题
+class _RenameUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        # 将__main__.RotateNet重定向到当前模块的RotateNet
+        if module == "__main__" and name == "RotateNet":
+            return RotateNet
+        return super().find_class(module, name)
+
+
+def custom_load(file_obj):
+    """自定义模型加载函数，处理模块重定向"""
+    return _RenameUnpickler(file_obj).load()
+
+
+def _student_from(checkpoint):
+    """save_student 保存的学生模型检查点，其他格式返回 None"""
+    if not (isinstance(checkpoint, dict) and 'arch' in checkpoint):
+        return None
+    student = StudentNet(checkpoint['arch'])
+    student.load_state_dict(checkpoint['state_dict'])
+    logger.info(f"已加载学生模型: {checkpoint['arch']}")
+    return student
+
+
+def load_model(model_path: str):
+    """
+    从文件加载 RotateNet，兼容训练脚本中以 __main__.RotateNet 保存的整模型、state_dict 和蒸馏得到的学生模型。
+
+    Returns:
+        加载好的模型（未切换 eval 模式）；模型文件不存在时返回 None
+    """
+    if not os.path.exists(model_path):
+        logger.error(f"模型文件不存在: {model_path}")
+        return None
+
+    model = RotateNet()
+    try:
+        # 使用自定义加载函数处理模块重定向问题
+        with open(model_path, 'rb') as f:
+            checkpoint = custom_load(f)
+
+        student = _student_from(checkpoint)
+        if student is not None:
+            return student
+
+        # 根据不同情况处理权重
+        if isinstance(checkpoint, dict):
+            if 'state_dict' in checkpoint:
+                model.load_state_dict(checkpoint['state_dict'])
+            else:
+                model.load_state_dict(checkpoint)
+        else:
+            # 如果加载的是整个模型对象，提取其状态字典
+            try:
+                model.load_state_dict(checkpoint.state_dict())
+            except:
+                # 作为最后的尝试，直接使用加载的模型
+                model = checkpoint
+        logger.info("成功使用自定义加载函数加载模型权重")
+    except Exception as e:
+        # 如果自定义加载函数失败，尝试使用torch.load加载
+        logger.warning(f"自定义加载函数失败，尝试其他方法: {e}")
+        try:
+            # 设置模块重定向
+            sys.modules['__main__'] = sys.modules[__name__]
+
+            # 使用torch.load加载
+            checkpoint = torch.load(model_path, map_location=torch.device('cpu'))
+            student = _student_from(checkpoint)
+            if student is not None:
+                return student
+
+            if isinstance(checkpoint, dict):
+                if 'state_dict' in checkpoint:
+                    model.load_state_dict(checkpoint['state_dict'])
+                else:
+                    model.load_state_dict(checkpoint)
+            else:
+                model = checkpoint
+            logger.info("使用模块重定向成功加载模型权重")
+        except Exception as e2:
+            logger.error(f"所有加载模型尝试均失败: {e2}")
+            # 创建一个"干净"的模型
+            model = RotateNet()
+            logger.warning("使用未训练的模型进行推理")
+    return model
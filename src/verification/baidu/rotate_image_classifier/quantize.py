@@ -0,0 +1,124 @@
+# !/usr/bin/env python3
+"""
+INT8 量化旋转角度模型：主干网络做静态训练后量化（FX 图模式，用示例图和收集的验证码图校准），
+最后的 fc 层做动态量化；输出量化前后的角度误差与推理耗时对比，并保存为 TorchScript。
+
+用法: python quantize.py [--model models/model_13.pth] [--calib-dir 目录 ...] [--engine x86]
+"""
+import os
+import sys
+import glob
+import time
+import copy
+import argparse
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.ao.quantization import get_default_qconfig_mapping, quantize_dynamic
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+from model import load_model
+from inference import DEFAULT_MODEL_PATH, input_shape, quantized_path, preprocess_array, quantized_engine
+from utils import angle_difference, angle_label
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'img_examples')
+IMAGE_PATTERNS = ('*.png', '*.jpg', '*.jpeg')
+
+
+def collect_images(dirs):
+    paths = []
+    for directory in dirs:
+        for pattern in IMAGE_PATTERNS:
+            paths.extend(glob.glob(os.path.join(directory, pattern)))
+    return sorted(set(paths))
+
+
+def quantize(model, calib_batches, engine: str):
+    """主干静态量化 + fc 动态量化"""
+    torch.backends.quantized.engine = engine
+    qconfig_mapping = get_default_qconfig_mapping(engine)
+    # 全连接层保持浮点，留给动态量化处理（RotateNet 的 model.fc、学生模型的分类头）
+    qconfig_mapping.set_object_type(nn.Linear, None)
+    example = torch.zeros((1,) + input_shape, dtype=torch.float32)
+
+    prepared = prepare_fx(copy.deepcopy(model), qconfig_mapping, (example,))
+    with torch.no_grad():
+        for batch in calib_batches:
+            prepared(batch)
+    quantized = convert_fx(prepared)
+    return quantize_dynamic(quantized, {nn.Linear}, dtype=torch.qint8)
+
+
+def evaluate(model, batches, labels, reference=None):
+    """返回 (预测角度列表, 与标注的平均角度误差, 与参考预测的平均角度误差, 单张平均耗时毫秒)"""
+    predictions = []
+    elapsed = 0.0
+    with torch.no_grad():
+        for batch in batches:
+            start = time.perf_counter()
+            logits = model(batch)
+            elapsed += time.perf_counter() - start
+            predictions.append(int(torch.argmax(logits, dim=1).item()))
+
+    labelled = [(p, l) for p, l in zip(predictions, labels) if l is not None]
+    label_error = float(np.mean([angle_difference(p, l) for p, l in labelled])) if labelled else None
+    reference_error = None
+    if reference is not None:
+        reference_error = float(np.mean([angle_difference(p, r) for p, r in zip(predictions, reference)]))
+    return predictions, label_error, reference_error, elapsed / max(1, len(batches)) * 1000
+
+
+def file_size_mb(path: str) -> float:
+    return os.path.getsize(path) / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='INT8 量化旋转角度模型')
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help='训练得到的 .pth 文件')
+    parser.add_argument('--calib-dir', action='append', default=[], help='额外的校准图片目录，可重复指定')
+    parser.add_argument('--engine', default=None, help='量化引擎，默认按平台选择 x86/fbgemm/qnnpack')
+    parser.add_argument('--max-error', type=float, default=None, help='量化后与原模型的平均角度误差上限，超出时不保存')
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    if model is None:
+        sys.exit(1)
+    model.eval()
+
+    paths = collect_images([EXAMPLES_DIR] + args.calib_dir)
+    if not paths:
+        print("没有可用的校准图片")
+        sys.exit(1)
+    batches = [torch.from_numpy(preprocess_array(path, input_shape)) for path in paths]
+    labels = [angle_label(path) for path in paths]
+    print(f"校准图片 {len(paths)} 张，其中有标注 {sum(l is not None for l in labels)} 张")
+
+    engine = args.engine or quantized_engine()
+    quantized = quantize(model, batches, engine)
+
+    float_pred, float_label_err, _, float_ms = evaluate(model, batches, labels)
+    int8_pred, int8_label_err, drift, int8_ms = evaluate(quantized, batches, labels, reference=float_pred)
+
+    def fmt(value):
+        return '-' if value is None else f"{value:.2f}°"
+
+    print(f"\n{'模型':<8}{'与标注平均误差':>16}{'与原模型平均误差':>18}{'单张耗时':>12}")
+    print(f"{'float':<8}{fmt(float_label_err):>16}{'-':>18}{float_ms:>10.1f}ms")
+    print(f"{'int8':<8}{fmt(int8_label_err):>16}{fmt(drift):>18}{int8_ms:>10.1f}ms")
+    print(f"量化引擎 {engine}，加速 {float_ms / int8_ms if int8_ms else 0:.2f}×")
+
+    if args.max_error is not None and drift > args.max_error:
+        print(f"平均角度误差 {drift:.2f}° 超过上限 {args.max_error}°，不保存量化模型")
+        sys.exit(1)
+
+    output = quantized_path(args.model)
+    example = torch.zeros((1,) + input_shape, dtype=torch.float32)
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(quantized, example))
+    scripted.save(output)
+    print(f"已保存量化模型: {output}（{file_size_mb(output):.1f} MB，原模型 {file_size_mb(args.model):.1f} MB）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+# !/usr/bin/env python3
+"""
+本机共享的旋转角度推理服务：多个浏览器进程共用一份模型，并发请求合并成一次批量前向推理。
+
+用法: python server.py [--port 8765] [--max-batch 32] [--max-wait-ms 10] [--backend auto] [--threads 0]
+
+接口:
+    POST /angle?offsets=0,90,180,270&flip=1&window=5   请求体为图片字节（PNG/JPEG），返回 {"angle": 角度, "confidence": 置信度}
+    GET  /health                                      返回模型后端和批处理统计
+"""
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+from inference import (model_holder, warm_up, prepare_views, fuse_views, softmax, validate_offsets,
+                       TTA_OFFSETS, TTA_FLIP, CONFIDENCE_WINDOW)
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """把等待时间窗口内到达的请求拼成一个批次推理，再按请求拆分结果"""
+
+    def __init__(self, model, max_batch: int = 32, max_wait: float = 0.01):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.requests = 0
+        self.views = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, batch: np.ndarray, timeout: float = 30) -> np.ndarray:
+        """提交一个请求的全部视图，阻塞到该请求的概率分布算出"""
+        item = {'batch': batch, 'done': threading.Event(), 'result': None, 'error': None}
+        self.queue.put(item)
+        if not item['done'].wait(timeout):
+            raise TimeoutError("推理超时")
+        if item['error'] is not None:
+            raise item['error']
+        return item['result']
+
+    def _collect(self):
+        items = [self.queue.get()]
+        size = len(items[0]['batch'])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            size += len(item['batch'])
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            try:
+                probs = softmax(self.model.predict(np.concatenate([item['batch'] for item in items])))
+                start = 0
+                for item in items:
+                    end = start + len(item['batch'])
+                    item['result'] = probs[start:end]
+                    start = end
+            except Exception as e:
+                logger.error(f"批量推理失败: {str(e)}")
+                for item in items:
+                    item['error'] = e
+            with self._lock:
+                self.batches += 1
+                self.requests += len(items)
+                self.views += sum(len(item['batch']) for item in items)
+            for item in items:
+                item['done'].set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'views': self.views,
+                'requests_per_batch': self.requests / self.batches if self.batches else 0.0,
+            }
+
+
+def parse_tta(query):
+    offsets = query.get('offsets', [None])[0]
+    offsets = tuple(int(o) for o in offsets.split(',') if o) if offsets else TTA_OFFSETS
+    validate_offsets(offsets)
+    flip = query.get('flip', [None])[0]
+    flip = TTA_FLIP if flip is None else flip not in ('0', 'false')
+    window = int(query.get('window', [CONFIDENCE_WINDOW])[0])
+    return offsets, flip, window
+
+
+def make_handler(batcher: MicroBatcher, backend_name: str):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload):
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if urlsplit(self.path).path != '/health':
+                self._send_json(404, {'error': 'not found'})
+                return
+            self._send_json(200, dict(batcher.stats(), backend=backend_name))
+
+        def do_POST(self):
+            parts = urlsplit(self.path)
+            if parts.path != '/angle':
+                self._send_json(404, {'error': 'not found'})
+                return
+            try:
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                offsets, flip, window = parse_tta(parse_qs(parts.query))
+                batch, layout = prepare_views(body, offsets, flip)
+                angle, confidence = fuse_views(batcher.submit(batch), layout, window)
+                self._send_json(200, {'angle': angle, 'confidence': confidence})
+            except ValueError as e:
+                self._send_json(400, {'error': str(e)})
+            except Exception as e:
+                logger.error(f"处理推理请求失败: {str(e)}")
+                self._send_json(500, {'error': str(e)})
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='旋转角度推理服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch', type=int, default=32, help='单批最多视图数')
+    parser.add_argument('--max-wait-ms', type=float, default=10, help='凑批的最长等待时间（毫秒）')
+    parser.add_argument('--backend', default='auto')
+    parser.add_argument('--model', default=None, help='models 目录下的模型文件')
+    parser.add_argument('--threads', type=int, default=0, help='推理线程数，0 表示自动')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    warm_up(background=False, model_path=args.model, num_threads=args.threads, backend=args.backend)
+    model = model_holder.get()
+    if model is None:
+        raise SystemExit("没有可用的推理后端")
+
+    batcher = MicroBatcher(model, args.max_batch, args.max_wait_ms / 1000)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher, model.name))
+    server.daemon_threads = True
+    logger.info(f"推理服务已启动: http://{args.host}:{args.port}（{model.name}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,14 +6,19 @@ Author: pankeyu
 Date: 2022/05/17
 """
 import os
+import glob
+import argparse
 
+import numpy as np
 import torch
 import torch.nn as nn
 from torchvision import models
 import torch.nn.functional as F
 import torch.optim as optim
 
-from utils import get_filenames
+from utils import get_filenames, angle_difference, angle_label
+from model import load_model, StudentNet, STUDENT_ARCHS, save_student, count_parameters
+from inference import DEFAULT_MODEL_PATH, MODEL_DIR, preprocess_array
 from ImageDataset import RotateImageDataset
 from iTrainingLogger import iSummaryWriter
 
@@ -122,5 +127,87 @@ def evaluate(current_steps: int):
         torch.save(model, 'models/model_{:.2f}.pth'.format(correct / len(test_dataloader.dataset)))
 
 
+def example_error(net: nn.Module) -> float:
+    """
+    在 img_examples 上计算平均角度误差（度）。
+    """
+    net.eval()
+    errors = []
+    with torch.no_grad():
+        for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'img_examples', 'angle_*.png'))):
+            label = angle_label(path)
+            logits = net(torch.from_numpy(preprocess_array(path)))
+            errors.append(angle_difference(int(logits.argmax(dim=1).item()), label))
+    return float(np.mean(errors)) if errors else float('nan')
+
+
+def distill(student_arch: str = 'mobilenet_v3_large', teacher_path: str = DEFAULT_MODEL_PATH,
+            temperature: float = 4.0, alpha: float = 0.7, epochs: int = n_epoch, lr: float = 0.01):
+    """
+    以当前模型为教师蒸馏轻量学生模型。
+
+    Args:
+        student_arch (str): 学生模型结构，见 model.STUDENT_ARCHS
+        teacher_path (str): 教师模型权重
+        temperature (float): 软标签温度
+        alpha (float): 软标签损失占比，其余为真实角度的交叉熵
+    """
+    teacher = load_model(teacher_path)
+    if teacher is None:
+        return
+    teacher.eval()
+    student = StudentNet(student_arch, pretrained=True)
+    student_optimizer = optim.SGD(student.parameters(), lr=lr, momentum=0.9)
+    kl_div = nn.KLDivLoss(reduction='batchmean')
+    output_path = os.path.join(MODEL_DIR, f'student_{student_arch}.pth')
+
+    teacher_error = example_error(teacher)
+    best_error = None
+    for i in range(epochs):
+        student.train()
+        for batch_idx, (imgs, targets) in enumerate(train_dataloader):
+            imgs, targets = torch.tensor(imgs, dtype=torch.float32), torch.tensor(targets, dtype=torch.long)
+            with torch.no_grad():
+                teacher_logits = teacher(imgs)
+            student_logits = student(imgs)
+            soft_loss = kl_div(F.log_softmax(student_logits / temperature, dim=-1),
+                               F.softmax(teacher_logits / temperature, dim=-1)) * temperature * temperature
+            hard_loss = F.cross_entropy(student_logits, targets)
+            loss = alpha * soft_loss + (1 - alpha) * hard_loss
+            student_optimizer.zero_grad()
+            loss.backward()
+            student_optimizer.step()
+
+            current_steps = i * len(train_dataloader) + batch_idx * batch_size
+            if current_steps % log_interval == 0:
+                writer.add_scalar('distill_loss', loss.item(), current_steps)
+                writer.record()
+
+        error = example_error(student)
+        writer.add_scalar('distill_example_error', error, i)
+        writer.record()
+        print(f'Epoch {i}: 示例平均角度误差 学生 {error:.2f}° / 教师 {teacher_error:.2f}°')
+        if best_error is None or error < best_error:
+            best_error = error
+            save_student(student, output_path)
+
+    ratio = count_parameters(teacher) / count_parameters(student)
+    print(f'学生模型 {student_arch}: 参数量 {count_parameters(student) / 1e6:.1f}M，'
+          f'为教师的 1/{ratio:.1f}，最佳示例平均角度误差 {best_error:.2f}°（教师 {teacher_error:.2f}°）')
+    print(f'已保存: {output_path}')
+
+
 if __name__ == '__main__':
-    train()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='训练或蒸馏旋转角度模型')
+    parser.add_argument('mode', nargs='?', default='train', choices=['train', 'distill'])
+    parser.add_argument('--student', default='mobilenet_v3_large', choices=STUDENT_ARCHS)
+    parser.add_argument('--teacher', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--temperature', type=float, default=4.0)
+    parser.add_argument('--alpha', type=float, default=0.7)
+    parser.add_argument('--epochs', type=int, default=n_epoch)
+    args = parser.parse_args()
+
+    if args.mode == 'distill':
+        distill(args.student, args.teacher, args.temperature, args.alpha, args.epochs)
+    else:
+        train()
\ No newline at end of file
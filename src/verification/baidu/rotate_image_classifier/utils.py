@@ -1,4 +1,5 @@
 import os
+import re
 import wget
 import zipfile
 
@@ -145,6 +146,14 @@ def angle_difference(x, y):
     return 180 - abs(abs(x - y) - 180)
 
 
+def angle_label(path: str):
+    """
+    从 angle_92.png 形式的文件名中取出标注角度，没有标注时返回 None。
+    """
+    match = re.search(r'angle_(\d+)', os.path.basename(path))
+    return int(match.group(1)) if match else None
+
+
 def binarize_images(x):
     """
     Convert images to range 0-1 and binarize them by making